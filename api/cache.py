@@ -0,0 +1,97 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from prometheus_client import Counter, Gauge
+
+from api.runs import watcher
+
+CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", "256"))
+CACHE_TTL_SECONDS = float(os.getenv("CACHE_TTL_SECONDS", "300"))
+
+CACHE_HITS = Counter("api_cache_hits_total", "Query cache hits", ["endpoint"])
+CACHE_MISSES = Counter("api_cache_misses_total", "Query cache misses", ["endpoint"])
+CACHE_EVICTIONS = Counter("api_cache_evictions_total", "Query cache evictions", ["reason"])
+CACHE_ENTRIES = Gauge("api_cache_entries", "Entries currently in the query cache")
+
+
+class QueryCache:
+    """LRU + TTL cache for query results, keyed on normalized query params.
+
+    clear() starts a new generation: callers take `generation` before querying and pass it to set(), so a result
+    read before a clear (e.g. before a run committed) is dropped instead of being cached past it.
+    """
+
+    def __init__(self, max_entries: int = CACHE_MAX_ENTRIES, ttl: float = CACHE_TTL_SECONDS):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.generation = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0
+
+    def get(self, key):
+        endpoint = key[0]
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None and entry[0] < time.monotonic():
+                del self._data[key]
+                CACHE_EVICTIONS.labels(reason="ttl").inc()
+                entry = None
+            if entry is None:
+                CACHE_MISSES.labels(endpoint=endpoint).inc()
+                CACHE_ENTRIES.set(len(self._data))
+                return None
+            self._data.move_to_end(key)
+        CACHE_HITS.labels(endpoint=endpoint).inc()
+        return entry[1]
+
+    def set(self, key, value, generation: int = None):
+        with self._lock:
+            if generation is not None and generation != self.generation:
+                CACHE_EVICTIONS.labels(reason="stale").inc()
+                return
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+                CACHE_EVICTIONS.labels(reason="lru").inc()
+            CACHE_ENTRIES.set(len(self._data))
+
+    def clear(self, reason: str = "invalidation"):
+        with self._lock:
+            n = len(self._data)
+            self._data.clear()
+            self.generation += 1
+            CACHE_ENTRIES.set(0)
+        if n:
+            CACHE_EVICTIONS.labels(reason=reason).inc(n)
+
+
+cache = QueryCache()
+
+# a new ingestion run means new rows: drop everything
+watcher.on_new_run(lambda run_id: cache.clear("new_run"))
+
+
+def cache_key(endpoint: str, **params):
+    return (endpoint,) + tuple(sorted(params.items()))
+
+
+def normalize_params(**params):
+    """Round the free-form params so near-identical requests share one cache entry.
+
+    lat/lon to 0.01° (~1 km), radius to whole km. The rounded values are
+    also the ones sent to the database, so a cached entry matches its key.
+    """
+    out = dict(params)
+    for k in ("lat", "lon"):
+        if out.get(k) is not None:
+            out[k] = round(float(out[k]), 2)
+    if out.get("radius_km") is not None:
+        out["radius_km"] = float(round(float(out["radius_km"])))
+    return out
@@ -1,15 +1,64 @@
 
 import os
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
 from sqlalchemy.orm import sessionmaker
 from dotenv import load_dotenv
+from api.db_metrics import TimedAsyncQueuePool, TimedQueuePool, instrument
 load_dotenv()
 
 DATABASE = os.getenv("DATABASE")
 
-engine = create_engine(
-    DATABASE,
-    future=True,
-    pool_pre_ping=True,
-)
-SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False, future=True)
+# sync (psycopg2, threadpool handlers) or async (asyncpg, async def handlers)
+DB_MODE = os.getenv("DB_MODE", "sync").lower()
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+# db: read endpoints query Postgres; silver: /recent, /around, /export read the parquet lake (DATABASE optional)
+READ_BACKEND = os.getenv("READ_BACKEND", "db").lower()
+
+if not DATABASE and READ_BACKEND != "silver":
+    raise RuntimeError("DATABASE is not set (only READ_BACKEND=silver runs without a database)")
+
+# engine / SessionLocal stay None without a database: routes that need one are not registered
+engine = None
+SessionLocal = None
+if DATABASE:
+    engine = create_engine(
+        DATABASE,
+        future=True,
+        pool_pre_ping=True,
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+        pool_timeout=DB_POOL_TIMEOUT,
+        poolclass=TimedQueuePool,
+    )
+    instrument(engine)
+    SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False, future=True)
+
+
+def _asyncpg_url(database: str):
+    # asyncpg does not understand libpq's sslmode query param
+    url = make_url(database).set(drivername="postgresql+asyncpg")
+    sslmode = url.query.get("sslmode")
+    connect_args = {"ssl": sslmode} if sslmode and sslmode != "disable" else {}
+    return url.difference_update_query(["sslmode"]), connect_args
+
+
+async_engine = None
+AsyncSessionLocal = None
+if DB_MODE == "async" and DATABASE:
+    from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+    _url, _connect_args = _asyncpg_url(DATABASE)
+    async_engine = create_async_engine(
+        _url,
+        pool_pre_ping=True,
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+        pool_timeout=DB_POOL_TIMEOUT,
+        connect_args=_connect_args,
+        poolclass=TimedAsyncQueuePool,
+    )
+    instrument(async_engine.sync_engine, "async")
+    AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
@@ -0,0 +1,106 @@
+# api/db_metrics.py — SQLAlchemy engine/pool instrumentation exported on /metrics.
+import functools
+import re
+import time
+
+from prometheus_client import Gauge, Histogram
+from sqlalchemy import event
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+STATEMENT_LATENCY = Histogram(
+    "db_statement_duration_seconds",
+    "Time from cursor execute to result, per statement kind and main table",
+    ["operation", "table"],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+)
+POOL_WAIT = Histogram(
+    "db_pool_checkout_wait_seconds",
+    "Time spent waiting for a pooled connection",
+    ["engine"],
+    buckets=(0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5, 30),
+)
+POOL_CHECKED_OUT = Gauge("db_pool_checked_out", "Connections currently checked out", ["engine"])
+
+# first keyword + first table after FROM/INTO/UPDATE/JOIN/...: bounded labels, not the SQL text
+_OPERATION = re.compile(r"^\s*(\w+)")
+# parentheses, and the names after table keywords (the lookahead marks a function call: FROM unnest(...))
+_TOKENS = re.compile(
+    r"(?P<open>\()|(?P<close>\))"
+    r"|\b(?:(?P<distinct>DISTINCT\s+FROM)|(?P<kw>FROM|JOIN|INTO|UPDATE|COPY|TABLE))\s+(?:IF\s+(?:NOT\s+)?EXISTS\s+)?"
+    r"(?P<name>[A-Za-z_][\w.]*)(?P<call>(?=\s*\())?",
+    re.I,
+)
+_SUBQUERY = re.compile(r"\s*(?:SELECT|WITH|VALUES)\b", re.I)
+
+
+def _main_table(statement: str) -> str:
+    # FROM inside function arguments (EXTRACT(epoch FROM ts), substring(s FROM 2)) or after IS [NOT] DISTINCT
+    # is not a table: only keywords at the top level or directly inside a subquery count
+    opened = []
+    for m in _TOKENS.finditer(statement):
+        if m.group("open"):
+            opened.append(m.end())
+        elif m.group("close"):
+            if opened:
+                opened.pop()
+        elif m.group("distinct") or (m.group("call") is not None and m.group("kw").upper() in ("FROM", "JOIN")):
+            continue
+        elif not opened or _SUBQUERY.match(statement, opened[-1]):
+            return m.group("name").lower()
+    return "-"
+
+
+@functools.lru_cache(maxsize=512)
+def statement_labels(statement: str):
+    # the app runs a fixed set of statements: parse each text once
+    op = _OPERATION.match(statement)
+    return (op.group(1).upper() if op else "OTHER"), _main_table(statement)
+
+
+class _TimedGet:
+    # _do_get is where QueuePool blocks when all connections are in use
+    engine_label = "sync"
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            POOL_WAIT.labels(engine=self.engine_label).observe(time.perf_counter() - start)
+
+
+class TimedQueuePool(_TimedGet, QueuePool):
+    engine_label = "sync"
+
+
+class TimedAsyncQueuePool(_TimedGet, AsyncAdaptedQueuePool):
+    engine_label = "async"
+
+
+def instrument(engine, label: str = "sync"):
+    """Statement latency + checked-out gauge on a (sync) Engine; pass async_engine.sync_engine for async."""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("_query_start", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["_query_start"].pop()
+        STATEMENT_LATENCY.labels(*statement_labels(statement)).observe(elapsed)
+
+    @event.listens_for(engine, "handle_error")
+    def _error(context):
+        starts = context.connection.info.get("_query_start") if context.connection is not None else None
+        if starts:
+            starts.pop()
+
+    @event.listens_for(engine.pool, "checkout")
+    def _checkout(dbapi_conn, record, proxy):
+        POOL_CHECKED_OUT.labels(engine=label).inc()
+
+    @event.listens_for(engine.pool, "checkin")
+    def _checkin(dbapi_conn, record):
+        POOL_CHECKED_OUT.labels(engine=label).dec()
+
+    return engine
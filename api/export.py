@@ -0,0 +1,235 @@
+import io
+import json
+import math
+import os
+from datetime import datetime, timedelta, timezone
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+from sqlalchemy import text
+
+from ingest.partitions import UNKNOWN_DATE, lake_partitioning, partition_filter
+
+EXPORT_SOURCE = os.getenv("EXPORT_SOURCE", "db")  # db | silver
+EXPORT_BATCH_ROWS = int(os.getenv("EXPORT_BATCH_ROWS", "10000"))
+SILVER_BASE = os.getenv("SILVER_BASE", "./data/silver")
+
+ARROW_STREAM = "application/vnd.apache.arrow.stream"
+PARQUET = "application/vnd.apache.parquet"
+GEOJSON = "application/geo+json"
+# Accept values -> canonical media type (first match in the Accept header wins)
+MEDIA_TYPES = {
+    ARROW_STREAM: ARROW_STREAM,
+    "application/x-arrow": ARROW_STREAM,
+    PARQUET: PARQUET,
+    "application/x-parquet": PARQUET,
+    GEOJSON: GEOJSON,
+    "application/json": GEOJSON,
+    "*/*": GEOJSON,
+}
+
+SCHEMA = pa.schema([
+    ("event_id", pa.string()),
+    ("mag", pa.float64()),
+    ("place", pa.string()),
+    ("time_utc", pa.timestamp("us", tz="UTC")),
+    ("lat", pa.float64()),
+    ("lon", pa.float64()),
+    ("depth_km", pa.float64()),
+    ("run_id", pa.string()),
+    ("ingestion_time_utc", pa.timestamp("us", tz="UTC")),
+])
+COLS = SCHEMA.names
+# read from the silver parquet: updated_utc orders the versions of an event (latest_per_event), then dropped
+LAKE_SCHEMA = SCHEMA.append(pa.field("updated_utc", pa.timestamp("us", tz="UTC")))
+LAKE_COLS = LAKE_SCHEMA.names
+
+
+def negotiate(accept: str):
+    for part in (accept or "*/*").split(","):
+        media = part.split(";")[0].strip().lower()
+        if media in MEDIA_TYPES:
+            return MEDIA_TYPES[media]
+    return None
+
+
+# -------------------------
+# Sources -> record batches
+# -------------------------
+def export_sql(around: bool, limit: bool):
+    return text(f"""
+  SELECT {", ".join(COLS)}
+    FROM earthquakes
+   WHERE time_utc >= NOW() - make_interval(hours => :hours)
+     AND (mag IS NULL OR mag >= :min_mag)
+     {"AND geom IS NOT NULL AND ST_DWithin(geom, ST_SetSRID(ST_MakePoint(:lon, :lat), 4326)::geography, :radius_m)" if around else ""}
+   ORDER BY time_utc DESC, event_id DESC
+   {"LIMIT :limit" if limit else ""}
+""")
+
+
+def db_batches(engine, params: dict):
+    """Record batches straight from a server-side cursor (no per-row dicts/models)."""
+    around = params.get("lat") is not None and params.get("lon") is not None
+    sql = export_sql(around, params.get("limit") is not None)
+    bind = dict(params, radius_m=(params.get("radius_km") or 0) * 1000.0)
+    return sql_batches(engine, sql, bind)
+
+
+def sql_batches(engine, sql, params: dict):
+    """Record batches (SCHEMA) of a query selecting COLS."""
+    with engine.connect() as conn:
+        result = conn.execution_options(stream_results=True, yield_per=EXPORT_BATCH_ROWS).execute(sql, params)
+        for part in result.partitions():
+            columns = list(zip(*part))
+            yield pa.RecordBatch.from_arrays(
+                [pa.array(col, type=f.type) for col, f in zip(columns, SCHEMA)], schema=SCHEMA
+            )
+
+
+def _haversine_km(lat, lon, lat0, lon0):
+    lat, lon = pc.multiply(lat, math.pi / 180), pc.multiply(lon, math.pi / 180)
+    lat0, lon0 = math.radians(lat0), math.radians(lon0)
+    a = pc.add(
+        pc.power(pc.sin(pc.divide(pc.subtract(lat, lat0), 2)), 2),
+        pc.multiply(pc.multiply(pc.cos(lat), math.cos(lat0)),
+                    pc.power(pc.sin(pc.divide(pc.subtract(lon, lon0), 2)), 2)),
+    )
+    return pc.multiply(pc.asin(pc.sqrt(a)), 2 * 6371.0088)
+
+
+def _since(params: dict) -> datetime:
+    return datetime.now(timezone.utc) - timedelta(hours=params["hours"])
+
+
+def latest_per_event(table: pa.Table) -> pa.Table:
+    # silver may hold an event in two date partitions if its time moved; keep the newest version, ordered
+    # like ingest.partitions.merge_latest: by updated_utc (when read), then by load time
+    if pc.count_distinct(table["event_id"]).as_py() == table.num_rows:
+        return table
+    keys = [("updated_utc", "ascending")] if "updated_utc" in table.column_names else []
+    table = table.sort_by(keys + [("ingestion_time_utc", "ascending")])
+    dup = pd.Series(table["event_id"].to_numpy(zero_copy_only=False)).duplicated(keep="last").to_numpy()
+    return table.filter(pa.array(~dup))
+
+
+def filter_table(table: pa.Table, params: dict) -> pa.Table:
+    """The /recent, /around and /export filters on an in-memory SCHEMA table, newest first."""
+    ts = pa.timestamp("us", tz="UTC")
+    mask = pc.and_kleene(
+        pc.greater_equal(table["time_utc"], pa.scalar(_since(params), ts)),
+        pc.or_kleene(pc.is_null(table["mag"]), pc.greater_equal(table["mag"], params["min_mag"])),
+    )
+    if params.get("since") is not None:
+        # incremental sync: rows loaded after `since`
+        mask = pc.and_kleene(mask, pc.greater(table["ingestion_time_utc"], pa.scalar(params["since"], ts)))
+    if params.get("cursor_time") is not None:
+        # keyset: (time_utc, event_id) < cursor
+        ct = pa.scalar(params["cursor_time"], ts)
+        mask = pc.and_kleene(mask, pc.or_kleene(
+            pc.less(table["time_utc"], ct),
+            pc.and_kleene(pc.equal(table["time_utc"], ct), pc.less(table["event_id"], params["cursor_id"])),
+        ))
+    table = table.filter(mask)
+    if params.get("lat") is not None and params.get("lon") is not None:
+        dist = _haversine_km(table["lat"], table["lon"], params["lat"], params["lon"])
+        table = table.filter(pc.less_equal(dist, params.get("radius_km") or 0))
+    table = table.sort_by([("time_utc", "descending"), ("event_id", "descending")])
+    if params.get("limit") is not None:
+        table = table.slice(0, params["limit"])
+    return table
+
+
+def lake(base: str = None) -> ds.Dataset:
+    """The silver earthquakes lake: day files (`date`) and compacted months (`month`)."""
+    return ds.dataset(base or f"{SILVER_BASE}/earthquakes", format="parquet", partitioning=lake_partitioning())
+
+
+def date_from(day: str):
+    """Partition filter for event days >= `day`: day files from `day` on, compacted months from its month on."""
+    # "unknown" (rows without an event time) sorts after every date
+    return partition_filter((ds.field("date") >= day) & (ds.field("date") != UNKNOWN_DATE),
+                            ds.field("month") >= day[:7])
+
+
+def date_before(day: str):
+    """Partition filter for event days < `day`; the month of `day` belongs to date_from(day) once compacted."""
+    return partition_filter(ds.field("date") < day, ds.field("month") < day[:7])
+
+
+def silver_table(params: dict, base: str = None, before: str = None, versions: bool = False) -> pa.Table:
+    """Same filters answered from the silver parquet (date partition pruning + predicate pushdown).
+
+    `before` (YYYY-MM-DD, exclusive) stops the scan at partitions that are already held in memory;
+    `versions` keeps updated_utc so the result can be merged with another latest_per_event table.
+    """
+    since = _since(params)
+    dataset = lake(base)
+    flt = (
+        date_from(since.strftime("%Y-%m-%d"))
+        & (ds.field("time_utc") >= pa.scalar(since, pa.timestamp("us", tz="UTC")))
+        & (ds.field("mag").is_null() | (ds.field("mag") >= params["min_mag"]))
+    )
+    if before is not None:
+        flt &= date_before(before)
+    if params.get("since") is not None:
+        flt &= ds.field("ingestion_time_utc") > pa.scalar(params["since"], pa.timestamp("us", tz="UTC"))
+    if params.get("cursor_time") is not None:
+        flt &= ds.field("time_utc") <= pa.scalar(params["cursor_time"], pa.timestamp("us", tz="UTC"))
+    table = filter_table(latest_per_event(dataset.to_table(columns=LAKE_COLS, filter=flt).cast(LAKE_SCHEMA)), params)
+    return table if versions else table.select(COLS)
+
+
+# -------------------------
+# Serializers
+# -------------------------
+def arrow_stream(batches):
+    """Arrow IPC stream, yielded batch by batch."""
+    sink = io.BytesIO()
+    writer = pa.ipc.new_stream(sink, SCHEMA)
+    for batch in batches:
+        writer.write_batch(batch)
+        yield sink.getvalue()
+        sink.seek(0)
+        sink.truncate()
+    writer.close()
+    yield sink.getvalue()
+
+
+def parquet_bytes(batches) -> bytes:
+    # parquet needs its footer, so this one is built in memory
+    sink = io.BytesIO()
+    with pq.ParquetWriter(sink, SCHEMA, compression="zstd") as writer:
+        for batch in batches:
+            writer.write_batch(batch)
+    return sink.getvalue()
+
+
+def geojson_stream(batches):
+    """Compact GeoJSON FeatureCollection, yielded batch by batch."""
+    yield b'{"type":"FeatureCollection","features":['
+    first = True
+    for batch in batches:
+        if not batch.num_rows:
+            continue
+        cols = batch.to_pydict()
+        # epoch ms like the USGS feed, computed for the whole batch
+        time_ms = pc.divide(batch.column("time_utc").cast(pa.int64()), 1000).to_pylist()
+        features = [
+            {
+                "type": "Feature",
+                "id": eid,
+                "geometry": {"type": "Point", "coordinates": [lon, lat, depth]},
+                "properties": {"mag": mag, "place": place, "time": t, "run_id": run_id},
+            }
+            for eid, lon, lat, depth, mag, place, t, run_id in zip(
+                cols["event_id"], cols["lon"], cols["lat"], cols["depth_km"],
+                cols["mag"], cols["place"], time_ms, cols["run_id"])
+        ]
+        chunk = json.dumps(features, separators=(",", ":"))[1:-1]
+        yield (chunk if first else "," + chunk).encode()
+        first = False
+    yield b"]}"
@@ -1,16 +1,15 @@
 import os
-import time
 
-from fastapi import FastAPI, Request, Response
+from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.openapi.utils import get_openapi
 from dotenv import load_dotenv
-from starlette.middleware.base import BaseHTTPMiddleware
 
 from api.routers import earthquakes_db as earthquakes
 from api.middleware.auth import APIKeyMiddleware
+from api.middleware.metrics import MetricsMiddleware
 
-from prometheus_client import Counter, Histogram, generate_latest, CONTENT_TYPE_LATEST
+from prometheus_client import generate_latest, CONTENT_TYPE_LATEST
 
 
 load_dotenv()
@@ -22,6 +21,11 @@ app = FastAPI(
 )
 
 
+# API keys + per-key rate limits (api/middleware/auth.py), when keys are configured; added before CORS so
+# preflights and CORS headers on 401/429 answers are handled outside of it
+if os.getenv("API_KEY") or os.getenv("API_KEYS"):
+    app.add_middleware(APIKeyMiddleware)
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=os.getenv("CORS_ORIGINS", "*").split(","),
@@ -38,42 +42,9 @@ def health():
 
 
 # =========================
-# MÉTRICAS PROMETHEUS
+# MÉTRICAS PROMETHEUS (api/middleware/metrics.py)
 # =========================
 
-# Contador de requisições por método, path e status code
-REQUEST_COUNT = Counter(
-    "http_requests_total",
-    "Total HTTP requests",
-    ["method", "path", "status"],
-)
-
-# Latência por método e path
-REQUEST_LATENCY = Histogram(
-    "http_request_duration_seconds",
-    "HTTP request latency in seconds",
-    ["method", "path"],
-)
-
-
-class MetricsMiddleware(BaseHTTPMiddleware):
-    async def dispatch(self, request: Request, call_next):
-        start_time = time.time()
-
-        response = await call_next(request)
-
-        process_time = time.time() - start_time
-        path = request.url.path
-        method = request.method
-        status = response.status_code
-
-        # registra métricas
-        REQUEST_COUNT.labels(method=method, path=path, status=status).inc()
-        REQUEST_LATENCY.labels(method=method, path=path).observe(process_time)
-
-        return response
-
-
 # Adiciona o middleware de métricas
 app.add_middleware(MetricsMiddleware)
 app.include_router(earthquakes.router)
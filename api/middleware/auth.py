@@ -1,32 +1,116 @@
 # api/middleware/auth.py
+import asyncio
+import hashlib
+import hmac
+import math
 import os
-from fastapi import Request, HTTPException
-from starlette.middleware.base import BaseHTTPMiddleware
-
-class APIKeyMiddleware(BaseHTTPMiddleware):
-    async def dispatch(self, request: Request, call_next):
-        path = request.url.path
-
-        allowlisted = (
-            path == "/health"
-            or path == "/openapi.json"
-            or path.startswith("/docs")
-            or path.startswith("/redoc")
-            or path.startswith("/static")
-            or path.startswith("/metrics")
-        )
-        if allowlisted:
-            return await call_next(request)
-
-        if request.method.upper() == "OPTIONS":
-            return await call_next(request)
-
-        expected_key = os.getenv("API_KEY")
-        if not expected_key:
-            raise HTTPException(status_code=500, detail="API key not configured.")
-
-        provided_key = request.headers.get("X-API-Key")
-        if provided_key != expected_key:
-            raise HTTPException(status_code=401, detail="Unauthorized: invalid or missing API key.")
-
-        return await call_next(request)
+from starlette.datastructures import Headers
+from starlette.responses import JSONResponse
+
+from api.ratelimit import RATE_LIMITED, Limit, limiter_from_env
+
+ALLOWLIST_EXACT = ("/health", "/openapi.json")
+ALLOWLIST_PREFIXES = ("/docs", "/redoc", "/static", "/metrics")
+# long-lived responses: counted against the key's stream cap, not its cap on requests in flight
+STREAM_PATHS = ("/earthquakes/stream", "/earthquakes/recent/stream", "/earthquakes/export")
+
+
+def allowlisted(path: str) -> bool:
+    return path in ALLOWLIST_EXACT or path.startswith(ALLOWLIST_PREFIXES)
+
+
+def _digest(key: str) -> bytes:
+    return hashlib.sha256(key.encode()).digest()
+
+
+def load_keys(spec: str = None, single: str = None) -> dict:
+    """{sha256(key): (name, Limit)} from API_KEYS and the single-key API_KEY (named "default").
+
+    API_KEYS is comma-separated name:key[:rps[:burst[:concurrency[:streams]]]]; empty limit fields take the
+    RATE_LIMIT_* defaults, e.g. API_KEYS="dashboard:<key>:50:100:16:8,demo:<key>:1:5:2".
+    """
+    spec = os.getenv("API_KEYS", "") if spec is None else spec
+    single = os.getenv("API_KEY", "") if single is None else single
+    keys = {}
+    if single:
+        keys[_digest(single)] = ("default", Limit())
+    for entry in filter(None, (e.strip() for e in spec.split(","))):
+        name, _, rest = entry.partition(":")
+        key, *limits = rest.split(":")
+        if not name or not key or len(limits) > 4:
+            # never echo the entry: it holds the key
+            raise ValueError(f"Bad API_KEYS entry {name!r}: expected name:key[:rps[:burst[:concurrency[:streams]]]]")
+        keys[_digest(key)] = (name, Limit(*(float(v) if v else None for v in limits)))
+    return keys
+
+
+def _reject(status: int, detail: str, headers: dict = None) -> JSONResponse:
+    return JSONResponse({"detail": detail}, status_code=status, headers=headers)
+
+
+class APIKeyMiddleware:
+    """Pure ASGI: rejected requests are answered here, allowed ones pass through untouched.
+
+    Keys are read once, when the app builds its middleware stack, and kept as SHA-256 digests only. Each key
+    has a token bucket (requests/s + burst) and a cap on requests in flight; over either one the request is
+    answered with 429 and Retry-After before it reaches a handler (and the DB pool). Streams (STREAM_PATHS) hold
+    their slot until the client goes away, so they have their own cap and don't lock the key out of the rest.
+    """
+
+    def __init__(self, app, keys: dict = None, limiter=None):
+        self.app = app
+        self.keys = load_keys() if keys is None else keys
+        self.limiter = limiter_from_env() if limiter is None else limiter
+
+    def lookup(self, presented: str):
+        if not presented:
+            return None
+        digest = _digest(presented)
+        found = None
+        # constant-time compare against every key, no early exit: timing doesn't depend on which one matched
+        for stored, entry in self.keys.items():
+            if hmac.compare_digest(stored, digest):
+                found = entry
+        return found
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or allowlisted(scope["path"]) or scope["method"] == "OPTIONS":
+            return await self.app(scope, receive, send)
+
+        entry = self.lookup(Headers(scope=scope).get("x-api-key"))
+        if not self.keys:
+            response = _reject(500, "API key not configured.")
+        elif entry is None:
+            response = _reject(401, "Unauthorized: invalid or missing API key.")
+        else:
+            name, limit = entry
+            stream = scope["path"] in STREAM_PATHS
+            pool, cap = (f"{name}:streams", limit.streams) if stream else (name, limit.concurrency)
+            wait = await self.limiter.take(name, limit)
+            slot = None if wait else await self.limiter.acquire(pool, cap)
+            if wait:
+                RATE_LIMITED.labels(key=name, reason="rate").inc()
+                response = _reject(429, "Too many requests for this API key.",
+                                   {"Retry-After": str(max(1, math.ceil(wait)))})
+            elif slot is False:
+                RATE_LIMITED.labels(key=name, reason="streams" if stream else "concurrency").inc()
+                response = _reject(429, f"Too many concurrent {'streams' if stream else 'requests'} for this API key.",
+                                   {"Retry-After": "1"})
+            else:
+                keeper = None
+                if slot and stream and self.limiter.refresh_every:
+                    keeper = asyncio.create_task(self._keep_slot(pool))
+                try:
+                    return await self.app(scope, receive, send)
+                finally:
+                    if keeper:
+                        keeper.cancel()
+                    if slot:
+                        await self.limiter.release(pool)
+        await response(scope, receive, send)
+
+    async def _keep_slot(self, pool: str):
+        # a stream can outlive the shared store's slot TTL: keep its slot from expiring under it
+        while True:
+            await asyncio.sleep(self.limiter.refresh_every)
+            await self.limiter.refresh(pool)
@@ -0,0 +1,71 @@
+# api/middleware/metrics.py
+import time
+
+from prometheus_client import Counter, Gauge, Histogram
+
+# `path` is the route template (/earthquakes/{id} style), never the raw URL: bounded label cardinality
+REQUEST_COUNT = Counter(
+    "http_requests_total",
+    "Total HTTP requests",
+    ["method", "path", "status"],
+)
+
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency in seconds",
+    ["method", "path"],
+)
+
+RESPONSE_SIZE = Histogram(
+    "http_response_size_bytes",
+    "HTTP response body size in bytes",
+    ["method", "path"],
+    buckets=(256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216),
+)
+
+IN_FLIGHT = Gauge(
+    "http_requests_in_flight",
+    "HTTP requests currently being served",
+)
+
+UNMATCHED = "<unmatched>"
+
+
+def route_template(scope) -> str:
+    # set by the router once a route matched; 404s and the like share one label
+    route = scope.get("route")
+    return getattr(route, "path_format", None) or getattr(route, "path", None) or UNMATCHED
+
+
+class MetricsMiddleware:
+    """Pure ASGI: observes the send() messages instead of wrapping the response in a new task/stream."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        status = 500
+        size = 0
+
+        async def send_wrapper(message):
+            nonlocal status, size
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif message["type"] == "http.response.body":
+                size += len(message.get("body", b""))
+            await send(message)
+
+        IN_FLIGHT.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - start
+            IN_FLIGHT.dec()
+            method, path = scope["method"], route_template(scope)
+            REQUEST_COUNT.labels(method=method, path=path, status=status).inc()
+            REQUEST_LATENCY.labels(method=method, path=path).observe(elapsed)
+            RESPONSE_SIZE.labels(method=method, path=path).observe(size)
@@ -0,0 +1,268 @@
+import math
+import os
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+from sqlalchemy import text
+
+from api import export as exporter
+from api.runs import watcher
+
+# postgis: ST_DWithin / KNN on geom in the database; memory: grid index below, no PostGIS needed
+PROXIMITY_ENGINE = os.getenv("PROXIMITY_ENGINE", "postgis").lower()
+PROXIMITY_SOURCE = os.getenv("PROXIMITY_SOURCE", "db")  # db | silver
+PROXIMITY_CELL_DEG = float(os.getenv("PROXIMITY_CELL_DEG", "1.0"))
+# events older than this are not indexed (bounds memory); /around windows beyond it are cut short
+PROXIMITY_WINDOW_HOURS = int(os.getenv("PROXIMITY_WINDOW_HOURS", str(24 * 365)))
+# fold the delta index into the base once it reaches this fraction of it
+PROXIMITY_COMPACT_RATIO = float(os.getenv("PROXIMITY_COMPACT_RATIO", "0.1"))
+
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEG = math.pi * EARTH_RADIUS_KM / 180
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+
+def haversine_km(lat, lon, lat0: float, lon0: float):
+    lat, lon = np.radians(lat), np.radians(lon)
+    lat0, lon0 = math.radians(lat0), math.radians(lon0)
+    a = np.sin((lat - lat0) / 2) ** 2 + np.cos(lat) * math.cos(lat0) * np.sin((lon - lon0) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+
+def _us(ts: datetime) -> int:
+    return int((ts - EPOCH) / timedelta(microseconds=1))
+
+
+class GridIndex:
+    """Immutable (lat, lon) grid: rows sorted by cell key, a cell range is two searchsorted calls."""
+
+    def __init__(self, table: pa.Table, cell_deg: float = PROXIMITY_CELL_DEG):
+        table = table.filter(pc.and_(pc.is_valid(table["lat"]), pc.is_valid(table["lon"])))
+        self.cell = cell_deg
+        self.nrows = int(math.ceil(180 / cell_deg))
+        self.ncols = int(math.ceil(360 / cell_deg))
+        lat = table["lat"].to_numpy()
+        lon = table["lon"].to_numpy()
+        order = np.argsort(self._key(lat, lon), kind="stable")
+        self.table = table.take(pa.array(order))
+        self.lat, self.lon = lat[order], lon[order]
+        self.key = self._key(self.lat, self.lon)
+        self.time_us = self.table["time_utc"].cast(pa.int64()).to_numpy()
+        self.mag = self.table["mag"].to_numpy(zero_copy_only=False).astype(float)
+        self.ids = pd.Index(self.table["event_id"].to_numpy(zero_copy_only=False))
+        self.alive = np.ones(len(self.key), dtype=bool)
+
+    def __len__(self):
+        return int(self.alive.sum())
+
+    def _key(self, lat, lon):
+        r = np.clip(((lat + 90) // self.cell).astype(np.int64), 0, self.nrows - 1)
+        c = np.clip(((lon + 180) // self.cell).astype(np.int64), 0, self.ncols - 1)
+        return r * self.ncols + c
+
+    def live_rows(self) -> pa.Table:
+        return self.table.filter(pa.array(self.alive))
+
+    def drop(self, event_ids):
+        """Copy-on-write tombstones for events replaced by a newer version."""
+        pos = self.ids.get_indexer(event_ids)
+        pos = pos[pos >= 0]
+        if len(pos):
+            alive = self.alive.copy()
+            alive[pos] = False
+            self.alive = alive
+
+    def _candidates(self, lat0: float, lon0: float, radius_km: float):
+        dlat = radius_km / KM_PER_DEG
+        r0 = max(int((lat0 - dlat + 90) // self.cell), 0)
+        r1 = min(int((lat0 + dlat + 90) // self.cell), self.nrows - 1)
+        # widest longitude span of the band, which is at its most poleward edge
+        edge = min(abs(lat0) + dlat, 90.0)
+        dlon = dlat / math.cos(math.radians(edge)) if edge < 89.9 else 360.0
+        c0, c1 = int((lon0 - dlon + 180) // self.cell), int((lon0 + dlon + 180) // self.cell)
+        if c1 - c0 + 1 >= self.ncols:
+            spans = [(0, self.ncols - 1)]
+        elif c0 < 0:
+            spans = [(0, c1), (c0 + self.ncols, self.ncols - 1)]
+        elif c1 >= self.ncols:
+            spans = [(c0, self.ncols - 1), (0, c1 - self.ncols)]
+        else:
+            spans = [(c0, c1)]
+        rows = np.arange(r0, r1 + 1, dtype=np.int64) * self.ncols
+        lo = np.concatenate([rows + a for a, _ in spans])
+        hi = np.concatenate([rows + b for _, b in spans])
+        starts = np.searchsorted(self.key, lo, side="left")
+        ends = np.searchsorted(self.key, hi, side="right")
+        return np.concatenate([np.arange(s, e) for s, e in zip(starts, ends)] or [np.empty(0, np.int64)])
+
+    def within(self, lat0, lon0, radius_km, since_us, min_mag):
+        """(positions, distances) of live events within radius_km, newer than since_us, mag >= min_mag."""
+        idx = self._candidates(lat0, lon0, radius_km)
+        keep = self.alive[idx] & (self.time_us[idx] >= since_us)
+        if min_mag > 0:
+            mag = self.mag[idx]
+            keep &= np.isnan(mag) | (mag >= min_mag)
+        idx = idx[keep]
+        dist = haversine_km(self.lat[idx], self.lon[idx], lat0, lon0)
+        hit = dist <= radius_km
+        return idx[hit], dist[hit]
+
+
+class ProximityEngine:
+    """Base + delta grid indexes over recent events, refreshed incrementally when a new run lands."""
+
+    def __init__(self, source: str = PROXIMITY_SOURCE, window_hours: int = PROXIMITY_WINDOW_HOURS):
+        self.source = source
+        self.window_hours = window_hours
+        self.base = None
+        self.delta = None
+        self.loaded_until = None  # max ingestion_time_utc indexed so far
+        self.stale = True
+        self._lock = threading.Lock()
+
+    # --- loading ---
+    def _window_start(self) -> datetime:
+        return datetime.now(timezone.utc) - timedelta(hours=self.window_hours)
+
+    def _load(self, since) -> pa.Table:
+        start = self._window_start()
+        if self.source == "silver":
+            base = f"{exporter.SILVER_BASE}/earthquakes"
+            if not os.path.isdir(base):
+                return exporter.SCHEMA.empty_table()
+            dataset = exporter.lake(base)
+            flt = (exporter.date_from(start.strftime("%Y-%m-%d"))
+                   & (ds.field("time_utc") >= pa.scalar(start, pa.timestamp("us", tz="UTC"))))
+            if since is not None:
+                flt &= ds.field("ingestion_time_utc") > pa.scalar(since, pa.timestamp("us", tz="UTC"))
+            table = dataset.to_table(columns=exporter.LAKE_COLS, filter=flt).cast(exporter.LAKE_SCHEMA)
+            return exporter.latest_per_event(table).select(exporter.COLS)
+        from api.db import engine
+        sql = text(f"""
+          SELECT {", ".join(exporter.COLS)}
+            FROM earthquakes
+           WHERE time_utc >= :start
+             AND lat IS NOT NULL AND lon IS NOT NULL
+             {"AND ingestion_time_utc > :since" if since is not None else ""}
+        """)
+        batches = list(exporter.sql_batches(engine, sql, {"start": start, "since": since}))
+        return pa.Table.from_batches(batches, schema=exporter.SCHEMA)
+
+    def _mark_loaded(self, table: pa.Table):
+        if table.num_rows:
+            newest = pc.max(table["ingestion_time_utc"]).as_py()
+            if newest is not None and (self.loaded_until is None or newest > self.loaded_until):
+                self.loaded_until = newest
+
+    def build(self, table: pa.Table = None):
+        """Full (re)build, from the configured source unless a table is given."""
+        table = self._load(None) if table is None else table
+        self.base, self.delta = GridIndex(table), None
+        self._mark_loaded(table)
+        self.stale = False
+
+    def apply(self, table: pa.Table):
+        """Fold newly loaded rows in: tombstone their old versions, grow the delta, compact when it gets big."""
+        if not table.num_rows:
+            return
+        ids = table["event_id"].to_numpy(zero_copy_only=False)
+        base = self.base
+        base.drop(ids)
+        rows = [table]
+        if self.delta is not None:
+            self.delta.drop(ids)
+            rows.insert(0, self.delta.live_rows())
+        delta_rows = pa.concat_tables(rows)
+        if delta_rows.num_rows > PROXIMITY_COMPACT_RATIO * max(len(base), 1):
+            merged = pa.concat_tables([base.live_rows(), delta_rows])
+            start = pa.scalar(self._window_start(), pa.timestamp("us", tz="UTC"))
+            self.base, self.delta = GridIndex(merged.filter(pc.greater_equal(merged["time_utc"], start))), None
+        else:
+            self.delta = GridIndex(delta_rows)
+        self._mark_loaded(table)
+
+    def refresh(self):
+        with self._lock:
+            if not self.stale:
+                return
+            t0 = time.perf_counter()
+            if self.base is None:
+                self.build()
+            else:
+                # cleared before loading: a run landing meanwhile marks it stale again
+                self.stale = False
+                try:
+                    self.apply(self._load(self.loaded_until))
+                except Exception:
+                    # not caught up: retried by the next request, not only after the next run
+                    self.stale = True
+                    raise
+            print(f"proximity index: {self.size()} events ({time.perf_counter() - t0:.2f}s)")
+
+    def size(self) -> int:
+        return (len(self.base) if self.base else 0) + (len(self.delta) if self.delta else 0)
+
+    # --- queries ---
+    def _indexes(self):
+        return [i for i in (self.base, self.delta) if i is not None]
+
+    def _since_us(self, hours: int) -> int:
+        return _us(datetime.now(timezone.utc) - timedelta(hours=hours))
+
+    def around(self, lat, lon, radius_km, hours=24, min_mag=0.0, limit=100, since=None):
+        """Same contract as the PostGIS /around query: newest first, (time_utc, event_id) DESC."""
+        start_us = self._since_us(hours)
+        parts = []
+        for index in self._indexes():
+            pos, _ = index.within(lat, lon, radius_km, start_us, min_mag)
+            parts.append(index.table.take(pa.array(pos, pa.int64())))
+        table = pa.concat_tables(parts) if parts else exporter.SCHEMA.empty_table()
+        if since is not None:
+            # rows loaded after `since` (incremental client sync)
+            since_ts = pa.scalar(since, pa.timestamp("us", tz="UTC"))
+            table = table.filter(pc.greater(table["ingestion_time_utc"], since_ts))
+        table = table.sort_by([("time_utc", "descending"), ("event_id", "descending")])
+        return table.slice(0, limit).to_pylist()
+
+    def nearest(self, lat, lon, k=10, hours=24, min_mag=0.0):
+        """k nearest events: radius search grown until it holds k hits, then the k smallest distances."""
+        since = self._since_us(hours)
+        radius = max(self.base.cell if self.base else PROXIMITY_CELL_DEG, 0.1) * KM_PER_DEG
+        while True:
+            hits = [(i, *i.within(lat, lon, radius, since, min_mag)) for i in self._indexes()]
+            found = sum(len(pos) for _, pos, _ in hits)
+            if found >= k or radius >= math.pi * EARTH_RADIUS_KM:
+                break
+            radius *= 2
+        rows = []
+        for index, pos, dist in hits:
+            if len(pos) > k:
+                top = np.argpartition(dist, k)[:k]
+                pos, dist = pos[top], dist[top]
+            for row, d in zip(index.table.take(pa.array(pos, pa.int64())).to_pylist(), dist):
+                row["distance_km"] = float(d)
+                rows.append(row)
+        rows.sort(key=lambda r: (r["distance_km"], r["event_id"]))
+        return rows[:k]
+
+
+index = ProximityEngine()
+
+
+@watcher.on_new_run
+def _mark_stale(run_id):
+    index.stale = True
+
+
+def ready() -> ProximityEngine:
+    """The shared index, caught up with the latest loaded run."""
+    watcher.poll()
+    if index.stale:
+        index.refresh()
+    return index
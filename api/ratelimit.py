@@ -0,0 +1,167 @@
+# api/ratelimit.py — per-key token buckets and concurrency caps (used by APIKeyMiddleware)
+#
+# LocalLimiter keeps the state in the worker: exact, no I/O, but with N workers a key gets N times its limits.
+# RedisLimiter (RATE_LIMIT_REDIS_URL) shares it between workers/hosts through any server speaking the Redis
+# protocol with Lua scripting (Redis, Valkey, KeyDB); needs the optional `redis` package. If the store is
+# unreachable requests are let through (api_rate_limit_store_errors_total), auth still applies. Its slot counters
+# expire after RATE_LIMIT_SLOT_TTL (slots of crashed workers); open streams refresh them every TTL/3.
+import os
+import time
+
+from prometheus_client import Counter
+
+RATE_LIMIT_RPS = float(os.getenv("RATE_LIMIT_RPS", "10"))              # sustained requests/s per key; 0 = off
+RATE_LIMIT_BURST = int(os.getenv("RATE_LIMIT_BURST", "20"))            # bucket size
+RATE_LIMIT_CONCURRENCY = int(os.getenv("RATE_LIMIT_CONCURRENCY", "4"))  # in-flight requests per key; 0 = off
+RATE_LIMIT_STREAMS = int(os.getenv("RATE_LIMIT_STREAMS", "4"))          # open streams per key, own cap; 0 = off
+RATE_LIMIT_REDIS_URL = os.getenv("RATE_LIMIT_REDIS_URL", "")
+RATE_LIMIT_PREFIX = os.getenv("RATE_LIMIT_PREFIX", "eqapi:rl")
+RATE_LIMIT_SLOT_TTL = int(os.getenv("RATE_LIMIT_SLOT_TTL", "300"))     # frees slots of crashed workers
+
+RATE_LIMITED = Counter("api_rate_limited_total", "Requests rejected with 429", ["key", "reason"])
+STORE_ERRORS = Counter("api_rate_limit_store_errors_total", "Shared limiter store errors (request let through)")
+
+
+class Limit:
+    """Limits of one API key; None fields take the RATE_LIMIT_* defaults."""
+
+    __slots__ = ("rate", "burst", "concurrency", "streams")
+
+    def __init__(self, rate: float = None, burst: float = None, concurrency: float = None, streams: float = None):
+        self.rate = float(RATE_LIMIT_RPS if rate is None else rate)
+        self.burst = max(1, int(RATE_LIMIT_BURST if burst is None else burst))
+        self.concurrency = int(RATE_LIMIT_CONCURRENCY if concurrency is None else concurrency)
+        self.streams = int(RATE_LIMIT_STREAMS if streams is None else streams)
+
+    def __repr__(self):
+        return (f"Limit(rate={self.rate}, burst={self.burst}, concurrency={self.concurrency}, "
+                f"streams={self.streams})")
+
+
+class LocalLimiter:
+    """In-process store. Only touched from the event loop, so no lock."""
+
+    refresh_every = None  # slots live as long as the request, nothing expires
+
+    def __init__(self):
+        self._buckets = {}    # key name -> [tokens, monotonic time of last refill]
+        self._in_flight = {}  # key name -> requests being served
+
+    async def take(self, key: str, limit: Limit) -> float:
+        """Takes a token: 0 if the request may start, else seconds until the next token."""
+        if limit.rate <= 0:
+            return 0.0
+        now = time.monotonic()
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = [float(limit.burst), now]
+        tokens = min(limit.burst, bucket[0] + (now - bucket[1]) * limit.rate)
+        bucket[1] = now
+        if tokens >= 1:
+            bucket[0] = tokens - 1
+            return 0.0
+        bucket[0] = tokens
+        return (1 - tokens) / limit.rate
+
+    async def acquire(self, key: str, cap: int):
+        """True: slot taken (release it when done), False: key at its cap, None: not counted."""
+        if cap <= 0:
+            return None
+        n = self._in_flight.get(key, 0)
+        if n >= cap:
+            return False
+        self._in_flight[key] = n + 1
+        return True
+
+    async def release(self, key: str):
+        self._in_flight[key] -= 1
+
+
+# Server clock (TIME) so workers on different hosts agree; floats go back as strings (Lua numbers become ints).
+TAKE_LUA = """
+local rate, burst = tonumber(ARGV[1]), tonumber(ARGV[2])
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1e6
+local b = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = math.min(burst, (tonumber(b[1]) or burst) + math.max(0, now - (tonumber(b[2]) or now)) * rate)
+local wait = 0
+if tokens >= 1 then tokens = tokens - 1 else wait = (1 - tokens) / rate end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(now))
+redis.call('PEXPIRE', KEYS[1], math.ceil(burst / rate * 1000) + 1000)
+return tostring(wait)
+"""
+
+ACQUIRE_LUA = """
+local n = redis.call('INCR', KEYS[1])
+redis.call('EXPIRE', KEYS[1], ARGV[2])
+if n > tonumber(ARGV[1]) then
+  redis.call('DECR', KEYS[1])
+  return 0
+end
+return 1
+"""
+
+REFRESH_LUA = """
+if redis.call('GET', KEYS[1]) then redis.call('EXPIRE', KEYS[1], ARGV[1]) end
+return 1
+"""
+
+RELEASE_LUA = """
+if redis.call('DECR', KEYS[1]) <= 0 then redis.call('DEL', KEYS[1]) end
+return 1
+"""
+
+
+class RedisLimiter:
+    """Shared store: one token bucket hash and one in-flight counter per key name (never the key itself)."""
+
+    def __init__(self, url: str, prefix: str = RATE_LIMIT_PREFIX, slot_ttl: int = RATE_LIMIT_SLOT_TTL):
+        try:
+            import redis.asyncio as aioredis
+            from redis.exceptions import RedisError
+        except ImportError as e:
+            raise RuntimeError("RATE_LIMIT_REDIS_URL needs the redis package (pip install redis)") from e
+        self.client = aioredis.from_url(url)
+        self.prefix = prefix
+        self.slot_ttl = slot_ttl
+        self.refresh_every = slot_ttl / 3
+        self._errors = (RedisError, OSError)
+        self._take = self.client.register_script(TAKE_LUA)
+        self._acquire = self.client.register_script(ACQUIRE_LUA)
+        self._refresh = self.client.register_script(REFRESH_LUA)
+        self._release = self.client.register_script(RELEASE_LUA)
+
+    async def take(self, key: str, limit: Limit) -> float:
+        if limit.rate <= 0:
+            return 0.0
+        try:
+            return float(await self._take(keys=[f"{self.prefix}:tokens:{key}"], args=[limit.rate, limit.burst]))
+        except self._errors:
+            STORE_ERRORS.inc()
+            return 0.0
+
+    async def acquire(self, key: str, cap: int):
+        if cap <= 0:
+            return None
+        try:
+            return bool(await self._acquire(keys=[f"{self.prefix}:slots:{key}"], args=[cap, self.slot_ttl]))
+        except self._errors:
+            STORE_ERRORS.inc()
+            return None  # let through uncounted: nothing to release
+
+    async def refresh(self, key: str):
+        """Pushes back the counter's TTL: a stream outliving it would otherwise drop its slot and over-admit."""
+        try:
+            await self._refresh(keys=[f"{self.prefix}:slots:{key}"], args=[self.slot_ttl])
+        except self._errors:
+            STORE_ERRORS.inc()
+
+    async def release(self, key: str):
+        try:
+            await self._release(keys=[f"{self.prefix}:slots:{key}"])
+        except self._errors:
+            STORE_ERRORS.inc()
+
+
+def limiter_from_env():
+    return RedisLimiter(RATE_LIMIT_REDIS_URL) if RATE_LIMIT_REDIS_URL else LocalLimiter()
@@ -1,49 +1,480 @@
 
+import base64
+import json
 import math
-from fastapi import APIRouter, Query
+import os
+from datetime import datetime, timezone
+from functools import lru_cache
+from fastapi import APIRouter, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
 from typing import List, Optional
 from sqlalchemy import text
-from api.db import SessionLocal
-from schemas.models import EarthquakeOut
+from api import export as exporter
+from api import proximity, silver, stream
+from api.cache import cache, cache_key, normalize_params
+from api.db import DB_MODE, READ_BACKEND, SessionLocal, AsyncSessionLocal, engine, async_engine
+from api.runs import watcher
+from schemas.models import (EarthquakeOut, GridCellOut, HistogramBinOut, NearbyEarthquakeOut, RegionStatsOut,
+                           StatsBucketOut, StatsSummaryOut)
 
 router = APIRouter(prefix="/earthquakes", tags=["earthquakes"])
 
-@router.get("/recent", response_model=List[EarthquakeOut])
-def recent(hours: int = 24, min_mag: float = 0.0, limit: int = 100):
-    
-    with SessionLocal() as s:
-        q = text("""
-          SELECT event_id, mag, place, time_utc, lat, lon, depth_km, run_id, ingestion_time_utc
+STREAM_BATCH_ROWS = int(os.getenv("STREAM_BATCH_ROWS", "1000"))
+
+
+# since: only rows loaded after that instant (ingestion_time_utc, BRIN-indexed) — incremental client sync
+SINCE_FILTER = "AND ingestion_time_utc > :since"
+
+
+@lru_cache(maxsize=None)
+def _recent_sql(keyset: bool = False, limit: bool = True, since: bool = False):
+    # keyset pagination on (time_utc, event_id), newest first
+    return text(f"""
+  SELECT event_id, mag, place, time_utc, lat, lon, depth_km, run_id, ingestion_time_utc
+    FROM earthquakes
+   WHERE time_utc >= NOW() - make_interval(hours => :hours)
+     AND (mag IS NULL OR mag >= :min_mag)
+     {SINCE_FILTER if since else ""}
+     {"AND (time_utc, event_id) < (:cursor_time, :cursor_id)" if keyset else ""}
+   ORDER BY time_utc DESC, event_id DESC
+   {"LIMIT :limit" if limit else ""}
+""")
+
+
+RECENT_SQL = _recent_sql()
+RECENT_KEYSET_SQL = _recent_sql(keyset=True)
+
+AROUND_SQL = text("""
+  SELECT event_id, mag, place, time_utc, lat, lon, depth_km, run_id, ingestion_time_utc
+    FROM earthquakes
+   WHERE time_utc >= NOW() - make_interval(hours => :hours)
+     AND (mag IS NULL OR mag >= :min_mag)
+     AND geom IS NOT NULL
+     AND ST_DWithin(
+           geom,
+           ST_SetSRID(ST_MakePoint(:lon, :lat), 4326)::geography,
+           :radius_m
+         )
+   ORDER BY time_utc DESC, event_id DESC
+   LIMIT :limit
+""")
+
+
+# /stats reads the hourly rollup tables (migrations/sql/0004_rollups.sql), never earthquakes itself.
+# Windows are hour-aligned: the first, partial hour is counted whole.
+STATS_WINDOW = "bucket >= eq_hour(NOW() - make_interval(hours => :hours))"
+
+STATS_SUMMARY_SQL = text(f"""
+  SELECT coalesce(sum(events), 0) AS events,
+         sum(mag_sum) / NULLIF(sum(mag_count), 0) AS mag_avg,
+         max(mag_max) AS mag_max,
+         sum(depth_sum) / NULLIF(sum(depth_count), 0) AS depth_avg,
+         max(depth_max) AS depth_max
+    FROM eq_rollup_hourly
+   WHERE {STATS_WINDOW}
+""")
+
+STATS_TIMESERIES_SQL = text(f"""
+  SELECT date_trunc(CAST(:bucket AS text), bucket AT TIME ZONE 'UTC') AT TIME ZONE 'UTC' AS bucket,
+         sum(events) AS events,
+         sum(mag_sum) / NULLIF(sum(mag_count), 0) AS mag_avg,
+         max(mag_max) AS mag_max,
+         sum(depth_sum) / NULLIF(sum(depth_count), 0) AS depth_avg
+    FROM eq_rollup_hourly
+   WHERE {STATS_WINDOW}
+   GROUP BY 1
+   ORDER BY 1
+""")
+
+
+def _histogram_sql(table: str, col: str, to_units: str):
+    # stored bins are base-width; :step merges them into wider bins
+    return text(f"""
+  SELECT (k * CAST(:step AS float8)){to_units} AS bin_min, ((k + 1) * CAST(:step AS float8)){to_units} AS bin_max,
+         sum(events) AS events
+    FROM (SELECT floor({col} / CAST(:step AS float8)) AS k, events FROM {table} WHERE {STATS_WINDOW}) b
+   GROUP BY k
+   ORDER BY k
+""")
+
+
+MAG_BIN_WIDTH, DEPTH_BIN_WIDTH = 0.1, 10.0
+STATS_MAG_SQL = _histogram_sql("eq_rollup_mag", "mag_bin", " / 10.0")
+STATS_DEPTH_SQL = _histogram_sql("eq_rollup_depth", "depth_bin", " * 10")
+
+STATS_REGIONS_SQL = text(f"""
+  SELECT region, sum(events) AS events, max(mag_max) AS mag_max
+    FROM eq_rollup_region
+   WHERE {STATS_WINDOW}
+   GROUP BY region
+   ORDER BY events DESC, region
+   LIMIT :limit
+""")
+
+# k nearest by the GiST index (<-> on geography)
+NEAREST_SQL = text("""
+  SELECT event_id, mag, place, time_utc, lat, lon, depth_km, run_id, ingestion_time_utc,
+         ST_Distance(geom, ST_SetSRID(ST_MakePoint(:lon, :lat), 4326)::geography) / 1000.0 AS distance_km
+    FROM earthquakes
+   WHERE time_utc >= NOW() - make_interval(hours => :hours)
+     AND (mag IS NULL OR mag >= :min_mag)
+     AND geom IS NOT NULL
+   ORDER BY geom <-> ST_SetSRID(ST_MakePoint(:lon, :lat), 4326)::geography, event_id
+   LIMIT :k
+""")
+
+# /grid: square lat/lon cells whose size halves with each zoom level, aggregated in the database.
+# A bbox with west > east crosses the antimeridian.
+GRID_MAX_ZOOM = 12
+GRID_SQL = text("""
+  SELECT (cy + 0.5) * :cell AS lat, (cx + 0.5) * :cell AS lon,
+         count(*) AS events, max(mag) AS mag_max, avg(depth_km) AS depth_avg
+    FROM (SELECT floor(lat / :cell) AS cy, floor(lon / :cell) AS cx, mag, depth_km
             FROM earthquakes
-           WHERE time_utc >= NOW() - (:hours || ' hours')::interval
+           WHERE time_utc >= NOW() - make_interval(hours => :hours)
              AND (mag IS NULL OR mag >= :min_mag)
-           ORDER BY time_utc DESC
-           LIMIT :limit
-        """)
-        rows = s.execute(q, {"hours": hours, "min_mag": min_mag, "limit": limit}).mappings().all()
-        return [dict(r) for r in rows]
-
-@router.get("/around", response_model=List[EarthquakeOut])
-def around(lat: float, lon: float, radius_km: float = 300.0,
-          min_mag: float = 0.0, limit: int = 100):
-    from sqlalchemy import text
-    radius_m = radius_km * 1000.0
+             AND lat BETWEEN :south AND :north
+             AND CASE WHEN CAST(:west AS float8) <= CAST(:east AS float8) THEN lon BETWEEN :west AND :east
+                      ELSE lon >= :west OR lon <= :east END) c
+   GROUP BY cy, cx
+""")
+
+
+def grid_cell_deg(zoom: int) -> float:
+    # zoom 0 -> 45 deg cells, zoom 6 -> ~0.7 deg
+    return 360.0 / 2 ** (min(max(zoom, 0), GRID_MAX_ZOOM) + 3)
+
+
+def _utc(ts: Optional[datetime]) -> Optional[datetime]:
+    # a `since` without offset is taken as UTC
+    return ts.replace(tzinfo=timezone.utc) if ts is not None and ts.tzinfo is None else ts
+
+
+def _sql_params(params: dict) -> dict:
+    out = dict(params)
+    if "radius_km" in out:
+        out["radius_m"] = out.pop("radius_km") * 1000.0
+    if out.get("cursor"):
+        out["cursor_time"], out["cursor_id"] = decode_cursor(out["cursor"])
+    out.pop("cursor", None)
+    return out
+
+
+def encode_cursor(row) -> str:
+    raw = f"{row['time_utc'].isoformat()}|{row['event_id']}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str):
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        time_utc, event_id = raw.split("|", 1)
+        return datetime.fromisoformat(time_utc), event_id
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor.")
+
+
+def _set_next_cursor(response: Response, rows, limit: int):
+    # a full page may have more rows behind it
+    if rows and len(rows) >= limit:
+        response.headers["X-Next-Cursor"] = encode_cursor(rows[-1])
+
+
+def _since(rows, since: Optional[datetime]):
+    # `since` filters the cached window instead of being part of the key: every poll sends a new timestamp,
+    # so polling clients share one entry per window (refreshed when a new run clears the cache)
+    since = _utc(since)
+    return rows if since is None else [r for r in rows if r["ingestion_time_utc"] > since]
+
+
+def _query(sql, params):
     with SessionLocal() as s:
-        q = text("""
-          SELECT event_id, mag, place, time_utc, lat, lon, depth_km, run_id, ingestion_time_utc
-            FROM earthquakes
-           WHERE (mag IS NULL OR mag >= :min_mag)
-             AND geom IS NOT NULL
-             AND ST_DWithin(
-                   geom,
-                   ST_SetSRID(ST_MakePoint(:lon, :lat), 4326)::geography,
-                   :radius_m
-                 )
-           ORDER BY time_utc DESC
-           LIMIT :limit
-        """)
-        rows = s.execute(q, {
-            "min_mag": min_mag, "lat": lat, "lon": lon,
-            "radius_m": radius_m, "limit": limit
-        }).mappings().all()
-        return [dict(r) for r in rows]
+        return [dict(r) for r in s.execute(sql, _sql_params(params)).mappings().all()]
+
+
+async def _query_async(sql, params):
+    async with AsyncSessionLocal() as s:
+        res = await s.execute(sql, _sql_params(params))
+        return [dict(r) for r in res.mappings().all()]
+
+
+# result cache: cleared whenever a new run lands in ingestion_runs
+def _cached(endpoint, sql, params):
+    if not cache.enabled:
+        return _query(sql, params)
+    watcher.poll()
+    key = cache_key(endpoint, **params)
+    generation = cache.generation  # before the read: a run landing meanwhile makes this result stale
+    rows = cache.get(key)
+    if rows is None:
+        rows = _query(sql, params)
+        cache.set(key, rows, generation)
+    return rows
+
+
+async def _cached_async(endpoint, sql, params):
+    if not cache.enabled:
+        return await _query_async(sql, params)
+    await watcher.poll_async()
+    key = cache_key(endpoint, **params)
+    generation = cache.generation  # before the read: a run landing meanwhile makes this result stale
+    rows = cache.get(key)
+    if rows is None:
+        rows = await _query_async(sql, params)
+        cache.set(key, rows, generation)
+    return rows
+
+
+def recent(response: Response, hours: int = 24, min_mag: float = 0.0, limit: int = 100,
+           cursor: Optional[str] = None, since: Optional[datetime] = None):
+    params = normalize_params(hours=hours, min_mag=min_mag, limit=limit, cursor=cursor)
+    # with since, a next page is only worth asking for when the whole page was new
+    rows = _since(_cached("recent", _recent_sql(keyset=bool(cursor)), params), since)
+    _set_next_cursor(response, rows, limit)
+    return rows
+
+
+async def recent_async(response: Response, hours: int = 24, min_mag: float = 0.0, limit: int = 100,
+                       cursor: Optional[str] = None, since: Optional[datetime] = None):
+    params = normalize_params(hours=hours, min_mag=min_mag, limit=limit, cursor=cursor)
+    # with since, a next page is only worth asking for when the whole page was new
+    rows = _since(await _cached_async("recent", _recent_sql(keyset=bool(cursor)), params), since)
+    _set_next_cursor(response, rows, limit)
+    return rows
+
+
+# NDJSON streaming: server-side cursor, rows serialized batch by batch (no Pydantic, no full list)
+def _ndjson(rows) -> bytes:
+    return "".join(json.dumps(dict(r), default=lambda v: v.isoformat()) + "\n" for r in rows).encode()
+
+
+def _stream_params(hours, min_mag, limit, cursor, since):
+    params = _sql_params({"hours": hours, "min_mag": min_mag, "cursor": cursor, "since": _utc(since)})
+    if limit is not None:
+        params["limit"] = limit
+    return _recent_sql(keyset=bool(cursor), limit=limit is not None, since=since is not None), params
+
+
+def recent_stream(hours: int = 24, min_mag: float = 0.0, limit: Optional[int] = None,
+                  cursor: Optional[str] = None, since: Optional[datetime] = None):
+    sql, params = _stream_params(hours, min_mag, limit, cursor, since)
+
+    def rows():
+        with engine.connect() as conn:
+            result = conn.execution_options(stream_results=True, yield_per=STREAM_BATCH_ROWS).execute(sql, params)
+            for part in result.mappings().partitions():
+                yield _ndjson(part)
+
+    return StreamingResponse(rows(), media_type="application/x-ndjson")
+
+
+async def recent_stream_async(hours: int = 24, min_mag: float = 0.0, limit: Optional[int] = None,
+                              cursor: Optional[str] = None, since: Optional[datetime] = None):
+    sql, params = _stream_params(hours, min_mag, limit, cursor, since)
+
+    async def rows():
+        async with async_engine.connect() as conn:
+            result = await conn.stream(sql, params)
+            async for part in result.mappings().partitions(STREAM_BATCH_ROWS):
+                yield _ndjson(part)
+
+    return StreamingResponse(rows(), media_type="application/x-ndjson")
+
+
+def around(lat: float, lon: float, radius_km: float = 300.0, hours: int = 24,
+          min_mag: float = 0.0, limit: int = 100, since: Optional[datetime] = None):
+    params = normalize_params(lat=lat, lon=lon, radius_km=radius_km, hours=hours, min_mag=min_mag, limit=limit)
+    return _since(_cached("around", AROUND_SQL, params), since)
+
+
+async def around_async(lat: float, lon: float, radius_km: float = 300.0, hours: int = 24,
+                       min_mag: float = 0.0, limit: int = 100, since: Optional[datetime] = None):
+    params = normalize_params(lat=lat, lon=lon, radius_km=radius_km, hours=hours, min_mag=min_mag, limit=limit)
+    return _since(await _cached_async("around", AROUND_SQL, params), since)
+
+
+# READ_BACKEND=silver: same endpoints answered from the parquet lake (api/silver.py), no database round trip
+def _silver_params(**params) -> dict:
+    cursor = params.pop("cursor", None)
+    if cursor:
+        params["cursor_time"], params["cursor_id"] = decode_cursor(cursor)
+    return params
+
+
+def recent_silver(response: Response, hours: int = 24, min_mag: float = 0.0, limit: int = 100,
+                  cursor: Optional[str] = None, since: Optional[datetime] = None):
+    params = _silver_params(hours=hours, min_mag=min_mag, limit=limit, cursor=cursor, since=_utc(since))
+    rows = silver.reader.ready().query(params).to_pylist()
+    _set_next_cursor(response, rows, limit)
+    return rows
+
+
+def recent_stream_silver(hours: int = 24, min_mag: float = 0.0, limit: Optional[int] = None,
+                         cursor: Optional[str] = None, since: Optional[datetime] = None):
+    params = _silver_params(hours=hours, min_mag=min_mag, limit=limit, cursor=cursor, since=_utc(since))
+    table = silver.reader.ready().query(params)
+    batches = table.to_batches(max_chunksize=STREAM_BATCH_ROWS)
+    return StreamingResponse((_ndjson(b.to_pylist()) for b in batches), media_type="application/x-ndjson")
+
+
+def around_silver(lat: float, lon: float, radius_km: float = 300.0, hours: int = 24,
+                  min_mag: float = 0.0, limit: int = 100, since: Optional[datetime] = None):
+    params = _silver_params(lat=lat, lon=lon, radius_km=radius_km, hours=hours, min_mag=min_mag, limit=limit,
+                            since=_utc(since))
+    return silver.reader.ready().query(params).to_pylist()
+
+
+# PROXIMITY_ENGINE=memory: in-process grid index (api/proximity.py) instead of PostGIS.
+# Plain def handlers: the index is CPU-bound, so they run in the threadpool in either DB_MODE.
+def around_memory(lat: float, lon: float, radius_km: float = 300.0, hours: int = 24,
+                  min_mag: float = 0.0, limit: int = 100, since: Optional[datetime] = None):
+    return proximity.ready().around(lat, lon, radius_km, hours=hours, min_mag=min_mag, limit=limit,
+                                    since=_utc(since))
+
+
+def nearest(lat: float, lon: float, k: int = Query(10, ge=1, le=1000), hours: int = 24, min_mag: float = 0.0):
+    params = normalize_params(lat=lat, lon=lon, k=k, hours=hours, min_mag=min_mag)
+    return _cached("nearest", NEAREST_SQL, params)
+
+
+async def nearest_async(lat: float, lon: float, k: int = Query(10, ge=1, le=1000), hours: int = 24,
+                        min_mag: float = 0.0):
+    params = normalize_params(lat=lat, lon=lon, k=k, hours=hours, min_mag=min_mag)
+    return await _cached_async("nearest", NEAREST_SQL, params)
+
+
+def nearest_memory(lat: float, lon: float, k: int = Query(10, ge=1, le=1000), hours: int = 24,
+                   min_mag: float = 0.0):
+    return proximity.ready().nearest(lat, lon, k, hours=hours, min_mag=min_mag)
+
+
+def _grid_params(zoom, hours, min_mag, west, south, east, north):
+    return {"cell": grid_cell_deg(zoom), "hours": hours, "min_mag": min_mag,
+            "west": west, "south": south, "east": east, "north": north}
+
+
+def grid(response: Response, zoom: int = Query(2, ge=0, le=GRID_MAX_ZOOM), hours: int = 24,
+         min_mag: float = 0.0, west: float = -180.0, south: float = -90.0, east: float = 180.0,
+         north: float = 90.0):
+    params = _grid_params(zoom, hours, min_mag, west, south, east, north)
+    response.headers["X-Grid-Cell-Deg"] = str(params["cell"])
+    return _cached("grid", GRID_SQL, params)
+
+
+async def grid_async(response: Response, zoom: int = Query(2, ge=0, le=GRID_MAX_ZOOM), hours: int = 24,
+                     min_mag: float = 0.0, west: float = -180.0, south: float = -90.0, east: float = 180.0,
+                     north: float = 90.0):
+    params = _grid_params(zoom, hours, min_mag, west, south, east, north)
+    response.headers["X-Grid-Cell-Deg"] = str(params["cell"])
+    return await _cached_async("grid", GRID_SQL, params)
+
+
+def _bin_step(width: float, base: float) -> int:
+    return max(1, round(width / base))
+
+
+def stats_summary(hours: int = 24):
+    return _cached("stats_summary", STATS_SUMMARY_SQL, {"hours": hours})[0]
+
+
+async def stats_summary_async(hours: int = 24):
+    return (await _cached_async("stats_summary", STATS_SUMMARY_SQL, {"hours": hours}))[0]
+
+
+def stats_timeseries(hours: int = 168, bucket: str = Query("hour", pattern="^(hour|day)$")):
+    return _cached("stats_timeseries", STATS_TIMESERIES_SQL, {"hours": hours, "bucket": bucket})
+
+
+async def stats_timeseries_async(hours: int = 168, bucket: str = Query("hour", pattern="^(hour|day)$")):
+    return await _cached_async("stats_timeseries", STATS_TIMESERIES_SQL, {"hours": hours, "bucket": bucket})
+
+
+def stats_magnitude(hours: int = 24, width: float = Query(0.5, gt=0)):
+    return _cached("stats_magnitude", STATS_MAG_SQL, {"hours": hours, "step": _bin_step(width, MAG_BIN_WIDTH)})
+
+
+async def stats_magnitude_async(hours: int = 24, width: float = Query(0.5, gt=0)):
+    return await _cached_async("stats_magnitude", STATS_MAG_SQL,
+                               {"hours": hours, "step": _bin_step(width, MAG_BIN_WIDTH)})
+
+
+def stats_depth(hours: int = 24, width: float = Query(10.0, gt=0)):
+    return _cached("stats_depth", STATS_DEPTH_SQL, {"hours": hours, "step": _bin_step(width, DEPTH_BIN_WIDTH)})
+
+
+async def stats_depth_async(hours: int = 24, width: float = Query(10.0, gt=0)):
+    return await _cached_async("stats_depth", STATS_DEPTH_SQL,
+                               {"hours": hours, "step": _bin_step(width, DEPTH_BIN_WIDTH)})
+
+
+def stats_regions(hours: int = 24, limit: int = 20):
+    return _cached("stats_regions", STATS_REGIONS_SQL, {"hours": hours, "limit": limit})
+
+
+async def stats_regions_async(hours: int = 24, limit: int = 20):
+    return await _cached_async("stats_regions", STATS_REGIONS_SQL, {"hours": hours, "limit": limit})
+
+
+# DB_MODE picks the handler flavour once, at startup
+ASYNC = DB_MODE == "async"
+SILVER = READ_BACKEND == "silver"
+MEMORY = proximity.PROXIMITY_ENGINE == "memory"
+if MEMORY and proximity.PROXIMITY_SOURCE == "db" and engine is None:
+    raise RuntimeError("PROXIMITY_ENGINE=memory loads its index from Postgres: set DATABASE or PROXIMITY_SOURCE=silver")
+router.add_api_route("/recent", recent_silver if SILVER else recent_async if ASYNC else recent,
+                     methods=["GET"], response_model=List[EarthquakeOut])
+router.add_api_route("/recent/stream", recent_stream_silver if SILVER else recent_stream_async if ASYNC else recent_stream,
+                     methods=["GET"], response_class=StreamingResponse)
+router.add_api_route("/around",
+                     around_memory if MEMORY else around_silver if SILVER else around_async if ASYNC else around,
+                     methods=["GET"], response_model=List[EarthquakeOut])
+# without a database (READ_BACKEND=silver, DATABASE unset) the Postgres-only routes are left out: 404, not a 500
+if engine is not None or MEMORY:
+    router.add_api_route("/nearest", nearest_memory if MEMORY else nearest_async if ASYNC else nearest,
+                         methods=["GET"], response_model=List[NearbyEarthquakeOut])
+if engine is not None:
+    router.add_api_route("/grid", grid_async if ASYNC else grid,
+                         methods=["GET"], response_model=List[GridCellOut])
+    router.add_api_route("/stats/summary", stats_summary_async if ASYNC else stats_summary,
+                         methods=["GET"], response_model=StatsSummaryOut)
+    router.add_api_route("/stats/timeseries", stats_timeseries_async if ASYNC else stats_timeseries,
+                         methods=["GET"], response_model=List[StatsBucketOut])
+    router.add_api_route("/stats/magnitude", stats_magnitude_async if ASYNC else stats_magnitude,
+                         methods=["GET"], response_model=List[HistogramBinOut])
+    router.add_api_route("/stats/depth", stats_depth_async if ASYNC else stats_depth,
+                         methods=["GET"], response_model=List[HistogramBinOut])
+    router.add_api_route("/stats/regions", stats_regions_async if ASYNC else stats_regions,
+                         methods=["GET"], response_model=List[RegionStatsOut])
+
+
+# Server-Sent Events: new/changed events pushed as runs land (one broker query per run for all clients).
+# Reconnecting clients send Last-Event-ID and get what they missed first.
+@router.get("/stream", response_class=StreamingResponse)
+async def live_stream(request: Request, min_mag: float = 0.0):
+    since = stream.parse_event_id(request.headers.get("last-event-id"))
+    return StreamingResponse(stream.event_stream(since, min_mag), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+
+# Columnar bulk export: Arrow IPC stream / Parquet / compact GeoJSON, picked from the Accept header.
+# Built from DB record batches (or the silver parquet with EXPORT_SOURCE=silver), never through EarthquakeOut.
+@router.get("/export", response_class=StreamingResponse)
+def export(request: Request, hours: int = 24, min_mag: float = 0.0, limit: Optional[int] = None,
+           lat: Optional[float] = None, lon: Optional[float] = None, radius_km: float = 300.0):
+    media = exporter.negotiate(request.headers.get("accept"))
+    if media is None:
+        raise HTTPException(status_code=406, detail=(
+            f"Supported: {exporter.ARROW_STREAM}, {exporter.PARQUET}, {exporter.GEOJSON}"))
+
+    params = {"hours": hours, "min_mag": min_mag, "limit": limit, "lat": lat, "lon": lon, "radius_km": radius_km}
+    if SILVER:
+        batches = silver.reader.ready().query(params).to_batches(max_chunksize=exporter.EXPORT_BATCH_ROWS)
+    elif exporter.EXPORT_SOURCE == "silver":
+        batches = exporter.silver_table(params).to_batches(max_chunksize=exporter.EXPORT_BATCH_ROWS)
+    else:
+        batches = exporter.db_batches(engine, params)
+
+    if media == exporter.PARQUET:
+        return Response(exporter.parquet_bytes(batches), media_type=media)
+    body = exporter.arrow_stream(batches) if media == exporter.ARROW_STREAM else exporter.geojson_stream(batches)
+    return StreamingResponse(body, media_type=media)
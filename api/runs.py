@@ -0,0 +1,96 @@
+import glob
+import os
+import threading
+import time
+
+from sqlalchemy import text
+
+RUN_CHECK_SECONDS = float(os.getenv("RUN_CHECK_SECONDS", "15"))
+
+LATEST_RUN_SQL = text("""
+  SELECT run_id, inserted_at_utc
+    FROM ingestion_runs
+   ORDER BY inserted_at_utc DESC NULLS LAST
+   LIMIT 1
+""")
+
+
+class RunWatcher:
+    """Notices when load_postgres lands a run, checking ingestion_runs at most every `interval` seconds.
+
+    Listeners registered with on_new_run() are called with the new run_id.
+    """
+
+    def __init__(self, interval: float = RUN_CHECK_SECONDS):
+        self.interval = interval
+        self.token = None
+        self.run_id = None
+        self._checked_at = 0.0
+        self._listeners = []
+        self._lock = threading.Lock()
+
+    def on_new_run(self, fn):
+        self._listeners.append(fn)
+        return fn
+
+    def _due(self) -> bool:
+        # only one caller per interval goes to the database
+        with self._lock:
+            now = time.monotonic()
+            if now - self._checked_at < self.interval:
+                return False
+            self._checked_at = now
+            return True
+
+    def _update(self, row):
+        token = tuple(row) if row else None
+        if token == self.token:
+            return
+        self.token = token
+        self.run_id = row[0] if row else None
+        for fn in self._listeners:
+            fn(self.run_id)
+
+    def poll(self):
+        if self._due():
+            from api.db import SessionLocal
+            with SessionLocal() as s:
+                self._update(s.execute(LATEST_RUN_SQL).first())
+
+    async def poll_async(self):
+        if self._due():
+            from api.db import AsyncSessionLocal
+            async with AsyncSessionLocal() as s:
+                self._update((await s.execute(LATEST_RUN_SQL)).first())
+
+
+class SilverRunWatcher(RunWatcher):
+    """Same contract, but the newest run is read from the silver run_stats directories (no database)."""
+
+    def __init__(self, base: str = None, interval: float = RUN_CHECK_SECONDS):
+        super().__init__(interval)
+        self.base = base or f"{os.getenv('SILVER_BASE', './data/silver')}/run_stats"
+
+    def _latest(self):
+        # run_stats/date=<ingestion date>/run_id=<UTC timestamp>: both sort lexicographically
+        dates = sorted(glob.glob(f"{self.base}/date=*"))
+        for date_dir in reversed(dates):
+            runs = sorted(glob.glob(f"{date_dir}/run_id=*"))
+            if runs:
+                return (runs[-1].rsplit("run_id=", 1)[1],)
+        return None
+
+    def poll(self):
+        if self._due():
+            self._update(self._latest())
+
+    async def poll_async(self):
+        self.poll()
+
+
+def _watcher():
+    from api.db import READ_BACKEND
+    return SilverRunWatcher() if READ_BACKEND == "silver" else RunWatcher()
+
+
+watcher = _watcher()
@@ -0,0 +1,76 @@
+import os
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from api import export as exporter
+from api.runs import watcher
+
+# READ_BACKEND=silver: days of newest event-date partitions held in memory; older windows are scanned
+SILVER_HOT_DAYS = int(os.getenv("SILVER_HOT_DAYS", "2"))
+
+
+class SilverReader:
+    """Answers the read endpoints from the silver parquet.
+
+    The newest `hot_days` date partitions live in one Arrow table (LAKE_SCHEMA, one version per event) that is reloaded when a new run_id
+    shows up; windows reaching further back add a pruned/pushed-down scan of the older partitions.
+    """
+
+    def __init__(self, base: str = None, hot_days: int = SILVER_HOT_DAYS):
+        self.base = base or f"{exporter.SILVER_BASE}/earthquakes"
+        self.hot_days = hot_days
+        self.hot = exporter.LAKE_SCHEMA.empty_table()
+        self.hot_from = None  # first date (YYYY-MM-DD) held in memory
+        self.stale = True
+        self._lock = threading.Lock()
+
+    def _hot_from(self) -> str:
+        return (datetime.now(timezone.utc) - timedelta(days=self.hot_days - 1)).strftime("%Y-%m-%d")
+
+    def refresh(self):
+        with self._lock:
+            hot_from = self._hot_from()
+            if not self.stale and hot_from == self.hot_from:
+                return
+            t0 = time.perf_counter()
+            if os.path.isdir(self.base):
+                dataset = exporter.lake(self.base)
+                table = dataset.to_table(columns=exporter.LAKE_COLS, filter=exporter.date_from(hot_from))
+                table = exporter.latest_per_event(table.cast(exporter.LAKE_SCHEMA))
+                table = table.sort_by([("time_utc", "descending"), ("event_id", "descending")])
+            else:
+                table = exporter.LAKE_SCHEMA.empty_table()
+            self.hot, self.hot_from, self.stale = table, hot_from, False
+            print(f"silver hot table: {table.num_rows} rows from {hot_from} ({time.perf_counter() - t0:.2f}s)")
+
+    def ready(self) -> "SilverReader":
+        watcher.poll()
+        if self.stale or self.hot_from != self._hot_from():
+            self.refresh()
+        return self
+
+    def query(self, params: dict) -> pa.Table:
+        """params as for the SQL queries: hours, min_mag, [limit], [lat, lon, radius_km], [cursor_time, cursor_id]."""
+        table, hot_from = self.hot, self.hot_from
+        since = datetime.now(timezone.utc) - timedelta(hours=params["hours"])
+        if since.strftime("%Y-%m-%d") < hot_from and os.path.isdir(self.base):
+            cold = exporter.silver_table({**params, "limit": None}, base=self.base, before=hot_from, versions=True)
+            # an event whose time moved across hot_from sits on both sides: keep its newest version only, before
+            # filtering and limiting (a stale version that passes the filters must not take a slot on the page)
+            if pc.any(pc.is_in(cold["event_id"], value_set=table["event_id"])).as_py():
+                table = exporter.latest_per_event(pa.concat_tables([table, cold]))
+            else:
+                table = pa.concat_tables([table, cold])
+        return exporter.filter_table(table, params).select(exporter.COLS)
+
+
+reader = SilverReader()
+
+
+@watcher.on_new_run
+def _mark_stale(run_id):
+    reader.stale = True
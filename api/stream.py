@@ -0,0 +1,189 @@
+import asyncio
+import json
+import os
+from datetime import datetime, timedelta, timezone
+
+import pyarrow.compute as pc
+from prometheus_client import Counter, Gauge
+from sqlalchemy import text
+from starlette.concurrency import run_in_threadpool
+
+from api.runs import watcher
+
+STREAM_POLL_SECONDS = float(os.getenv("STREAM_POLL_SECONDS", "5"))
+STREAM_QUEUE_SIZE = int(os.getenv("STREAM_QUEUE_SIZE", "100"))
+STREAM_HEARTBEAT_SECONDS = float(os.getenv("STREAM_HEARTBEAT_SECONDS", "15"))
+# changed rows are looked up in this event-time window (partition pruning); all_month covers 30 days
+STREAM_LOOKBACK_HOURS = int(os.getenv("STREAM_LOOKBACK_HOURS", "720"))
+
+STREAM_SUBSCRIBERS = Gauge("eq_stream_subscribers", "Clients connected to /earthquakes/stream")
+STREAM_EVENTS = Counter("eq_stream_events_total", "Events fanned out by the stream broker (once per run)")
+STREAM_DROPPED = Counter("eq_stream_dropped_total", "Subscribers disconnected for falling behind")
+
+# rows written by runs after the watermark (every load stamps ingestion_time_utc)
+CHANGES_SQL = text("""
+  SELECT event_id, mag, place, time_utc, lat, lon, depth_km, run_id, ingestion_time_utc
+    FROM earthquakes
+   WHERE ingestion_time_utc > :since
+     AND time_utc >= NOW() - make_interval(hours => :lookback)
+   ORDER BY ingestion_time_utc, time_utc, event_id
+""")
+
+LAGGED = object()  # queued instead of a batch when a subscriber's queue overflowed
+
+
+def _changes_db(since):
+    from api.db import SessionLocal
+    with SessionLocal() as s:
+        rows = s.execute(CHANGES_SQL, {"since": since, "lookback": STREAM_LOOKBACK_HOURS}).mappings().all()
+        return [dict(r) for r in rows]
+
+
+async def _changes_db_async(since):
+    from api.db import AsyncSessionLocal
+    async with AsyncSessionLocal() as s:
+        res = await s.execute(CHANGES_SQL, {"since": since, "lookback": STREAM_LOOKBACK_HOURS})
+        return [dict(r) for r in res.mappings().all()]
+
+
+def _changes_silver(since):
+    from api import export as exporter, silver
+    hot = silver.reader.ready().hot
+    return hot.filter(pc.greater(hot["ingestion_time_utc"], since)).select(exporter.COLS).sort_by(
+        [("ingestion_time_utc", "ascending"), ("time_utc", "ascending"), ("event_id", "ascending")]).to_pylist()
+
+
+async def changes(since):
+    """Rows loaded after `since` (a UTC datetime), from whichever backend serves the reads."""
+    from api.db import DB_MODE, READ_BACKEND
+    if READ_BACKEND == "silver":
+        return await run_in_threadpool(_changes_silver, since)
+    if DB_MODE == "async":
+        return await _changes_db_async(since)
+    return await run_in_threadpool(_changes_db, since)
+
+
+class EventBroker:
+    """Fan-out of newly loaded events to every /stream subscriber.
+
+    A single task (running only while someone is subscribed) waits for the RunWatcher to report a new
+    run, queries the rows loaded since its watermark once, and puts the batch on each subscriber's
+    queue: N viewers cost one query per run, not N. A subscriber whose queue is full is told it lagged
+    and disconnected; it resumes from its Last-Event-ID.
+    """
+
+    def __init__(self, interval: float = STREAM_POLL_SECONDS, queue_size: int = STREAM_QUEUE_SIZE):
+        self.interval = interval
+        self.queue_size = queue_size
+        self.subscribers = set()
+        self.since = None
+        self.run_id = None
+        self._task = None
+
+    def subscribe(self) -> asyncio.Queue:
+        q = asyncio.Queue(maxsize=self.queue_size)
+        self.subscribers.add(q)
+        STREAM_SUBSCRIBERS.set(len(self.subscribers))
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+        return q
+
+    def unsubscribe(self, q: asyncio.Queue):
+        self.subscribers.discard(q)
+        STREAM_SUBSCRIBERS.set(len(self.subscribers))
+
+    def publish(self, rows):
+        STREAM_EVENTS.inc(len(rows))
+        for q in list(self.subscribers):
+            try:
+                q.put_nowait(rows)
+            except asyncio.QueueFull:
+                q.get_nowait()
+                q.put_nowait(LAGGED)
+                self.unsubscribe(q)
+                STREAM_DROPPED.inc()
+
+    async def _new_run(self) -> bool:
+        from api.db import DB_MODE, READ_BACKEND
+        if READ_BACKEND == "db" and DB_MODE == "async":
+            await watcher.poll_async()
+        else:
+            await run_in_threadpool(watcher.poll)
+        if watcher.run_id == self.run_id:
+            return False
+        self.run_id = watcher.run_id
+        return True
+
+    async def _run(self):
+        if self.since is None:
+            # only runs loaded after the broker started are pushed; clients catch up with Last-Event-ID
+            self.since = datetime.now(timezone.utc)
+            await self._new_run()
+        while self.subscribers:
+            try:
+                if await self._new_run():
+                    rows = await changes(self.since)
+                    if rows:
+                        self.since = max(r["ingestion_time_utc"] for r in rows)
+                        self.publish(rows)
+            except Exception as e:
+                print(f"stream broker: poll failed: {e!r}")
+            await asyncio.sleep(self.interval)
+        # nobody listening: the next subscriber starts from "now" again
+        self.since = None
+
+
+broker = EventBroker()
+
+
+# Server-Sent Events framing
+def _json(rows) -> str:
+    return json.dumps(rows, default=lambda v: v.isoformat())
+
+
+def sse(rows, event: str = "earthquakes") -> bytes:
+    # the id is the batch watermark: EventSource sends it back as Last-Event-ID on reconnect
+    last = max(r["ingestion_time_utc"] for r in rows).isoformat()
+    return f"id: {last}\nevent: {event}\ndata: {_json(rows)}\n\n".encode()
+
+
+def parse_event_id(value):
+    try:
+        since = datetime.fromisoformat(value)
+    except (TypeError, ValueError):
+        return None
+    return since if since.tzinfo else since.replace(tzinfo=timezone.utc)
+
+
+async def event_stream(since=None, min_mag: float = 0.0):
+    def keep(rows):
+        return [r for r in rows if r["mag"] is None or r["mag"] >= min_mag]
+
+    q = broker.subscribe()
+    try:
+        yield f"retry: {int(STREAM_POLL_SECONDS * 1000)}\n: connected\n\n".encode()
+        if since is not None:
+            # reconnect: replay what was loaded while this client was away (capped at the lookback)
+            floor = datetime.now(timezone.utc) - timedelta(hours=STREAM_LOOKBACK_HOURS)
+            missed = await changes(max(since, floor))
+            if missed:
+                since = max(r["ingestion_time_utc"] for r in missed)
+                missed = keep(missed)
+            if missed:
+                yield sse(missed)
+        while True:
+            try:
+                rows = await asyncio.wait_for(q.get(), timeout=STREAM_HEARTBEAT_SECONDS)
+            except asyncio.TimeoutError:
+                yield b": keepalive\n\n"
+                continue
+            if rows is LAGGED:
+                yield b"event: lagged\ndata: {}\n\n"
+                return
+            rows = keep(rows)
+            if rows and since is not None:
+                rows = [r for r in rows if r["ingestion_time_utc"] > since]
+            if rows:
+                yield sse(rows)
+    finally:
+        broker.unsubscribe(q)
@@ -0,0 +1,81 @@
+# Load test: DB_MODE=sync vs DB_MODE=async against a local Postgres.
+# Starts the API the same way as the Procfile (gunicorn, 2 workers x 4 threads) once per mode.
+#
+#   DATABASE=postgresql+psycopg2://... API_KEY=dev python -m benchmarks.bench_api_modes --requests 2000 --concurrency 64
+import argparse
+import asyncio
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+import httpx
+
+ENDPOINTS = [
+    ("/earthquakes/recent", {"hours": 168, "min_mag": 0.0, "limit": 200}),
+    ("/earthquakes/around", {"lat": 34.05, "lon": -118.25, "radius_km": 500, "limit": 200}),
+]
+
+
+def _start_server(mode: str, port: int):
+    # the load is one client: per-key limits off unless set explicitly
+    env = {"RATE_LIMIT_RPS": "0", "RATE_LIMIT_CONCURRENCY": "0", **os.environ, "DB_MODE": mode}
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "api.main:app", "-k", "uvicorn.workers.UvicornWorker",
+         "--workers=2", "--threads=4", "--timeout=60", f"--bind=127.0.0.1:{port}"],
+        env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    for _ in range(100):
+        try:
+            if httpx.get(f"http://127.0.0.1:{port}/health", timeout=1).status_code == 200:
+                return proc
+        except httpx.HTTPError:
+            time.sleep(0.1)
+    proc.terminate()
+    raise RuntimeError(f"API did not start in {mode} mode")
+
+
+async def _load(base: str, path: str, params: dict, total: int, concurrency: int):
+    headers = {"X-API-Key": os.getenv("API_KEY", "")}
+    latencies, errors = [], 0
+    sem = asyncio.Semaphore(concurrency)
+    limits = httpx.Limits(max_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base, headers=headers, limits=limits, timeout=60) as client:
+        async def one():
+            nonlocal errors
+            async with sem:
+                start = time.perf_counter()
+                r = await client.get(path, params=params)
+                latencies.append(time.perf_counter() - start)
+                errors += r.status_code != 200
+
+        start = time.perf_counter()
+        await asyncio.gather(*(one() for _ in range(total)))
+        wall = time.perf_counter() - start
+    q = statistics.quantiles(latencies, n=100)
+    return {"rps": total / wall, "p50": q[49] * 1000, "p95": q[94] * 1000, "p99": q[98] * 1000, "errors": errors}
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--requests", type=int, default=1000)
+    ap.add_argument("--concurrency", type=int, default=32)
+    ap.add_argument("--modes", nargs="+", default=["sync", "async"])
+    ap.add_argument("--port", type=int, default=8765)
+    args = ap.parse_args()
+
+    for mode in args.modes:
+        proc = _start_server(mode, args.port)
+        try:
+            for path, params in ENDPOINTS:
+                r = asyncio.run(_load(f"http://127.0.0.1:{args.port}", path, params, args.requests, args.concurrency))
+                print(f"{mode:5s} {path:22s} rps={r['rps']:8.1f}  p50={r['p50']:7.1f}ms  "
+                      f"p95={r['p95']:7.1f}ms  p99={r['p99']:7.1f}ms  errors={r['errors']}")
+        finally:
+            proc.terminate()
+            proc.wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+# Payload size and serialization time: JSON list of EarthquakeOut vs the /export formats.
+#
+#   python -m benchmarks.bench_export --rows 1000 10000 100000
+import argparse
+import time
+from datetime import datetime, timezone
+from typing import List
+
+import numpy as np
+import pyarrow as pa
+from pydantic import TypeAdapter
+
+from api import export as exporter
+from schemas.models import EarthquakeOut
+
+
+def synthetic_table(n: int, seed: int = 0) -> pa.Table:
+    rng = np.random.default_rng(seed)
+    now = datetime.now(timezone.utc)
+    now_us = int(now.timestamp() * 1_000_000)
+    times = pa.array(now_us - rng.integers(0, 30 * 86400, n) * 1_000_000, pa.timestamp("us", tz="UTC"))
+    return pa.table({
+        "event_id": [f"xx{i:010d}" for i in range(n)],
+        "mag": rng.gamma(2.0, 0.8, n).round(2),
+        "place": [f"{i % 97} km N of Synthville" for i in range(n)],
+        "time_utc": times,
+        "lat": rng.uniform(-60, 70, n),
+        "lon": rng.uniform(-180, 180, n),
+        "depth_km": rng.uniform(0, 300, n),
+        "run_id": pa.array(["20251016T000000Z"] * n),
+        "ingestion_time_utc": pa.array([now_us] * n, pa.timestamp("us", tz="UTC")),
+    }).cast(exporter.SCHEMA)
+
+
+def json_path(table: pa.Table) -> bytes:
+    # what /recent does: dict rows -> EarthquakeOut validation -> JSON
+    adapter = TypeAdapter(List[EarthquakeOut])
+    return adapter.dump_json(adapter.validate_python(table.to_pylist()))
+
+
+FORMATS = {
+    "json (EarthquakeOut)": json_path,
+    "arrow ipc": lambda t: b"".join(exporter.arrow_stream(t.to_batches(exporter.EXPORT_BATCH_ROWS))),
+    "parquet": lambda t: exporter.parquet_bytes(t.to_batches(exporter.EXPORT_BATCH_ROWS)),
+    "geojson (compact)": lambda t: b"".join(exporter.geojson_stream(t.to_batches(exporter.EXPORT_BATCH_ROWS))),
+}
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rows", type=int, nargs="+", default=[1000, 10000, 100000])
+    args = ap.parse_args()
+
+    for n in args.rows:
+        table = synthetic_table(n)
+        for name, fn in FORMATS.items():
+            start = time.perf_counter()
+            body = fn(table)
+            elapsed = time.perf_counter() - start
+            print(f"rows={n:>7d}  {name:22s} {len(body) / 1024:10.1f} KiB  {elapsed * 1000:9.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+# Bulk COPY+merge vs row-at-a-time upsert into `earthquakes`.
+# Needs DATABASE pointing at a scratch Postgres; rows are tagged `bench-` and removed afterwards.
+#
+#   python -m benchmarks.bench_load_postgres --rows 1000 10000 50000
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import text
+
+from ingest import load_postgres
+
+RUN_ID = "bench"
+
+
+def synthetic_silver(n: int, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    t = pd.Timestamp.now(tz="UTC") - pd.to_timedelta(rng.integers(0, 7 * 86400, n), unit="s")
+    return pd.DataFrame({
+        "event_id": [f"bench-{i:08d}" for i in range(n)],
+        "mag": rng.gamma(2.0, 0.8, n).round(2),
+        "place": [f"{i % 97} km N of Benchville" for i in range(n)],
+        "time_utc": t,
+        "lat": rng.uniform(-60, 70, n),
+        "lon": rng.uniform(-180, 180, n),
+        "depth_km": rng.uniform(0, 300, n),
+        "updated_utc": t,
+        "run_id": RUN_ID,
+    })
+
+
+def _cleanup():
+    # the rollups behind /earthquakes/stats are refreshed for the deleted rows' hours, in the same transaction
+    with load_postgres.engine.begin() as conn:
+        hours = conn.execute(text(
+            "DELETE FROM earthquakes WHERE event_id LIKE 'bench-%' RETURNING eq_hour(time_utc)")).scalars().all()
+        if hours:
+            conn.execute(text("SELECT eq_refresh_rollups(CAST(:h AS timestamptz[]))"), {"h": sorted(set(hours))})
+
+
+def _timed(fn, path):
+    start = time.perf_counter()
+    fn(path, RUN_ID)
+    return time.perf_counter() - start
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rows", type=int, nargs="+", default=[1000, 10000])
+    args = ap.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in args.rows:
+            path = os.path.join(tmp, f"bench_{n}.parquet")
+            synthetic_silver(n).to_parquet(path, index=False)
+            for name, fn in (("rowwise", load_postgres._upsert_earthquakes_rowwise),
+                             ("bulk", load_postgres.upsert_earthquakes)):
+                _cleanup()
+                cold = _timed(fn, path)   # all inserts
+                warm = _timed(fn, path)   # same rows again: rewritten rowwise, skipped as unchanged in bulk
+                print(f"{name:8s} rows={n:>8d}  insert={cold:8.3f}s ({n / cold:10.0f} rows/s)"
+                      f"  rerun={warm:8.3f}s ({n / warm:10.0f} rows/s)")
+    _cleanup()
+
+
+if __name__ == "__main__":
+    main()
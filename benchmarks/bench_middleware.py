@@ -0,0 +1,130 @@
+# Per-request overhead of the middleware stack: original BaseHTTPMiddleware versions vs the pure ASGI ones,
+# and what the per-key limiter adds (limits set high enough that nothing is rejected: the full take/acquire/
+# release path is timed). Requests are driven straight through the ASGI app (no server, no sockets), so only
+# the stack is measured; with --redis-url the shared store is timed too (a round trip per take/acquire/release).
+#
+#   python -m benchmarks.bench_middleware --requests 20000 [--redis-url redis://localhost:6379/0]
+import argparse
+import asyncio
+import os
+import time
+
+from fastapi import FastAPI, HTTPException, Request
+from prometheus_client import CollectorRegistry, Counter, Histogram
+from starlette.middleware.base import BaseHTTPMiddleware
+
+from api.middleware.auth import APIKeyMiddleware, load_keys
+from api.middleware.metrics import MetricsMiddleware
+from api.ratelimit import LocalLimiter, RedisLimiter
+
+API_KEY = "bench-key"
+_registry = CollectorRegistry()
+LEGACY_COUNT = Counter("legacy_http_requests_total", "", ["method", "path", "status"], registry=_registry)
+LEGACY_LATENCY = Histogram("legacy_http_request_duration_seconds", "", ["method", "path"], registry=_registry)
+
+
+class LegacyMetricsMiddleware(BaseHTTPMiddleware):
+    # original api/main.py version (raw URL path as label)
+    async def dispatch(self, request: Request, call_next):
+        start_time = time.time()
+        response = await call_next(request)
+        process_time = time.time() - start_time
+        LEGACY_COUNT.labels(method=request.method, path=request.url.path, status=response.status_code).inc()
+        LEGACY_LATENCY.labels(method=request.method, path=request.url.path).observe(process_time)
+        return response
+
+
+class LegacyAPIKeyMiddleware(BaseHTTPMiddleware):
+    # original api/middleware/auth.py version
+    async def dispatch(self, request: Request, call_next):
+        path = request.url.path
+        if path == "/health" or path.startswith("/metrics") or request.method.upper() == "OPTIONS":
+            return await call_next(request)
+        if request.headers.get("X-API-Key") != os.getenv("API_KEY"):
+            raise HTTPException(status_code=401, detail="Unauthorized: invalid or missing API key.")
+        return await call_next(request)
+
+
+def build_app(stack):
+    app = FastAPI()
+
+    @app.get("/items/{item_id}")
+    def item(item_id: int):
+        return {"item_id": item_id, "payload": "x" * 256}
+
+    for mw in stack:
+        mw, kw = mw if isinstance(mw, tuple) else (mw, {})
+        app.add_middleware(mw, **kw)
+    return app
+
+
+def stacks(redis_url=None):
+    # limits 0 = off; the limited key never runs out of tokens or slots
+    unlimited = {"keys": load_keys(f"bench:{API_KEY}:0:1:0", ""), "limiter": LocalLimiter()}
+    limited = load_keys(f"bench:{API_KEY}:1e9:1e9:1e6", "")
+    out = {
+        "none": [],
+        "BaseHTTPMiddleware (before)": [LegacyAPIKeyMiddleware, LegacyMetricsMiddleware],
+        "pure ASGI (after)": [(APIKeyMiddleware, unlimited), MetricsMiddleware],
+        "+ limiter (local)": [(APIKeyMiddleware, {"keys": limited, "limiter": LocalLimiter()}), MetricsMiddleware],
+    }
+    if redis_url:
+        out["+ limiter (redis)"] = [(APIKeyMiddleware, {"keys": limited, "limiter": RedisLimiter(redis_url)}),
+                                    MetricsMiddleware]
+    return out
+
+
+async def _request(app, i):
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+        "scheme": "http", "path": f"/items/{i}", "raw_path": f"/items/{i}".encode(), "root_path": "",
+        "query_string": b"", "headers": [(b"x-api-key", API_KEY.encode()), (b"host", b"bench")],
+        "client": ("127.0.0.1", 1234), "server": ("bench", 80),
+    }
+    status = None
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+
+    await app(scope, receive, send)
+    return status
+
+
+async def run(app, n, concurrency):
+    sem = asyncio.Semaphore(concurrency)
+
+    async def one(i):
+        async with sem:
+            return await _request(app, i)
+
+    await asyncio.gather(*(one(i) for i in range(200)))  # warm-up
+    start = time.perf_counter()
+    statuses = await asyncio.gather(*(one(i) for i in range(n)))
+    elapsed = time.perf_counter() - start
+    assert all(s == 200 for s in statuses), set(statuses)
+    return elapsed
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--requests", type=int, default=20000)
+    ap.add_argument("--concurrency", type=int, default=32)
+    ap.add_argument("--redis-url", help="also time the shared (Redis-protocol) limiter store")
+    args = ap.parse_args()
+    os.environ["API_KEY"] = API_KEY
+
+    base = None
+    for name, stack in stacks(args.redis_url).items():
+        elapsed = asyncio.run(run(build_app(stack), args.requests, args.concurrency))
+        per_req = elapsed / args.requests * 1e6
+        base = per_req if base is None else base
+        print(f"{name:28s} {per_req:8.1f} us/request  (+{per_req - base:6.1f} us middleware)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+# In-memory grid index (PROXIMITY_ENGINE=memory) vs PostGIS for /around radius and k-nearest queries.
+# The PostGIS side needs DATABASE pointing at a scratch Postgres with PostGIS; rows go into a temp table.
+#
+#   python -m benchmarks.bench_proximity --rows 10000 100000 1000000 10000000
+#   python -m benchmarks.bench_proximity --rows 10000 100000 --postgis
+import argparse
+import io
+import time
+
+import pyarrow.csv as pacsv
+
+from api import proximity
+from benchmarks.bench_export import synthetic_table
+
+# (lat, lon): dense, open ocean, near the antimeridian, near a pole
+POINTS = [(34.05, -118.25), (-30.0, -140.0), (51.0, 179.8), (69.0, 20.0)]
+
+
+def _timed(fn, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        out = fn()
+    return (time.perf_counter() - start) / repeat * 1000, out
+
+
+def bench_memory(table, radius_km, hours, k, repeat):
+    engine = proximity.ProximityEngine()
+    build_ms, _ = _timed(lambda: engine.build(table), 1)
+    around_ms, rows = _timed(lambda: [engine.around(lat, lon, radius_km, hours=hours, limit=100)
+                                      for lat, lon in POINTS], repeat)
+    knn_ms, _ = _timed(lambda: [engine.nearest(lat, lon, k, hours=hours) for lat, lon in POINTS], repeat)
+    return build_ms, around_ms / len(POINTS), knn_ms / len(POINTS), sum(len(r) for r in rows)
+
+
+def bench_postgis(table, radius_km, hours, k, repeat):
+    from sqlalchemy import text
+
+    from api.db import engine
+
+    with engine.connect() as conn:
+        raw = conn.connection.driver_connection
+        with raw.cursor() as cur:
+            cur.execute("""
+                CREATE TEMP TABLE _bench_eq (event_id TEXT, mag DOUBLE PRECISION, place TEXT,
+                  time_utc TIMESTAMPTZ, lat DOUBLE PRECISION, lon DOUBLE PRECISION, depth_km DOUBLE PRECISION,
+                  run_id TEXT, ingestion_time_utc TIMESTAMPTZ)
+            """)
+            load_start = time.perf_counter()
+            for batch in table.to_batches(max_chunksize=100_000):
+                buf = io.BytesIO()
+                pacsv.write_csv(batch, buf, pacsv.WriteOptions(include_header=False))
+                buf.seek(0)
+                cur.copy_expert("COPY _bench_eq FROM STDIN WITH (FORMAT csv)", buf)
+            cur.execute("ALTER TABLE _bench_eq ADD COLUMN geom geography(Point, 4326)")
+            cur.execute("UPDATE _bench_eq SET geom = ST_SetSRID(ST_MakePoint(lon, lat), 4326)::geography")
+            cur.execute("CREATE INDEX ON _bench_eq USING GIST (geom)")
+            cur.execute("CREATE INDEX ON _bench_eq (time_utc DESC, event_id DESC)")
+            cur.execute("ANALYZE _bench_eq")
+            build_ms = (time.perf_counter() - load_start) * 1000
+
+        sql = lambda q: text(q.replace("FROM earthquakes", "FROM _bench_eq"))
+        from api.routers.earthquakes_db import AROUND_SQL, NEAREST_SQL
+        around_sql, nearest_sql = sql(AROUND_SQL.text), sql(NEAREST_SQL.text)
+        params = {"hours": hours, "min_mag": 0.0, "limit": 100, "radius_m": radius_km * 1000.0, "k": k}
+        around_ms, rows = _timed(lambda: [conn.execute(around_sql, dict(params, lat=lat, lon=lon)).all()
+                                          for lat, lon in POINTS], repeat)
+        knn_ms, _ = _timed(lambda: [conn.execute(nearest_sql, dict(params, lat=lat, lon=lon)).all()
+                                    for lat, lon in POINTS], repeat)
+        conn.rollback()
+    return build_ms, around_ms / len(POINTS), knn_ms / len(POINTS), sum(len(r) for r in rows)
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rows", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    ap.add_argument("--radius-km", type=float, default=300.0)
+    ap.add_argument("--hours", type=int, default=24 * 7)
+    ap.add_argument("-k", type=int, default=10)
+    ap.add_argument("--repeat", type=int, default=20)
+    ap.add_argument("--postgis", action="store_true", help="also time the PostGIS queries (needs DATABASE)")
+    args = ap.parse_args()
+
+    engines = {"memory": bench_memory}
+    if args.postgis:
+        engines["postgis"] = bench_postgis
+    print(f"{'rows':>9s}  {'engine':8s} {'build/load ms':>14s} {'around ms':>10s} {'knn ms':>8s} {'hits':>6s}")
+    for n in args.rows:
+        table = synthetic_table(n)
+        for name, fn in engines.items():
+            build_ms, around_ms, knn_ms, hits = fn(table, args.radius_km, args.hours, args.k, args.repeat)
+            print(f"{n:>9d}  {name:8s} {build_ms:14.1f} {around_ms:10.2f} {knn_ms:8.2f} {hits:6d}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+# Sequential vs concurrent multi-source fetch against local stub servers (no network needed).
+#
+# One stub plays the USGS summary host (several feeds, keep-alive), others play FDSN event services
+# answering `format=text`; each path answers after its own delay. Sequential wall time is about the sum
+# of the delays, concurrent (ingest/multi_source.py) about the slowest one.
+#
+#   python -m benchmarks.bench_sources --delays 0.2 0.4 0.6 0.8 --events 2000
+import argparse
+import asyncio
+import json
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+
+from benchmarks.feedgen import synthetic_feed
+from ingest.fecth_data import ingest_to_bronze
+from ingest.multi_source import fetch_all
+from ingest.sources import FDSNEvent, USGSFeed
+
+
+def fdsn_text(feed) -> bytes:
+    lines = ["#EventID|Time|Latitude|Longitude|Depth/km|Author|Catalog|Contributor|ContributorID|"
+             "MagType|Magnitude|MagAuthor|EventLocationName"]
+    for f in feed["features"]:
+        p, (lon, lat, depth) = f["properties"], f["geometry"]["coordinates"]
+        t = datetime.fromtimestamp(p["time"] / 1000, timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.%f")[:-3]
+        lines.append(f"{f['id']}|{t}|{lat}|{lon}|{depth}|{p['net']}|{p['net']}|{p['net']}|{f['id']}|"
+                     f"{p['magType']}|{p['mag'] if p['mag'] is not None else ''}|{p['net']}|{p['place']}")
+    return ("\n".join(lines) + "\n").encode()
+
+
+@contextmanager
+def stub_server(routes: dict):
+    """Serve {path: (delay_seconds, content_type, body)} on 127.0.0.1:<free port>; yields the base URL."""
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"  # keep-alive, so connection reuse is visible
+
+        def do_GET(self):
+            route = routes.get(urlsplit(self.path).path)
+            if route is None:
+                self.send_error(404)
+                return
+            delay, ctype, body = route
+            time.sleep(delay)
+            self.send_response(200)
+            self.send_header("Content-Type", ctype)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        yield f"http://127.0.0.1:{server.server_address[1]}"
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+@contextmanager
+def stub_sources(delays, events: int, bronze_base: str):
+    """Sources for the given per-source delays: the first half USGS feeds on one host, the rest FDSN hosts."""
+    start_ms = int(time.time() * 1000) - 24 * 3_600_000
+    n_usgs = (len(delays) + 1) // 2
+    feeds = [synthetic_feed(events, seed=i, start_ms=start_ms, span_hours=24) for i in range(len(delays))]
+    usgs_names = [f"feed{i}" for i in range(n_usgs)]
+    usgs_routes = {f"/{name}.geojson": (d, "application/json", json.dumps(f).encode())
+                   for name, d, f in zip(usgs_names, delays, feeds)}
+    with stub_server(usgs_routes) as usgs_url:
+        servers = []
+        try:
+            sources = []
+            for name in usgs_names:
+                # real USGSFeed adapter, pointed at the stub host
+                source = USGSFeed("all_hour", base=bronze_base)
+                source.key, source.url = name, f"{usgs_url}/{name}.geojson"
+                sources.append(source)
+            for i, (d, f) in enumerate(zip(delays[n_usgs:], feeds[n_usgs:])):
+                cm = stub_server({"/fdsnws/event/1/query": (d, "text/plain", fdsn_text(f))})
+                servers.append(cm)
+                url = cm.__enter__()
+                sources.append(FDSNEvent(f"fdsn{i}", f"{url}/fdsnws/event/1/query", base=bronze_base))
+            yield sources
+        finally:
+            for cm in servers:
+                cm.__exit__(None, None, None)
+
+
+def fetch_sequential(sources):
+    return [ingest_to_bronze(source=s) for s in sources]
+
+
+def fetch_concurrent(sources):
+    results = asyncio.run(fetch_all(sources))
+    failed = [(s, r) for s, r in results if isinstance(r, Exception)]
+    if failed:
+        raise failed[0][1]
+    return [r for _, r in results]
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--delays", type=float, nargs="+", default=[0.2, 0.4, 0.6, 0.8])
+    ap.add_argument("--events", type=int, default=2000, help="events per source")
+    ap.add_argument("--repeat", type=int, default=3)
+    args = ap.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp, stub_sources(args.delays, args.events, tmp) as sources:
+        print(f"{len(sources)} sources: {', '.join(repr(s) for s in sources)}")
+        print(f"sum of delays {sum(args.delays):.2f}s, slowest {max(args.delays):.2f}s")
+        for name, fn in (("sequential", fetch_sequential), ("concurrent", fetch_concurrent)):
+            times = []
+            for _ in range(args.repeat):
+                start = time.perf_counter()
+                runs = fn(sources)
+                times.append(time.perf_counter() - start)
+            records = sum(r["records"] for r in runs)
+            print(f"{name:10s} best {min(times):.3f}s  median {sorted(times)[len(times) // 2]:.3f}s  "
+                  f"({records} records parsed on the last run)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+# Vectorized silver frame builder vs the original json_normalize implementation.
+#
+#   python -m benchmarks.bench_transform --features 1000 10000 100000 1000000
+import argparse
+import time
+import tracemalloc
+
+import pandas as pd
+import pytz
+
+from benchmarks.feedgen import synthetic_feed
+from ingest.transform import SILVER_COLS, build_silver_frame
+
+MANIFEST = {"run_id": "20251016T000000Z", "ingestion_time_utc": "2025-10-16T00:00:00Z"}
+
+
+def legacy_silver_frame(features, manifest):
+    # original transform_to_silver body (json_normalize + apply(pd.Series))
+    df = pd.json_normalize(features)
+    df['event_id'] = df['id']
+    df['mag'] = df['properties.mag']
+    df['place'] = df['properties.place']
+    df['time_utc'] = pd.to_datetime(df['properties.time'], unit='ms', utc=True)
+    df['updated_utc'] = pd.to_datetime(df['properties.updated'], unit='ms', utc=True)
+    tz_local = pytz.timezone('Asia/Dubai')
+    df['time_local'] = df['time_utc'].dt.tz_convert(tz_local)
+    df['updated_local'] = df['updated_utc'].dt.tz_convert(tz_local)
+    coords = df['geometry.coordinates'].apply(pd.Series)
+    df['lon'] = coords[0]
+    df['lat'] = coords[1]
+    df['depth_km'] = coords[2]
+    df['source'] = 'USGS'
+    df['run_id'] = manifest['run_id']
+    df['ingestion_time_utc'] = pd.to_datetime(manifest['ingestion_time_utc'])
+    df = df[SILVER_COLS].sort_values(['time_utc', 'event_id'])
+    return df.sort_values(['event_id', 'updated_utc']).drop_duplicates('event_id', keep='last')
+
+
+def _measure(fn, features):
+    tracemalloc.start()
+    start = time.perf_counter()
+    out = fn(features, MANIFEST)
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return out, elapsed, peak / 2**20
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--features", type=int, nargs="+", default=[1000, 10000, 100000])
+    ap.add_argument("--skip-legacy-above", type=int, default=200_000,
+                    help="legacy path takes minutes past this size")
+    args = ap.parse_args()
+
+    for n in args.features:
+        features = synthetic_feed(n)["features"]
+        new, t_new, m_new = _measure(build_silver_frame, features)
+        line = f"features={n:>8d}  vectorized={t_new:8.3f}s peak={m_new:8.1f}MiB"
+        if n <= args.skip_legacy_above:
+            old, t_old, m_old = _measure(legacy_silver_frame, features)
+            pd.testing.assert_frame_equal(old, new)
+            line += f"  legacy={t_old:8.3f}s peak={m_old:8.1f}MiB  speedup={t_old / t_new:6.1f}x  identical"
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+# Synthetic USGS-style GeoJSON feeds for benchmarks.
+#
+# Same shape as https://earthquake.usgs.gov/earthquakes/feed/v1.0/summary/*.geojson: full property set,
+# Gutenberg-Richter magnitudes, events clustered on a few seismic zones (plus background), mostly
+# shallow depths with a deep subduction tail. `dup_rate` adds exact repeats of existing events and
+# `update_rate` adds revised versions (newer `updated`, tweaked magnitude) — what the dedup has to absorb.
+#
+#   python -m benchmarks.feedgen --events 10000 --dup-rate 0.02 --update-rate 0.1 -o feed.geojson
+import argparse
+import copy
+import json
+
+import numpy as np
+
+# (lat, lon, spread_deg, weight, network, region)
+ZONES = [
+    (36.0, -118.0, 1.8, 0.22, "ci", "CA"),
+    (38.5, -122.5, 1.0, 0.10, "nc", "CA"),
+    (61.0, -150.0, 3.0, 0.16, "ak", "Alaska"),
+    (19.4, -155.3, 0.4, 0.06, "hv", "Hawaii"),
+    (18.0, -66.5, 0.6, 0.05, "pr", "Puerto Rico"),
+    (39.0, -117.0, 1.5, 0.05, "nn", "Nevada"),
+    (46.5, -122.0, 1.2, 0.03, "uw", "Washington"),
+    (36.0, 140.0, 3.0, 0.06, "us", "Japan"),
+    (-3.0, 120.0, 6.0, 0.06, "us", "Indonesia"),
+    (-25.0, -70.0, 5.0, 0.05, "us", "Chile"),
+    (38.0, 25.0, 3.0, 0.03, "us", "Greece"),
+    (-20.0, -175.0, 3.0, 0.03, "us", "Tonga"),
+]
+BACKGROUND = 0.10  # share of events spread uniformly
+DIRECTIONS = ["N", "NNE", "NE", "ENE", "E", "ESE", "SE", "SSE", "S", "SSW", "SW", "WSW", "W", "WNW", "NW", "NNW"]
+MAG_TYPES = ["ml", "md", "mb", "mww"]
+
+
+def _magnitudes(rng, mc, b: float = 1.0):
+    # Gutenberg-Richter: exponential above the completeness magnitude (per event: dense regional networks
+    # record much smaller events than the global one)
+    n = len(mc)
+    mag = mc + rng.exponential(1 / (b * np.log(10)), n)
+    mag = np.minimum(mag, 9.5).round(2)
+    return np.where(rng.random(n) < 0.005, np.nan, mag)  # a few events without magnitude
+
+
+def _locations(rng, n):
+    weights = np.array([z[3] for z in ZONES])
+    zone = rng.choice(len(ZONES), n, p=weights / weights.sum())
+    zone = np.where(rng.random(n) < BACKGROUND, -1, zone)
+    center = np.array([(z[0], z[1], z[2]) for z in ZONES])[np.maximum(zone, 0)]
+    lat = rng.normal(center[:, 0], center[:, 2])
+    lon = rng.normal(center[:, 1], center[:, 2])
+    bg = zone < 0
+    lat[bg] = np.degrees(np.arcsin(rng.uniform(-1, 1, bg.sum())))  # uniform on the sphere
+    lon[bg] = rng.uniform(-180, 180, bg.sum())
+    lat = np.clip(lat, -89.9, 89.9)
+    lon = (lon + 180) % 360 - 180
+    return zone, lat.round(4), lon.round(4)
+
+
+def _depths(rng, n):
+    depth = rng.gamma(1.5, 6.0, n) - 1.0  # shallow crustal, a few slightly above sea level
+    deep = rng.random(n) < 0.08
+    depth[deep] = rng.uniform(70, 650, deep.sum())
+    return depth.round(2)
+
+
+def _feature(eid, net, mag, mag_type, place, t, updated, lon, lat, depth, status, sig):
+    return {
+        "type": "Feature",
+        "properties": {
+            "mag": None if mag != mag else float(mag),
+            "place": place,
+            "time": int(t),
+            "updated": int(updated),
+            "tz": None,
+            "url": f"https://earthquake.usgs.gov/earthquakes/eventpage/{eid}",
+            "detail": f"https://earthquake.usgs.gov/earthquakes/feed/v1.0/detail/{eid}.geojson",
+            "felt": None, "cdi": None, "mmi": None, "alert": None,
+            "status": status,
+            "tsunami": 0,
+            "sig": int(sig),
+            "net": net,
+            "code": eid[len(net):],
+            "ids": f",{eid},",
+            "sources": f",{net},",
+            "types": ",origin,phase-data,",
+            "nst": None, "dmin": None, "rms": 0.12, "gap": None,
+            "magType": mag_type,
+            "type": "earthquake",
+            "title": f"M {0.0 if mag != mag else mag} - {place}",
+        },
+        "geometry": {"type": "Point", "coordinates": [float(lon), float(lat), float(depth)]},
+        "id": eid,
+    }
+
+
+def synthetic_feed(n: int, seed: int = 0, start_ms: int = 1_760_000_000_000, span_hours: float = 24 * 30,
+                   dup_rate: float = 0.0, update_rate: float = 0.0) -> dict:
+    """n distinct events over `span_hours` from start_ms, plus n*dup_rate repeats and n*update_rate revisions."""
+    rng = np.random.default_rng(seed)
+    time_ms = np.sort(start_ms + rng.integers(0, int(span_hours * 3_600_000), n))
+    updated_ms = time_ms + rng.integers(60_000, 3_600_000, n)
+    zone, lat, lon = _locations(rng, n)
+    global_net = np.array([ZONES[z][4] == "us" if z >= 0 else True for z in zone], dtype=bool)
+    mag = _magnitudes(rng, np.where(global_net, 2.5, 0.8))
+    depth = _depths(rng, n)
+    km = rng.integers(1, 120, n)
+    heading = rng.integers(0, len(DIRECTIONS), n)
+    reviewed = rng.random(n) < 0.3
+    sig = np.nan_to_num(np.clip(mag, 0, None) ** 2 * 10).round()
+
+    features = []
+    for i in range(n):
+        z = zone[i]
+        net, region = (ZONES[z][4], ZONES[z][5]) if z >= 0 else ("us", "Ocean Region")
+        eid = f"{net}{7000000 + i:08d}"
+        place = f"{km[i]} km {DIRECTIONS[heading[i]]} of Synth {z + 1}, {region}"
+        mag_type = MAG_TYPES[0 if mag[i] < 3 else 2 if mag[i] < 5 else 3] if net == "us" else "ml"
+        features.append(_feature(eid, net, mag[i], mag_type, place, time_ms[i], updated_ms[i],
+                                 lon[i], lat[i], depth[i], "reviewed" if reviewed[i] else "automatic", sig[i]))
+
+    # exact repeats (same id, same content) and revisions (same id, newer `updated`, revised magnitude)
+    extra = []
+    for i in (rng.integers(0, n, int(n * dup_rate)) if n else []):
+        extra.append(copy.deepcopy(features[i]))
+    for i in (rng.integers(0, n, int(n * update_rate)) if n else []):
+        f = copy.deepcopy(features[i])
+        f["properties"]["updated"] += int(rng.integers(60_000, 86_400_000))
+        if f["properties"]["mag"] is not None:
+            f["properties"]["mag"] = round(f["properties"]["mag"] + float(rng.normal(0, 0.1)), 2)
+        f["properties"]["status"] = "reviewed"
+        extra.append(f)
+    if extra:
+        features = features + extra
+        order = rng.permutation(len(features))
+        features = [features[i] for i in order]
+
+    generated = int(start_ms + span_hours * 3_600_000)
+    return {
+        "type": "FeatureCollection",
+        "metadata": {
+            "generated": generated,
+            "url": "https://earthquake.usgs.gov/earthquakes/feed/v1.0/summary/all_month.geojson",
+            "title": "Synthetic USGS feed",
+            "status": 200,
+            "api": "1.10.3",
+            "count": len(features),
+        },
+        "features": features,
+        "bbox": [float(lon.min()), float(lat.min()), float(depth.min()),
+                 float(lon.max()), float(lat.max()), float(depth.max())] if n else None,
+    }
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Write a synthetic USGS-style GeoJSON feed.")
+    ap.add_argument("--events", type=int, default=10_000)
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--span-hours", type=float, default=24 * 30)
+    ap.add_argument("--dup-rate", type=float, default=0.0)
+    ap.add_argument("--update-rate", type=float, default=0.0)
+    ap.add_argument("-o", "--output", default="-")
+    args = ap.parse_args()
+    feed = synthetic_feed(args.events, args.seed, span_hours=args.span_hours,
+                          dup_rate=args.dup_rate, update_rate=args.update_rate)
+    body = json.dumps(feed)
+    if args.output == "-":
+        print(body)
+    else:
+        with open(args.output, "w") as f:
+            f.write(body)
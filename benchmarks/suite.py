@@ -0,0 +1,397 @@
+# Benchmark suite with stored baselines and a regression check.
+#
+#   python -m benchmarks.suite                       # run everything, compare with benchmarks/baselines.json
+#   python -m benchmarks.suite --only transform api  # a subset
+#   python -m benchmarks.suite --update-baseline     # record the current numbers as the new baseline
+#
+# Every case runs on the same seeded synthetic USGS feed (benchmarks/feedgen.py), in --processes fresh
+# interpreters. In each one a metric runs after one warm-up at least --repeat times and for at least
+# --min-time seconds and keeps its fastest run (noise only ever adds time); the gate compares the median of
+# those per-process minimums, so one process on a slow (or lucky) stretch of a shared machine doesn't decide.
+# A metric regresses when it is slower than baseline * (1 + threshold), with per-metric thresholds
+# (THRESHOLDS) for the ones that are noisy by nature, and only if that still holds after --confirm re-runs of
+# the flagged cases. The IQR column is the run-to-run spread inside a process.
+# The API case serves the synthetic silver lake in-process (READ_BACKEND=silver) so it needs no database;
+# the load case needs DATABASE pointing at a scratch Postgres with the migrations applied and is skipped
+# otherwise. Baselines are machine-specific: refresh them when the benchmark machine changes.
+# The startup case only times cold starts; the import check and the absolute budget are in tests/test_startup.py.
+import argparse
+import gzip
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), "baselines.json")
+CASES = ["transform", "load", "api", "dashboard", "compact", "sources", "startup"]
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# allowed slowdowns over --threshold: subprocess cold starts and sub-5 ms metrics swing with machine load
+THRESHOLDS = {
+    "startup.import_cli": 0.5,
+    "startup.fetch_dry_run": 0.5,
+    "dashboard.add_map_style_5k": 0.4,
+    "api.recent_100": 0.4,
+}
+
+EVENTS = 20_000
+DUP_RATE, UPDATE_RATE = 0.02, 0.10
+SPAN_HOURS = 24 * 7
+
+
+class Skip(Exception):
+    pass
+
+
+def _feed():
+    from benchmarks.feedgen import synthetic_feed
+
+    # ends "now" so that the API windows (hours back from now) hit the data
+    start_ms = int(time.time() * 1000) - SPAN_HOURS * 3_600_000
+    return synthetic_feed(EVENTS, seed=42, start_ms=start_ms, span_hours=SPAN_HOURS,
+                          dup_rate=DUP_RATE, update_rate=UPDATE_RATE)
+
+
+def _manifest(feed):
+    now = datetime.now(timezone.utc)
+    return {"run_id": now.strftime("%Y%m%dT%H%M%SZ"), "ingestion_time_utc": now.strftime("%Y-%m-%dT%H:%M:%SZ"),
+            "records": len(feed["features"]), "bbox": feed["bbox"], "file": "feed.geojson.gz", "skipped": False}
+
+
+# -------------------------
+# Cases: each returns {metric: callable}; ctx carries shared fixtures
+# -------------------------
+def case_transform(ctx):
+    from ingest.partitions import write_partitions
+    from ingest.transform import build_silver_frame, read_bronze
+
+    features, manifest = ctx["feed"]["features"], ctx["manifest"]
+    bronze = os.path.join(ctx["tmp"], "bronze")
+    os.makedirs(bronze, exist_ok=True)
+    with gzip.open(os.path.join(bronze, manifest["file"]), "wt") as f:
+        json.dump(ctx["feed"], f)
+    with open(os.path.join(bronze, "_manifest.json"), "w") as f:
+        json.dump(manifest, f)
+    df = build_silver_frame(features, manifest)
+    # the lake the api case reads
+    write_partitions(df, base=ctx["earthquakes_base"])
+    scratch = os.path.join(ctx["tmp"], "scratch")
+
+    return {
+        "read_bronze": lambda: read_bronze(bronze),
+        "build_silver_frame": lambda: build_silver_frame(features, manifest),
+        "write_partitions": lambda: write_partitions(df, base=f"{scratch}/{time.perf_counter_ns()}"),
+    }
+
+
+def case_load(ctx):
+    if not os.getenv("DATABASE"):
+        raise Skip("DATABASE not set")
+    import pandas as pd
+    import pyarrow as pa
+    from sqlalchemy import text
+
+    from ingest import load_postgres
+    from ingest.transform import build_silver_frame
+
+    df = build_silver_frame(ctx["feed"]["features"], ctx["manifest"])
+    df["event_id"] = "bench-" + df["event_id"]
+    table = pa.Table.from_pandas(df, preserve_index=False)
+
+    def cleanup():
+        with load_postgres.engine.begin() as conn:
+            hours = conn.execute(text(
+                "SELECT array_agg(DISTINCT eq_hour(time_utc)) FROM earthquakes WHERE event_id LIKE 'bench-%'"
+            )).scalar() or []
+            conn.execute(text("DELETE FROM earthquakes WHERE event_id LIKE 'bench-%'"))
+            conn.execute(text("SELECT eq_refresh_rollups(CAST(:h AS timestamptz[]))"), {"h": hours})
+
+    def insert():
+        cleanup()
+        load_postgres.upsert_earthquakes(table, "bench")
+
+    bumps = iter(range(1, 1 << 30))
+
+    def update():
+        # every event re-published with a newer version
+        newer = df.assign(updated_utc=df["updated_utc"] + pd.Timedelta(seconds=next(bumps)))
+        load_postgres.upsert_earthquakes(pa.Table.from_pandas(newer, preserve_index=False), "bench")
+
+    ctx["cleanup"].append(cleanup)
+    return {
+        "upsert_insert": insert,
+        "upsert_update": update,
+        # the common case: overlapping feeds re-sending versions already stored
+        "upsert_unchanged": lambda: load_postgres.upsert_earthquakes(table, "bench"),
+    }
+
+
+def case_api(ctx):
+    os.environ["READ_BACKEND"] = "silver"
+    os.environ["SILVER_BASE"] = ctx["silver_base"]
+    # timing the handlers, not the per-key limiter (when API_KEY is set)
+    os.environ.setdefault("RATE_LIMIT_RPS", "0")
+    os.environ.setdefault("RATE_LIMIT_CONCURRENCY", "0")
+    from fastapi.testclient import TestClient
+
+    from api.main import app
+
+    client = TestClient(app)
+    headers = {"X-API-Key": os.getenv("API_KEY", "")}
+
+    def get(url, **kw):
+        r = client.get(url, headers={**headers, **kw.pop("headers", {})}, **kw)
+        r.raise_for_status()
+        return r.content
+
+    get("/earthquakes/recent")  # builds the hot table
+    return {
+        "recent_100": lambda: get("/earthquakes/recent?hours=24&limit=100"),
+        "recent_stream_week": lambda: get(f"/earthquakes/recent/stream?hours={SPAN_HOURS}"),
+        "around_300km": lambda: get("/earthquakes/around?lat=36&lon=-118&radius_km=300&hours=72"),
+        "export_arrow_week": lambda: get(f"/earthquakes/export?hours={SPAN_HOURS}",
+                                         headers={"Accept": "application/vnd.apache.arrow.stream"}),
+    }
+
+
+def case_dashboard(ctx):
+    from dashboard.prep import EVENT_COLS, add_grid_style, add_map_style, merge_events, to_dataframe, window
+    from ingest.transform import build_silver_frame
+
+    df = build_silver_frame(ctx["feed"]["features"], ctx["manifest"]).head(5000)
+    df["run_id"] = ctx["manifest"]["run_id"]
+    # what the dashboard gets back from /recent: JSON rows
+    items = json.loads(df[EVENT_COLS].to_json(orient="records", date_format="iso"))
+    frame = to_dataframe(items)
+    # what /grid returns: one row per cell centre
+    cells = frame[["lat", "lon"]].round().assign(mag_max=frame["mag"])
+    # a rerun over the widest (168 h) window: fold a few newly loaded rows into the session frame
+    state = add_map_style(to_dataframe(items[:500]))
+    delta = items[500:520]
+
+    def rerun():
+        window(merge_events(state, add_map_style(to_dataframe(delta)), SPAN_HOURS, 500), SPAN_HOURS, 500)
+
+    return {
+        "to_dataframe_5k": lambda: to_dataframe(items),
+        "add_map_style_5k": lambda: add_map_style(frame.copy()),
+        "add_grid_style_5k": lambda: add_grid_style(cells.copy(), 1.0),
+        "rerun_sync_168h": rerun,
+    }
+
+
+def case_compact(ctx):
+    import shutil
+    from datetime import timedelta
+
+    from benchmarks.feedgen import synthetic_feed
+    from ingest import compact
+    from ingest.partitions import write_partitions
+    from ingest.transform import build_silver_frame
+
+    # four months of history: one tiny file per day, then the closed months compacted
+    span = 24 * 120
+    start_ms = int(time.time() * 1000) - span * 3_600_000
+    feed = synthetic_feed(EVENTS * 2, seed=7, start_ms=start_ms, span_hours=span,
+                          dup_rate=DUP_RATE, update_rate=UPDATE_RATE)
+    daily, compacted = f"{ctx['tmp']}/lake_daily", f"{ctx['tmp']}/lake_compacted"
+    write_partitions(build_silver_frame(feed["features"], ctx["manifest"]), base=daily)
+    shutil.copytree(daily, compacted)
+    compact.compact_earthquakes(compacted, min_age_days=0)
+    # a week of California inside the compacted range
+    end = datetime.now(timezone.utc).replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    probe = compact.probe_filter(end - timedelta(days=7), end, (-125, 32, -114, 42))
+    return {
+        "scan_full_daily": lambda: compact.scan(daily),
+        "scan_full_compacted": lambda: compact.scan(compacted),
+        "scan_probe_daily": lambda: compact.scan(daily, probe),
+        "scan_probe_compacted": lambda: compact.scan(compacted, probe),
+    }
+
+
+def case_sources(ctx):
+    from benchmarks import bench_sources
+
+    # four stub providers answering after 0.1-0.4 s: sequential ~ the sum, concurrent ~ the slowest
+    stubs = bench_sources.stub_sources([0.1, 0.2, 0.3, 0.4], 2000, f"{ctx['tmp']}/bronze_sources")
+    sources = stubs.__enter__()
+    ctx["cleanup"].append(lambda: stubs.__exit__(None, None, None))
+    return {
+        "fetch_sequential_4": lambda: bench_sources.fetch_sequential(sources),
+        "fetch_concurrent_4": lambda: bench_sources.fetch_concurrent(sources),
+    }
+
+
+def case_startup(ctx):
+    def python(*args):
+        return lambda: subprocess.run([sys.executable, *args], cwd=ROOT, stdout=subprocess.DEVNULL, check=True)
+
+    return {
+        "import_cli": python("-c", "import ingest.cli"),
+        "fetch_dry_run": python("-m", "ingest.cli", "fetch", "--dry-run"),
+    }
+
+
+CASE_FUNCS = {"transform": case_transform, "load": case_load, "api": case_api, "dashboard": case_dashboard,
+              "compact": case_compact, "sources": case_sources, "startup": case_startup}
+
+
+def measure(fn, repeat: int, min_time: float) -> dict:
+    fn()  # warm-up
+    times = []
+    start = time.perf_counter()
+    while len(times) < repeat or time.perf_counter() - start < min_time:
+        t0 = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - t0)
+    q1, median, q3 = statistics.quantiles(times, n=4, method="inclusive")
+    return {"min": min(times), "median": median, "iqr": q3 - q1, "runs": len(times)}
+
+
+def run_case(case: str, repeat: int, min_time: float):
+    """One case in this process: ({metric: stats}, skip reason or None)."""
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        ctx = {"tmp": tmp, "silver_base": f"{tmp}/silver", "earthquakes_base": f"{tmp}/silver/earthquakes",
+               "cleanup": []}
+        ctx["feed"] = _feed()
+        ctx["manifest"] = _manifest(ctx["feed"])
+        # the api case reads the lake written by the transform case
+        if case == "api":
+            CASE_FUNCS["transform"](ctx)
+        try:
+            try:
+                metrics = CASE_FUNCS[case](ctx)
+            except Skip as e:
+                return {}, str(e)
+            for name, fn in metrics.items():
+                results[f"{case}.{name}"] = measure(fn, repeat, min_time)
+        finally:
+            for cleanup in ctx["cleanup"]:
+                cleanup()
+    return results, None
+
+
+def run(cases, repeat: int, min_time: float, processes: int):
+    """{metric: [stats per process]}: every case runs in `processes` fresh interpreters.
+
+    A metric then doesn't depend on which cases ran before it (allocator and import state), --only measures
+    the same thing as a full run, and a whole process landing on a slow or fast stretch of a shared machine
+    is outvoted by the others.
+    """
+    samples, skipped = {}, {}
+    for case in cases:
+        for _ in range(processes):
+            with tempfile.NamedTemporaryFile("r", suffix=".json") as out:
+                subprocess.run([sys.executable, "-m", "benchmarks.suite", "--worker", case, "--worker-out", out.name,
+                                "--repeat", str(repeat), "--min-time", str(min_time)], cwd=ROOT, check=True)
+                done = json.load(out)
+            for name, stats in done["results"].items():
+                samples.setdefault(name, []).append(stats)
+            if done["skipped"]:
+                skipped[case] = done["skipped"]
+                break
+    return samples, skipped
+
+
+def summarize(samples) -> dict:
+    # min: median over processes of each one's fastest run; iqr/median: the typical process
+    return {name: {"min": statistics.median(p["min"] for p in procs),
+                   "median": statistics.median(p["median"] for p in procs),
+                   "iqr": statistics.median(p["iqr"] for p in procs),
+                   "runs": sum(p["runs"] for p in procs)}
+            for name, procs in samples.items()}
+
+
+def allowed(name: str, threshold: float) -> float:
+    return THRESHOLDS.get(name, threshold)
+
+
+def compare(results, baseline, threshold: float):
+    regressions = []
+    print(f"{'metric':34s} {'min':>10s} {'baseline':>10s} {'ratio':>7s} {'allowed':>8s} {'iqr':>6s} {'runs':>5s}")
+    for name, stats in results.items():
+        value, base = stats["min"], baseline.get(name)
+        spread = f"{stats['iqr'] / stats['median']:6.0%}" if stats["median"] else f"{'-':>6s}"
+        if base is None:
+            print(f"{name:34s} {value * 1000:8.1f}ms {'-':>10s} {'new':>7s} {'-':>8s} {spread} {stats['runs']:5d}")
+            continue
+        limit = allowed(name, threshold)
+        ratio = value / base if base else float("inf")
+        flag = "  REGRESSION" if ratio > 1 + limit else ""
+        print(f"{name:34s} {value * 1000:8.1f}ms {base * 1000:8.1f}ms {ratio:6.2f}x {limit:+7.0%} {spread} "
+              f"{stats['runs']:5d}{flag}")
+        if flag:
+            regressions.append(name)
+    return regressions
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Benchmark suite with baseline regression check.")
+    ap.add_argument("--only", nargs="+", choices=CASES, default=CASES)
+    ap.add_argument("--repeat", type=int, default=5, help="minimum runs per metric and process")
+    ap.add_argument("--min-time", type=float, default=0.5, help="minimum seconds per metric and process")
+    ap.add_argument("--processes", type=int, default=3, help="fresh interpreters per case")
+    ap.add_argument("--threshold", type=float, default=0.25,
+                    help="allowed slowdown of the min vs baseline (0.25 = +25%%), unless THRESHOLDS has one")
+    ap.add_argument("--baseline", default=BASELINE_PATH)
+    ap.add_argument("--update-baseline", action="store_true")
+    ap.add_argument("--confirm", type=int, default=1,
+                    help="re-run the cases of flagged metrics this many times (more processes in the median)")
+    ap.add_argument("--worker", choices=CASES, help=argparse.SUPPRESS)
+    ap.add_argument("--worker-out", help=argparse.SUPPRESS)
+    args = ap.parse_args()
+
+    if args.worker:
+        results, skipped = run_case(args.worker, args.repeat, args.min_time)
+        with open(args.worker_out, "w") as f:
+            json.dump({"results": results, "skipped": skipped}, f)
+        return
+
+    samples, skipped = run(args.only, args.repeat, args.min_time, args.processes)
+    results = summarize(samples)
+    for case, reason in skipped.items():
+        print(f"skipped {case}: {reason}")
+
+    stored = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            stored = json.load(f)
+    baseline = stored.get("results", {})
+    for _ in range(0 if args.update_baseline else args.confirm):
+        # a slowdown that doesn't reproduce in a fresh process is noise (another tenant, CPU clock)
+        flagged = [name for name, stats in results.items()
+                   if name in baseline and stats["min"] > baseline[name] * (1 + allowed(name, args.threshold))]
+        if not flagged:
+            break
+        cases = sorted({name.split(".")[0] for name in flagged}, key=CASES.index)
+        print(f"re-running {', '.join(cases)} to confirm {', '.join(flagged)}")
+        for name, procs in run(cases, args.repeat, args.min_time, args.processes)[0].items():
+            samples[name] += procs
+        results = summarize(samples)
+    regressions = compare(results, baseline, args.threshold)
+
+    if args.update_baseline:
+        stored = {
+            "meta": {"recorded_utc": datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ"),
+                     "python": platform.python_version(), "machine": platform.machine(),
+                     "events": EVENTS, "repeat": args.repeat, "min_time": args.min_time,
+                     "processes": args.processes, "stat": "median of per-process min"},
+            "results": {**stored.get("results", {}), **{k: round(v["min"], 6) for k, v in results.items()}},
+        }
+        with open(args.baseline, "w") as f:
+            json.dump(stored, f, indent=2, sort_keys=True)
+            f.write("\n")
+        print(f"baseline written to {args.baseline}")
+    elif regressions:
+        print(f"{len(regressions)} regression(s) over +{args.threshold:.0%}: {', '.join(regressions)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
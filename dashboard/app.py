@@ -9,6 +9,10 @@ import pydeck as pdk
 from dotenv import load_dotenv
 load_dotenv()
 
+from live import LiveFeed
+from prep import (GRID_STYLE_COLS, LAYER_COLS, STYLE_COLS, add_grid_style, add_map_style, merge_events, to_dataframe,
+                  watermark, window)
+
 st.set_page_config(page_title="Earthquake Monitor (API-driven)", layout="wide")
 
 # ------------------------
@@ -26,7 +30,8 @@ DEFAULT_API_BASE = os.getenv("API_BASE_URL", "https://earthquake-ce5c9a0f9ec7.he
 st.sidebar.title("⚙️ Settings")
 api_base = st.sidebar.text_input("API Base URL", value=DEFAULT_API_BASE, help=f"FastAPI base URL {DEFAULT_API_BASE}")
 
-mode = st.sidebar.radio("Query Mode", ["Recent", "Around"])
+mode = st.sidebar.radio("Query Mode", ["Recent", "Around", "Grid"],
+                        help="Grid: server-side aggregated cells, no row limit")
 
 layer_style = st.sidebar.selectbox(
     "Map layer style",
@@ -38,9 +43,12 @@ highlight_biggest = st.sidebar.checkbox("Highlight biggest quake", value=True)
 add_heatmap = st.sidebar.checkbox("Add heatmap overlay", value=False)
 
 st.sidebar.markdown("---")
-hours = st.sidebar.number_input("Hours window", min_value=1, max_value=168, value=24, step=1)
+hours = st.sidebar.number_input("Hours window", min_value=1, max_value=8760 if mode == "Grid" else 168,
+                                value=24, step=1)
 min_mag = st.sidebar.number_input("Min magnitude", min_value=0.0, max_value=10.0, value=0.0, step=0.1, format="%.1f")
 limit = st.sidebar.number_input("Limit", min_value=1, max_value=500, value=200, step=10)
+live = mode != "Grid" and st.sidebar.checkbox("Live updates", value=True,
+                                               help="Subscribe to /earthquakes/stream instead of re-polling")
 
 if mode == "Around":
     st.sidebar.markdown("---")
@@ -49,37 +57,78 @@ if mode == "Around":
     lon = st.sidebar.number_input("Longitude", value=-118.25, format="%.6f")
     radius_km = st.sidebar.number_input("Radius (km)", min_value=1.0, max_value=1000.0, value=300.0, step=10.0, format="%.1f")
 
+if mode == "Grid":
+    st.sidebar.markdown("---")
+    st.sidebar.caption("Aggregated cells (count / max mag / mean depth per cell)")
+    grid_zoom = st.sidebar.slider("Grid zoom", min_value=0, max_value=8, value=3,
+                                  help="Cell size halves with each level (zoom 3 ≈ 5.6°)")
+
 # ------------------------
 # Helpers
 # ------------------------
+SYNC_SECONDS = 30  # without the live stream: how often a rerun asks the API for new rows
+
+def fetch_events(url: str, params: dict):
+    # incremental requests (`since`) follow X-Next-Cursor so a burst of changes is never cut at `limit`
+    items = []
+    while True:
+        r = requests.get(url, params=params, headers=HEADERS, timeout=30)
+        r.raise_for_status()
+        items += r.json()
+        cursor = r.headers.get("X-Next-Cursor")
+        if not cursor or "since" not in params:
+            return items
+        params = {**params, "cursor": cursor}
+
+def synced_events(endpoint: str, filters: dict, hours: int, limit: int, feed=None):
+    """Session copy of the window: downloaded once, then only rows loaded after its newest ingestion_time_utc.
+
+    Narrower windows / lower limits are cut locally; a wider window, a higher limit or other filters refetch.
+    """
+    url = f"{api_base}/earthquakes/{endpoint}"
+    key = (api_base, endpoint, tuple(sorted(filters.items())))
+    state = st.session_state.get("sync")
+    version = feed.version if feed is not None else None
+    if state is None or state["key"] != key or hours > state["hours"] or limit > state["limit"]:
+        df = add_map_style(to_dataframe(fetch_events(url, {**filters, "hours": hours, "limit": limit})))
+        state = {"key": key, "hours": hours, "limit": limit, "df": df, "checked": time.monotonic(), "version": version}
+        st.session_state.sync = state
+        return window(df, hours, limit)
+
+    # live: only after the stream pushed a batch; otherwise at most every SYNC_SECONDS
+    due = version != state["version"] if feed is not None else time.monotonic() - state["checked"] >= SYNC_SECONDS
+    if due:
+        params = {**filters, "hours": state["hours"], "limit": state["limit"]}
+        since = watermark(state["df"])
+        if since:
+            params["since"] = since
+        delta = fetch_events(url, params)
+        state["checked"], state["version"] = time.monotonic(), version
+        if delta:
+            delta = add_map_style(to_dataframe(delta))
+            state["df"] = merge_events(state["df"], delta, state["hours"], state["limit"])
+    return window(state["df"], hours, limit)
+
 @st.cache_data(show_spinner=False, ttl=30)
-def fetch_recent(api_base: str, hours: int, min_mag: float, limit: int):
-    url = f"{api_base}/earthquakes/recent"
-    params = dict(hours=hours, min_mag=min_mag, limit=limit)
-    
-    r = requests.get(url, params=params, headers=HEADERS, timeout=30)  
+def fetch_grid(api_base: str, zoom: int, hours: int, min_mag: float):
+    url = f"{api_base}/earthquakes/grid"
+    params = dict(zoom=zoom, hours=hours, min_mag=min_mag)
+
+    r = requests.get(url, params=params, headers=HEADERS, timeout=60)
     r.raise_for_status()
-    return r.json()
+    return r.json(), float(r.headers.get("X-Grid-Cell-Deg", 360.0 / 2 ** (zoom + 3)))
 
 @st.cache_data(show_spinner=False, ttl=30)
-def fetch_around(api_base: str, lat: float, lon: float, radius_km: float, hours: int, min_mag: float, limit: int):
-    url = f"{api_base}/earthquakes/around"
-    params = dict(lat=lat, lon=lon, radius_km=radius_km, hours=hours, min_mag=min_mag, limit=limit)
-    
-    r = requests.get(url, params=params, headers=HEADERS, timeout=30)  
+def fetch_summary(api_base: str, hours: int):
+    # window totals from the API's rollup tables, not capped by `limit`
+    r = requests.get(f"{api_base}/earthquakes/stats/summary", params=dict(hours=hours), headers=HEADERS, timeout=30)
     r.raise_for_status()
     return r.json()
 
-def to_dataframe(items):
-    if not items:
-        return pd.DataFrame(columns=["id","mag","place","time_utc","lat","lon","depth_km"])
-    df = pd.DataFrame(items)
-    for col in ["mag","lat","lon","depth_km"]:
-        if col in df.columns:
-            df[col] = pd.to_numeric(df[col], errors="coerce")
-    if "time_utc" in df.columns:
-        df["time_utc"] = pd.to_datetime(df["time_utc"], errors="coerce", utc=True)
-    return df
+@st.cache_resource(show_spinner=False)
+def live_feed(api_base: str):
+    # one SSE connection per Streamlit process, shared by every session
+    return LiveFeed(api_base, HEADERS)
 
 # ------------------------
 # UI/UX
@@ -92,16 +141,22 @@ with st.expander("About this dashboard", expanded=False):
     It consumes the existing **FastAPI** endpoints:
     - `GET /earthquakes/recent`
     - `GET /earthquakes/around`
+    - `GET /earthquakes/stats/summary`
+    - `GET /earthquakes/grid`
+    - `GET /earthquakes/stream` (live updates, Server-Sent Events)
     """)
     st.code(f"export API_BASE_URL={DEFAULT_API_BASE}", language="bash")
 
 # Fetch data
 try:
-    if mode == "Recent":
-        data = fetch_recent(api_base, hours, min_mag, limit)
+    feed = live_feed(api_base) if live else None
+    if mode == "Grid":
+        data, cell_deg = fetch_grid(api_base, grid_zoom, hours, min_mag)
+        df = pd.DataFrame(data, columns=["lat","lon","events","mag_max","depth_avg"])
+    elif mode == "Recent":
+        df = synced_events("recent", dict(min_mag=min_mag), hours, limit, feed)
     else:
-        data = fetch_around(api_base, lat, lon, radius_km, hours, min_mag, limit)
-    df = to_dataframe(data)
+        df = synced_events("around", dict(lat=lat, lon=lon, radius_km=radius_km, min_mag=min_mag), hours, limit, feed)
     status_ok = True
     error_msg = ""
 except Exception as e:
@@ -114,41 +169,75 @@ left, right = st.columns([1,3])
 
 with left:
     st.subheader("Summary")
-    st.metric("Events", len(df))
-    if len(df):
-        st.metric("Avg Magnitude", f"{df['mag'].mean():.2f}")
-        st.metric("Max Magnitude", f"{df['mag'].max():.2f}")
+    summary = None
+    if mode == "Recent" and min_mag == 0:
+        try:
+            summary = fetch_summary(api_base, hours)
+        except Exception:
+            summary = None
+    if mode == "Grid":
+        st.metric("Events", int(df["events"].sum()) if len(df) else 0)
+        st.metric("Cells", len(df))
+        if len(df):
+            st.metric("Max Magnitude", f"{df['mag_max'].max():.2f}")
+    elif summary is not None:
+        st.metric("Events", summary["events"])
+        if summary["events"]:
+            st.metric("Avg Magnitude", f"{summary['mag_avg'] or 0:.2f}")
+            st.metric("Max Magnitude", f"{summary['mag_max'] or 0:.2f}")
+    else:
+        st.metric("Events", len(df))
+        if len(df):
+            st.metric("Avg Magnitude", f"{df['mag'].mean():.2f}")
+            st.metric("Max Magnitude", f"{df['mag'].max():.2f}")
     if not status_ok:
         st.error(f"Failed to fetch data: {error_msg}")
 
 with right:
     st.subheader("Map")
-    if len(df) and {"lat","lon"}.issubset(df.columns):
+    if mode == "Grid" and len(df):
+        df = add_grid_style(df, cell_deg)
+        layers = [pdk.Layer(
+            "PolygonLayer",
+            data=df,
+            get_polygon="_polygon",
+            get_fill_color="[_r, _g, _b, _a]",
+            get_line_color=[255, 255, 255, 60],
+            line_width_min_pixels=1,
+            pickable=True,
+        )]
+        if add_heatmap:
+            layers.append(pdk.Layer(
+                "HeatmapLayer",
+                data=df.rename(columns={"lat":"latitude","lon":"longitude"}),
+                get_position='[longitude, latitude]',
+                get_weight="events",
+            ))
+        tooltip = {
+            "html": "<b>Events:</b> {events}<br/><b>Max mag:</b> {mag_max}<br/><b>Mean depth (km):</b> {depth_avg}",
+            "style": {"backgroundColor": "rgba(0,0,0,0.7)", "color": "white"}
+        }
+        st.pydeck_chart(pdk.Deck(layers=layers, initial_view_state=pdk.ViewState(latitude=20, longitude=0, zoom=1),
+                                 tooltip=tooltip))
+        df = df.drop(columns=list(GRID_STYLE_COLS))
+    elif len(df) and {"lat","lon"}.issubset(df.columns):
         mean_lat = float(df["lat"].mean())
         mean_lon = float(df["lon"].mean())
 
-        df["_size_m"] = df["mag"].fillna(0).apply(lambda m: 25000 + (m * 40000))
-        df["_elev"] = df["mag"].fillna(0).apply(lambda m: 500 + m * 1200)
-
-        def color_from_mag(m):
-            m = 0 if pd.isna(m) else float(m)
-            if m < 2:   return [80, 160, 255]
-            if m < 4:   return [255, 200, 80]
-            if m < 6:   return [255, 140, 60]
-            return [255, 70, 70]
-        df["_color"] = df["mag"].apply(color_from_mag)
+        # styled once when the rows arrived (synced_events); every layer shares this one frame
+        layer_df = df[LAYER_COLS]
 
         layers = []
 
         if layer_style == "Circles (recommended)":
             layers.append(pdk.Layer(
                 "ScatterplotLayer",
-                data=df.rename(columns={"lat":"latitude","lon":"longitude"}),
-                get_position='[longitude, latitude]',
+                data=layer_df,
+                get_position='[lon, lat]',
                 get_radius="_size_m",
                 pickable=True,
                 filled=True,
-                get_fill_color="_color",
+                get_fill_color="[_r, _g, _b]",
                 stroked=True,
                 get_line_color=[255, 255, 255],
                 line_width_min_pixels=1,
@@ -158,24 +247,24 @@ with right:
         else:
             layers.append(pdk.Layer(
                 "ColumnLayer",
-                data=df.rename(columns={"lat":"latitude","lon":"longitude"}),
-                get_position='[longitude, latitude]',
+                data=layer_df,
+                get_position='[lon, lat]',
                 get_elevation="_elev",
                 elevation_scale=1,
                 pickable=True,
                 auto_highlight=True,
-                get_fill_color="_color",
+                get_fill_color="[_r, _g, _b]",
                 radius=20000
             ))
 
         if highlight_biggest and len(df):
             imax = df["mag"].idxmax()
             if pd.notna(imax):
-                biggest = df.loc[[imax]].rename(columns={"lat":"latitude","lon":"longitude"}).copy()
+                biggest = layer_df.loc[[imax]]
                 layers.append(pdk.Layer(
                     "ScatterplotLayer",
                     data=biggest,
-                    get_position='[longitude, latitude]',
+                    get_position='[lon, lat]',
                     get_radius=biggest["_size_m"].iloc[0] * 1.4,
                     pickable=False,
                     filled=False,
@@ -188,8 +277,8 @@ with right:
         if add_heatmap and len(df):
             layers.append(pdk.Layer(
                 "HeatmapLayer",
-                data=df.rename(columns={"lat":"latitude","lon":"longitude"}),
-                get_position='[longitude, latitude]',
+                data=layer_df,
+                get_position='[lon, lat]',
                 get_weight="mag",
                 aggregation='MEAN'
             ))
@@ -205,7 +294,20 @@ with right:
     else:
         st.info("No data to plot. Try widening the time window or lowering the min magnitude.")
 
+if live:
+    feed = live_feed(api_base)
+    st.sidebar.caption("🟢 Live" if feed.connected else f"🔴 Stream disconnected {feed.error or ''}")
+
+    @st.fragment(run_every=2)
+    def _watch_stream():
+        # cheap local check; the page only reruns (and syncs with `since`) when the stream delivered something
+        state = st.session_state.get("sync")
+        if state is not None and feed.version != state["version"]:
+            st.rerun()
+
+    _watch_stream()
+
 st.subheader("Table")
-st.dataframe(df, use_container_width=True)
+st.dataframe(df.drop(columns=STYLE_COLS, errors="ignore"), use_container_width=True)
 
 st.caption("Data source: FastAPI service powered by PostgreSQL/PostGIS backend (queried via API only).")
@@ -0,0 +1,69 @@
+# Background subscription to the API's /earthquakes/stream (Server-Sent Events), kept free of streamlit.
+# app.py holds one LiveFeed per API base for the whole Streamlit process, so every open dashboard shares
+# a single connection; sessions compare `version` to know when to rerun and then sync with `since`.
+import json
+import threading
+import time
+
+import requests
+
+
+class LiveFeed:
+    """Counts batches pushed by the stream (`version`), reconnecting with Last-Event-ID."""
+
+    def __init__(self, api_base: str, headers: dict):
+        self.url = f"{api_base}/earthquakes/stream"
+        self.headers = dict(headers)
+        self.version = 0
+        self.events = 0
+        self.connected = False
+        self.error = None
+        self.last_event_id = None
+        self._lock = threading.Lock()
+        threading.Thread(target=self._run, daemon=True, name="live-feed").start()
+
+    def _run(self):
+        delay = 1.0
+        while True:
+            try:
+                self._consume()
+                delay = 1.0
+            except Exception as e:
+                self.error = str(e)
+            self.connected = False
+            time.sleep(delay)
+            delay = min(delay * 2, 60.0)
+
+    def _consume(self):
+        headers = {**self.headers, "Accept": "text/event-stream"}
+        if self.last_event_id:
+            headers["Last-Event-ID"] = self.last_event_id
+        # read timeout well above the server's keepalive interval
+        with requests.get(self.url, headers=headers, stream=True, timeout=(10, 60)) as r:
+            r.raise_for_status()
+            self.connected, self.error = True, None
+            event, event_id, data = None, None, []
+            for line in r.iter_lines(decode_unicode=True):
+                if line == "":
+                    # blank line: dispatch the event
+                    if event == "earthquakes" and data:
+                        self._apply(json.loads("\n".join(data)))
+                    if event_id:
+                        self.last_event_id = event_id
+                    if event == "lagged":
+                        return
+                    event, event_id, data = None, None, []
+                elif not line.startswith(":"):
+                    field, _, value = line.partition(":")
+                    value = value[1:] if value.startswith(" ") else value
+                    if field == "event":
+                        event = value
+                    elif field == "id":
+                        event_id = value
+                    elif field == "data":
+                        data.append(value)
+
+    def _apply(self, rows):
+        with self._lock:
+            self.events += len(rows)
+            self.version += 1
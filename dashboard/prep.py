@@ -0,0 +1,82 @@
+# dataframe prep for the map/table, kept free of streamlit so it can be benchmarked
+import numpy as np
+import pandas as pd
+
+EVENT_COLS = ["event_id", "mag", "place", "time_utc", "lat", "lon", "depth_km", "run_id", "ingestion_time_utc"]
+STYLE_COLS = ["_size_m", "_elev", "_r", "_g", "_b"]
+GRID_STYLE_COLS = ["_polygon", "_r", "_g", "_b", "_a"]
+# what the map layers need: one frame shared by every layer, colors read as "[_r, _g, _b]"
+LAYER_COLS = ["lon", "lat", "mag", "place", "time_utc"] + STYLE_COLS
+
+# magnitude bins: < 2, < 4, < 6, >= 6
+MAG_EDGES = [2, 4, 6]
+MAG_COLORS = np.array([[80, 160, 255], [255, 200, 80], [255, 140, 60], [255, 70, 70]])
+GRID_ALPHA = np.array([150, 160, 170, 180])
+
+
+def to_dataframe(items):
+    if not items:
+        return pd.DataFrame(columns=EVENT_COLS)
+    df = pd.DataFrame(items)
+    for col in ["mag","lat","lon","depth_km"]:
+        if col in df.columns:
+            df[col] = pd.to_numeric(df[col], errors="coerce")
+    for col in ["time_utc", "ingestion_time_utc"]:
+        if col in df.columns:
+            df[col] = pd.to_datetime(df[col], errors="coerce", utc=True, format="ISO8601")
+    return df
+
+
+def mag_colors(mag) -> np.ndarray:
+    # (n, 3) RGB per magnitude; missing magnitudes count as 0
+    m = np.nan_to_num(np.asarray(mag, dtype="float64"))
+    return MAG_COLORS[np.searchsorted(MAG_EDGES, m, side="right")]
+
+
+def add_map_style(df):
+    # point radius (m), column height and color per event, from magnitude (column-wise)
+    mag = np.nan_to_num(df["mag"].to_numpy(dtype="float64", na_value=np.nan))
+    df["_size_m"] = 25000 + mag * 40000
+    df["_elev"] = 500 + mag * 1200
+    rgb = mag_colors(mag)
+    df["_r"], df["_g"], df["_b"] = rgb[:, 0], rgb[:, 1], rgb[:, 2]
+    return df
+
+
+def add_grid_style(df, cell_deg: float):
+    # grid cells: one square polygon per (lat, lon) centre and a fill color from mag_max (column-wise)
+    half = cell_deg / 2
+    lon, lat = df["lon"].to_numpy(dtype="float64"), df["lat"].to_numpy(dtype="float64")
+    xs = np.stack([lon - half, lon + half, lon + half, lon - half], axis=1)
+    ys = np.stack([lat - half, lat - half, lat + half, lat + half], axis=1)
+    df["_polygon"] = np.stack([xs, ys], axis=2).tolist()
+    mag = np.nan_to_num(df["mag_max"].to_numpy(dtype="float64", na_value=np.nan))
+    bins = np.searchsorted(MAG_EDGES, mag, side="right")
+    df["_r"], df["_g"], df["_b"] = MAG_COLORS[bins, 0], MAG_COLORS[bins, 1], MAG_COLORS[bins, 2]
+    df["_a"] = GRID_ALPHA[bins]
+    return df
+
+
+def window(df, hours: int, limit: int):
+    """Rows of `df` inside the last `hours`, newest first, at most `limit`."""
+    cutoff = pd.Timestamp.now(tz="UTC") - pd.Timedelta(hours=hours)
+    df = df[df["time_utc"] >= cutoff]
+    return df.sort_values(["time_utc", "event_id"], ascending=False).head(limit)
+
+
+def merge_events(df, delta, hours: int, limit: int):
+    """Fold newly loaded rows into the session frame: newer versions replace older ones by event_id."""
+    if df.empty:
+        return window(delta, hours, limit)
+    if delta.empty:
+        return window(df, hours, limit)
+    merged = pd.concat([df, delta], ignore_index=True).drop_duplicates("event_id", keep="last")
+    return window(merged, hours, limit)
+
+
+def watermark(df):
+    """Newest ingestion_time_utc held, as the API's `since` param (None when empty)."""
+    if df.empty or "ingestion_time_utc" not in df.columns:
+        return None
+    newest = df["ingestion_time_utc"].max()
+    return None if pd.isna(newest) else newest.isoformat()
@@ -0,0 +1,203 @@
+# cli.py — `eqpipe`: one entry point for the pipeline stages (installed by pyproject.toml, or python -m ingest.cli)
+#
+#   eqpipe fetch --feed all_hour                 # or --source usgs:all_day fdsn:emsc=<url> (concurrent)
+#   eqpipe transform [--bronze <dir>]            # default: latest bronze run with a payload
+#   eqpipe load [--run-id <id>]                  # default: latest silver run
+#   eqpipe replay [--start ... --end ... --workers N --full --rebuild]
+#   eqpipe serve-check [--url http://localhost:8000]
+#   eqpipe <command> --dry-run                   # show what would run, without touching the network or database
+#
+# Cron containers run one short command per start, so importing this module only pulls in the standard
+# library: pandas/pyarrow/SQLAlchemy/httpx and the config-reading modules are imported by the command that
+# needs them, after .env is loaded, and nothing here does I/O at import time.
+import argparse
+import sys
+import time
+
+
+def _load_env():
+    try:
+        from dotenv import load_dotenv
+    except ImportError:
+        return
+    load_dotenv()
+
+
+def _flush(job: str, stage: str, start: float, success: bool = True):
+    from ingest import metrics
+    metrics.observe_stage(stage, time.perf_counter() - start)
+    metrics.flush(job, success=success)
+
+
+def cmd_fetch(args) -> int:
+    from ingest.sources import USGSFeed, from_spec
+
+    sources = [from_spec(s) for s in args.source] if args.source else [USGSFeed(args.feed)]
+    if args.dry_run:
+        for s in sources:
+            print(f"{s!r}: GET {s.url} -> {s.base}/{s.dir}/ (timeout {s.timeout}s, {s.retries} retries)")
+        return 0
+
+    start = time.perf_counter()
+    if len(sources) == 1:
+        from ingest.fecth_data import ingest_to_bronze
+        results = [(sources[0], ingest_to_bronze(source=sources[0]))]
+    else:
+        import asyncio
+
+        from ingest.multi_source import fetch_all
+        results = asyncio.run(fetch_all(sources))
+    failed = 0
+    for source, info in results:
+        if isinstance(info, Exception):
+            failed += 1
+            print(f"[{source.key}] failed: {info!r}")
+        elif info["skipped"]:
+            print(f"[{source.key}] {info['run_id']}: skipped ({info['skip_reason']})")
+        else:
+            print(f"[{source.key}] {info['run_id']}: {info['records']} records -> {info['base']}")
+    _flush("fetch", "fetch", start, success=not failed)
+    return 1 if failed else 0
+
+
+def cmd_transform(args) -> int:
+    from ingest.replay import latest_bronze
+
+    base = args.bronze or latest_bronze()
+    if args.dry_run:
+        print(f"would transform {base}")
+        return 0
+    from ingest.transform import transform_to_silver
+
+    start = time.perf_counter()
+    silver = transform_to_silver(base)
+    if silver is None:
+        print(f"no features in {base}")
+    else:
+        print(f"{silver['run_id']}: {silver['rows']} rows into {len(silver['partitions'])} partition(s)")
+    _flush("transform", "transform", start)
+    return 0
+
+
+def cmd_load(args) -> int:
+    from ingest.partitions import latest_run
+
+    if args.dry_run:
+        run = args.run_id or latest_run()[2]
+        print(f"would load run {run} into Postgres")
+        return 0
+    from ingest import sync
+
+    start = time.perf_counter()
+    ctx = {"run_id": args.run_id}
+    sync.stage_load(ctx)
+    _flush("load", "load", start)
+    return 0
+
+
+def cmd_replay(args) -> int:
+    from ingest import replay
+
+    bounded = bool(args.start or args.end)
+    after = None if (args.full or args.rebuild or bounded) else replay.read_watermark()
+    runs = replay.discover_runs(args.start, args.end, after)
+    if not runs:
+        print("Nothing to replay.")
+        return 0
+    if args.dry_run:
+        print(f"would replay {len(runs)} run(s): {runs[0]} .. {runs[-1]}")
+        return 0
+    if args.rebuild:
+        import shutil
+        shutil.rmtree(replay.EARTHQUAKES_BASE, ignore_errors=True)
+    totals = replay.replay(runs, workers=args.workers, chunk_size=args.chunk_size, checkpoint=not bounded)
+    print(f"Done: {totals['runs']} runs, {totals['rows']} rows, {len(totals['partitions'])} partitions.")
+    return 0
+
+
+def cmd_serve_check(args) -> int:
+    """Can this container serve the API? Builds the app, checks its backend, optionally probes a running one."""
+    if args.url:
+        import urllib.request
+        try:
+            with urllib.request.urlopen(f"{args.url.rstrip('/')}/health", timeout=args.timeout) as r:
+                print(f"{args.url}/health: {r.status} {r.read().decode()}")
+                return 0 if r.status == 200 else 1
+        except OSError as e:
+            print(f"{args.url}/health: {e}")
+            return 1
+    if args.dry_run:
+        print("would import api.main and check its read backend")
+        return 0
+
+    import os
+
+    start = time.perf_counter()
+    try:
+        from api.main import app
+    except RuntimeError as e:  # missing DATABASE and the like: api/db.py refuses to start
+        print(f"api.main: {e}")
+        return 1
+    from api import db
+    print(f"api.main imported in {time.perf_counter() - start:.2f}s: {len(app.openapi()['paths'])} paths, "
+          f"DB_MODE={db.DB_MODE}, READ_BACKEND={db.READ_BACKEND}")
+    ok = True
+    if db.READ_BACKEND == "silver":
+        from api import export
+        path = f"{export.SILVER_BASE}/earthquakes"
+        ok = os.path.isdir(path)
+        print(f"silver lake {path}: {'ok' if ok else 'missing'}")
+    if db.engine is not None:
+        from sqlalchemy import text
+        try:
+            with db.engine.connect() as conn:
+                conn.execute(text("SELECT 1"))
+            print("database: ok")
+        except Exception as e:
+            ok = False
+            print(f"database: {e}")
+    return 0 if ok else 1
+
+
+def build_parser() -> argparse.ArgumentParser:
+    ap = argparse.ArgumentParser(prog="eqpipe", description="Earthquake pipeline: fetch -> transform -> load.")
+    sub = ap.add_subparsers(dest="command", required=True)
+
+    def command(name, func, help):
+        p = sub.add_parser(name, help=help)
+        p.add_argument("--dry-run", action="store_true", help="show what would run and exit")
+        p.set_defaults(func=func)
+        return p
+
+    p = command("fetch", cmd_fetch, "download feeds into bronze")
+    p.add_argument("--feed", default="all_hour", choices=("all_hour", "all_day", "all_week", "all_month"))
+    p.add_argument("--source", nargs="+", help="usgs:<feed> or fdsn:<name>=<url>; several are fetched concurrently")
+
+    p = command("transform", cmd_transform, "bronze run -> silver")
+    p.add_argument("--bronze", help="bronze run dir (default: latest with a payload)")
+
+    p = command("load", cmd_load, "silver run -> Postgres")
+    p.add_argument("--run-id", help="silver run to load (default: latest)")
+
+    p = command("replay", cmd_replay, "replay bronze runs into silver")
+    p.add_argument("--start", help="first bronze date (YYYY-MM-DD)")
+    p.add_argument("--end", help="last bronze date (YYYY-MM-DD)")
+    p.add_argument("--workers", type=int, default=None)
+    p.add_argument("--chunk-size", type=int, default=64)
+    p.add_argument("--full", action="store_true", help="ignore the watermark")
+    p.add_argument("--rebuild", action="store_true", help="delete silver earthquakes first (implies --full)")
+
+    p = command("serve-check", cmd_serve_check, "check that the API can start (or probe a running one)")
+    p.add_argument("--url", help="probe <url>/health instead of importing the app")
+    p.add_argument("--timeout", type=float, default=5.0)
+    return ap
+
+
+def main(argv=None) -> int:
+    args = build_parser().parse_args(argv)
+    _load_env()
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,180 @@
+# compact.py — silver lake maintenance for closed months
+#
+#   python -m ingest.compact                  # compact months closed for COMPACT_MIN_AGE_DAYS, roll up run stats
+#   python -m ingest.compact --dry-run
+#   python -m ingest.compact --report         # time a full read and a time + bbox probe, before and after
+#
+# earthquakes: the day files of a closed month (date=YYYY-MM-DD/data.parquet) are merged into
+# month=YYYY-MM/part-NNNNN.parquet, sorted by time across files and Z-order clustered inside them
+# (see partitions.write_compacted). Late versions land next to the parts as delta files (write_partitions);
+# each run folds the deltas of every compacted month back into its parts.
+# run_stats: the per-run stats.parquet of a closed month become one run_stats/month=YYYY-MM/runs.parquet.
+# Run it outside of the ingest schedule: it rewrites partitions the transform also writes to.
+import argparse
+import glob
+import os
+import shutil
+import statistics
+import time
+from datetime import datetime, timedelta, timezone
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+from ingest import metrics
+from ingest.partitions import (EARTHQUAKES_BASE, SILVER_BASE, compacted_dir, lake_partitioning, merge_latest,
+                               partition_filter, read_month, write_compacted)
+
+COMPACT_MIN_AGE_DAYS = int(os.getenv("COMPACT_MIN_AGE_DAYS", "7"))
+RUN_STATS_BASE = f"{SILVER_BASE}/run_stats"
+SCAN_COLS = ["event_id", "mag", "place", "time_utc", "lat", "lon", "depth_km", "run_id", "ingestion_time_utc"]
+
+
+def closed_months(months, min_age_days: int = COMPACT_MIN_AGE_DAYS, now: datetime = None):
+    """Months (YYYY-MM) that ended at least `min_age_days` ago, sorted."""
+    open_from = ((now or datetime.now(timezone.utc)) - timedelta(days=min_age_days)).strftime("%Y-%m")
+    return sorted(m for m in set(months) if m < open_from)
+
+
+def _by_month(base: str):
+    # {YYYY-MM: [date=YYYY-MM-DD dirs]}
+    out = {}
+    for d in sorted(glob.glob(f"{base}/date=????-??-??")):
+        out.setdefault(d.rsplit("=", 1)[1][:7], []).append(d)
+    return out
+
+
+def _deltas(base: str):
+    # {YYYY-MM: number of delta files} of the compacted months
+    out = {}
+    for f in glob.glob(f"{base}/month=*/delta-*.parquet"):
+        month = os.path.basename(os.path.dirname(f)).split("=", 1)[1]
+        out[month] = out.get(month, 0) + 1
+    return out
+
+
+def compact_earthquakes(base: str = EARTHQUAKES_BASE, min_age_days: int = COMPACT_MIN_AGE_DAYS,
+                        dry_run: bool = False):
+    done = []
+    days, deltas = _by_month(base), _deltas(base)
+    for month in sorted(set(closed_months(days, min_age_days)) | set(deltas)):
+        files = [f"{d}/data.parquet" for d in days.get(month, []) if os.path.exists(f"{d}/data.parquet")]
+        path = compacted_dir(month, base)
+        if dry_run:
+            print(f"would compact {month}: {len(files)} day files, {deltas.get(month, 0)} delta files")
+            continue
+        # parts + deltas; a half-finished earlier run may also have left some of the month's days
+        frames = ([read_month(path)] if os.path.isdir(path) else []) + [pd.read_parquet(f) for f in files]
+        merged = merge_latest(frames)
+        parts = write_compacted(merged, path)
+        for d in days.get(month, []):
+            shutil.rmtree(d)
+        done.append({"month": month, "days": len(files), "deltas": deltas.get(month, 0), "rows": len(merged),
+                     "files": len(parts)})
+        print(f"compacted {month}: {len(files)} day files + {deltas.get(month, 0)} deltas -> {len(parts)} file(s), "
+              f"{len(merged)} rows")
+    return done
+
+
+def rollup_run_stats(base: str = RUN_STATS_BASE, min_age_days: int = COMPACT_MIN_AGE_DAYS, dry_run: bool = False):
+    done = []
+    days = _by_month(base)
+    for month in closed_months(days, min_age_days):
+        paths = [p for d in days[month] for p in sorted(glob.glob(f"{d}/run_id=*/stats.parquet"))]
+        if dry_run:
+            print(f"would roll up {month}: {len(paths)} run stats")
+            continue
+        path = f"{base}/month={month}/runs.parquet"
+        frames = [pd.read_parquet(path)] if os.path.exists(path) else []
+        for p in paths:
+            df = pd.read_parquet(p)
+            # run_id lives in the directory name only
+            df["run_id"] = os.path.basename(os.path.dirname(p)).split("=", 1)[1]
+            frames.append(df)
+        runs = pd.concat(frames, ignore_index=True).drop_duplicates("run_id", keep="last").sort_values("run_id")
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.tmp-{os.getpid()}"
+        runs.to_parquet(tmp, index=False)
+        os.replace(tmp, path)
+        for d in days[month]:
+            shutil.rmtree(d)
+        done.append({"month": month, "runs": len(runs)})
+        print(f"rolled up {month}: {len(paths)} run stats files -> {path}")
+    return done
+
+
+# -------------------------
+# Scan report
+# -------------------------
+def probe_filter(start: datetime, end: datetime, bbox=None):
+    """time_utc in [start, end) (plus lat/lon inside bbox = (west, south, east, north)), as the readers prune."""
+    ts = pa.timestamp("us", tz="UTC")
+    day0, day1 = start.strftime("%Y-%m-%d"), end.strftime("%Y-%m-%d")
+    flt = partition_filter((ds.field("date") >= day0) & (ds.field("date") <= day1),
+                           (ds.field("month") >= day0[:7]) & (ds.field("month") <= day1[:7]))
+    flt &= (ds.field("time_utc") >= pa.scalar(start, ts)) & (ds.field("time_utc") < pa.scalar(end, ts))
+    if bbox is not None:
+        west, south, east, north = bbox
+        flt &= ((ds.field("lon") >= west) & (ds.field("lon") <= east)
+                & (ds.field("lat") >= south) & (ds.field("lat") <= north))
+    return flt
+
+
+def scan(base: str, flt=None) -> pa.Table:
+    # dataset discovery is part of the cost: it lists and opens every file
+    dataset = ds.dataset(base, format="parquet", partitioning=lake_partitioning())
+    return dataset.to_table(columns=SCAN_COLS, filter=flt)
+
+
+def scan_report(base: str, probe, repeat: int = 3) -> dict:
+    """File/row-group counts and median timings of a full read and of the probe filter."""
+    files = ds.dataset(base, format="parquet", partitioning=lake_partitioning()).files
+    out = {"files": len(files), "row_groups": sum(pq.ParquetFile(f).metadata.num_row_groups for f in files)}
+    for name, flt in (("full", None), ("probe", probe)):
+        times = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            rows = scan(base, flt).num_rows
+            times.append(time.perf_counter() - start)
+        out[f"{name}_rows"], out[f"{name}_s"] = rows, statistics.median(times)
+    return out
+
+
+def print_report(before: dict, after: dict):
+    print(f"{'':12s} {'before':>12s} {'after':>12s}")
+    for key in ("files", "row_groups", "full_rows", "probe_rows"):
+        print(f"{key:12s} {before[key]:12d} {after[key]:12d}")
+    for key in ("full_s", "probe_s"):
+        speedup = before[key] / after[key] if after[key] else float("inf")
+        print(f"{key:12s} {before[key] * 1000:10.1f}ms {after[key] * 1000:10.1f}ms  {speedup:.1f}x")
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Compact closed months of the silver lake.")
+    ap.add_argument("--min-age-days", type=int, default=COMPACT_MIN_AGE_DAYS,
+                    help="a month is compacted once it ended this many days ago")
+    ap.add_argument("--dry-run", action="store_true")
+    ap.add_argument("--report", action="store_true", help="time scans before and after compacting")
+    ap.add_argument("--probe-days", type=int, default=7, help="probe window, ending with the newest compacted month")
+    ap.add_argument("--bbox", default="-125,32,-114,42", help="probe bbox: west,south,east,north")
+    args = ap.parse_args()
+
+    start = time.perf_counter()
+    months = closed_months(_by_month(EARTHQUAKES_BASE), args.min_age_days)
+    report = args.report and months and not args.dry_run
+    if report:
+        end = datetime.strptime(months[-1], "%Y-%m").replace(tzinfo=timezone.utc) + timedelta(days=32)
+        end = end.replace(day=1)
+        probe = probe_filter(end - timedelta(days=args.probe_days), end, [float(v) for v in args.bbox.split(",")])
+        before = scan_report(EARTHQUAKES_BASE, probe)
+
+    compact_earthquakes(EARTHQUAKES_BASE, args.min_age_days, args.dry_run)
+    rollup_run_stats(RUN_STATS_BASE, args.min_age_days, args.dry_run)
+
+    if report:
+        print_report(before, scan_report(EARTHQUAKES_BASE, probe))
+    if not args.dry_run:
+        metrics.observe_stage("compact", time.perf_counter() - start)
+        metrics.flush("compact")
@@ -1,38 +1,121 @@
-import os, json, uuid, requests, pandas as pd
+import os, json, gzip, requests, time
 from datetime import datetime, timezone
 
-USGS_FEED = "https://earthquake.usgs.gov/earthquakes/feed/v1.0/summary/all_hour.geojson"
+from ingest import metrics
+from ingest.sources import FEED_BASE, FEEDS, USGSFeed
 
+USGS_FEED = f"{FEED_BASE}/all_hour.geojson"
 
-def ingest_to_bronze():
-    # 1) do the download
-    r = requests.get(USGS_FEED, timeout=30)
-    r.raise_for_status()
-    data = r.json()
+
+def feed_url(feed: str) -> str:
+    return USGSFeed(feed).url
+
+
+def new_run_id(source=None) -> str:
+    # runs of several sources fetched in the same second need distinct ids (silver run_stats, ingestion_runs)
+    run_id = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+    return f"{run_id}-{source.key}" if source is not None else run_id
+
+
+def store_bronze(source, status: int, content: bytes, resp_headers, fetch_seconds: float, state: dict,
+                 run_id: str = None, commit: bool = True):
+    """Write one bronze run (payload + manifest) for a finished download.
+
+    The new source state (ETag, content hash) comes back under "state". With commit=False it is not saved:
+    pipelines that transform + load the run call commit_state() once the run is loaded, so a crash in
+    between makes the next fetch download (and load) the payload again instead of skipping it.
+    """
+    data, digest, skip_reason = None, state.get("sha256"), None
+    if status == 304:
+        skip_reason = "not_modified"
+    elif status == 204:
+        # FDSN services answer 204 when no event matches
+        skip_reason = "no_content"
+    else:
+        data = source.parse(content)
+        digest = source.digest(data)
+        if digest == state.get("sha256"):
+            skip_reason = "unchanged_content"
 
     # 2) Create metadata to be used for audit
     ingestion_time = datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
-    run_id = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+    run_id = run_id or new_run_id()
     day = datetime.now(timezone.utc).strftime("%Y-%m-%d")
 
     # 3) paths
-    base = f"./data/bronze/usgs/date={day}/run_id={run_id}"
+    base = f"{source.base}/{source.dir}/date={day}/run_id={run_id}"
     os.makedirs(base, exist_ok=True)
 
-    # 4) Salve raw data
-    with open(f"{base}/usgs_all_hour.geojson", "w") as f:
-        json.dump(data, f)
+    # 4) Salve raw data (gzip); nothing to store when the feed did not change
+    filename = None
+    if skip_reason is None:
+        name = source.key if source.dir == source.key else f"{source.dir}_{source.key}"
+        filename = f"{name}.{source.ext}.gz"
+        with gzip.open(f"{base}/{filename}", "wb") as f:
+            f.write(content)
 
     # 5) Salve manifest
     manifest = {
-        "source": "USGS all_hour",
-        "source_url": USGS_FEED,
+        "source": f"{source.provider} {source.key}",
+        "provider": source.provider,
+        "source_key": source.key,
+        "source_url": source.url,
+        "format": source.fmt,
         "ingestion_time_utc": ingestion_time,
         "run_id": run_id,
-        "records": len(data.get("features", [])),
-        "bbox": data.get("bbox"),
+        "records": len(data.get("features", [])) if data else 0,
+        "bbox": data.get("bbox") if data else None,
+        "file": filename,
+        "bytes": len(content),
+        "sha256": digest,
+        "etag": resp_headers.get("ETag", state.get("etag")),
+        "last_modified": resp_headers.get("Last-Modified", state.get("last_modified")),
+        "skipped": skip_reason is not None,
+        "skip_reason": skip_reason,
     }
     with open(f"{base}/_manifest.json", "w") as f:
         json.dump(manifest, f)
 
-    return {"base": base, **manifest}
+    info = {"base": base, **manifest, "state": {
+        "etag": manifest["etag"],
+        "last_modified": manifest["last_modified"],
+        "sha256": digest,
+        "run_id": run_id if skip_reason is None else state.get("run_id"),
+    }}
+    if commit:
+        commit_state(source, info)
+
+    metrics.observe_fetch(source.key, fetch_seconds, len(content), manifest["skipped"])
+    metrics.observe_rows("fetch", manifest["records"], manifest["records"])
+    return info
+
+
+def commit_state(source, info: dict):
+    """Save the conditional-GET state of a stored run: the next fetch skips this payload if unchanged."""
+    source.save_state(info["state"])
+
+
+def ingest_to_bronze(feed: str = "all_hour", source=None, commit: bool = True):
+    # one blocking download; ingest/multi_source.py fetches several sources concurrently
+    source = source or USGSFeed(feed)
+    state = source.load_state()
+
+    # 1) conditional download (ETag / Last-Modified from the previous run)
+    start = time.perf_counter()
+    r = requests.get(source.url, params=source.params(), headers=source.headers(state), timeout=source.timeout)
+    fetch_seconds = time.perf_counter() - start
+    if r.status_code not in (204, 304):
+        r.raise_for_status()
+    return store_bronze(source, r.status_code, r.content, r.headers, fetch_seconds, state, commit=commit)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    ap = argparse.ArgumentParser(description="Fetch a USGS summary feed into bronze.")
+    ap.add_argument("--feed", default="all_hour", choices=FEEDS)
+    start = time.perf_counter()
+    info = ingest_to_bronze(ap.parse_args().feed)
+    metrics.observe_stage("fetch", time.perf_counter() - start)
+    metrics.flush("fetch")
+    print(f"{info['run_id']}: {'skipped (' + info['skip_reason'] + ')' if info['skipped'] else str(info['records']) + ' records'}")
@@ -1,39 +1,42 @@
 
+import io
 import os
+import time
 import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pacsv
 import pyarrow.dataset as ds
-from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy import text
 from api.db import engine
+from ingest import metrics
+from ingest.partitions import UNKNOWN_DATE, latest_run, partition_files
 from datetime import datetime, timezone
 from dotenv import load_dotenv
 load_dotenv()
 
-SILVER_BASE = os.getenv("SILVER_BASE", "./data/silver")
 SOURCE = "USGS"
+COPY_BATCH_ROWS = int(os.getenv("COPY_BATCH_ROWS", "50000"))
 
+# columns loaded into `earthquakes` (geom is derived from lat/lon during the merge)
+EQ_COLS = ["event_id", "mag", "place", "time_utc", "lat", "lon", "depth_km", "updated_utc",
+           "run_id", "ingestion_time_utc"]
+# compared to decide whether an incoming version actually differs from the stored one
+CONTENT_COLS = ["mag", "place", "lat", "lon", "depth_km"]
 
-def _latest_stats_parquet():
-    import glob
-    paths = sorted(glob.glob(f"{SILVER_BASE}/run_stats/date=*/run_id=*/stats.parquet"))
-    if not paths:
-        raise FileNotFoundError("Nenhum stats.parquet encontrado em run_stats/")
-    return paths[-1]
 
-stats_parquet = _latest_stats_parquet()
-
-# Extract the latest RUN_DATE e RUN_ID do path
-parts = stats_parquet.split("/")
-RUN_DATE = parts[-3].split("=")[1]
-RUN_ID = parts[-2].split("=")[1]
-
-
-def upsert_ingestion_run(stats_path: str):
+def upsert_ingestion_run(stats_path: str, run_id: str, load: dict = None):
+    # load: stats returned by upsert_earthquakes, recorded as the run's write counts
     df_stats = ds.dataset(stats_path, format="parquet").to_table().to_pandas()
     assert len(df_stats) == 1, "Esperado apenas 1 linha em stats.parquet"
     rec = df_stats.iloc[0].to_dict()
-    rec["run_id"] = RUN_ID
-    rec["source"] = SOURCE
+    rec["run_id"] = run_id
+    if load is not None:
+        rec["rows_inserted"] = load["inserted"]
+        rec["rows_updated"] = load["updated"]
+        rec["rows_unchanged"] = load["unchanged"]
+    # runs recorded before sources existed have no source in their stats
+    rec["source"] = rec.get("source") or SOURCE
     rec["inserted_at_utc"] = datetime.now(timezone.utc)
     
     cols = ",".join(rec.keys())
@@ -47,9 +50,167 @@ def upsert_ingestion_run(stats_path: str):
             ON CONFLICT (run_id) DO UPDATE SET {updates}
         """), rec)
 
-def upsert_earthquakes(eq_parquet_path: str):
+def _earthquakes_table(source, run_id: str) -> pa.Table:
+    cols = [c for c in EQ_COLS if c not in ("run_id", "ingestion_time_utc")]
+    if isinstance(source, pa.Table):
+        # handed over in memory by the pipeline runner
+        table = source.select(cols)
+    else:
+        # silver partitions are merged across runs: only load the rows this run wrote
+        table = ds.dataset(source, format="parquet").to_table(
+            columns=cols, filter=ds.field("run_id") == run_id,
+        )
+    n = table.num_rows
+    ts = pa.timestamp("us", tz="UTC")
+    # COPY reads microseconds; silver keeps pandas' ns precision
+    for col in ("time_utc", "updated_utc"):
+        i = table.schema.get_field_index(col)
+        table = table.set_column(i, col, table[col].cast(ts))
+    table = table.append_column("run_id", pa.array([run_id] * n, pa.string()))
+    # staged only: the merge stamps the stored value itself (_merge_sql)
+    table = table.append_column("ingestion_time_utc", pa.array([datetime.now(timezone.utc)] * n, ts))
+    return table.select(EQ_COLS)
+
+
+def _copy_to_staging(dbapi_conn, table: pa.Table):
+    # stage in a temp table; dropped automatically when the transaction ends
+    cols = ", ".join(EQ_COLS)
+    with dbapi_conn.cursor() as cur:
+        cur.execute("""
+            CREATE TEMP TABLE _eq_stage (
+              event_id TEXT, mag DOUBLE PRECISION, place TEXT, time_utc TIMESTAMPTZ,
+              lat DOUBLE PRECISION, lon DOUBLE PRECISION, depth_km DOUBLE PRECISION,
+              updated_utc TIMESTAMPTZ, run_id TEXT, ingestion_time_utc TIMESTAMPTZ
+            ) ON COMMIT DROP
+        """)
+        opts = pacsv.WriteOptions(include_header=False)
+        for batch in table.to_batches(max_chunksize=COPY_BATCH_ROWS):
+            buf = io.BytesIO()
+            pacsv.write_csv(batch, buf, write_options=opts)
+            buf.seek(0)
+            cur.copy_expert(f"COPY _eq_stage ({cols}) FROM STDIN WITH (FORMAT csv)", buf)
+
+
+def _merge_sql() -> str:
+    cols = ", ".join(EQ_COLS)
+    # ingestion_time_utc is the watermark of the stream, proximity and dashboard syncs: stamped by the merge
+    # statement, taken under MERGE_LOCK_SQL, so stamps follow commit order (see upsert_earthquakes)
+    selected = ", ".join("statement_timestamp()" if c == "ingestion_time_utc" else c for c in EQ_COLS)
+    updates = ",\n                  ".join(f"{c}=EXCLUDED.{c}" for c in EQ_COLS if c not in ("event_id", "time_utc"))
+    geom_col, geom_expr, geom_update = "", "", ""
+    if os.getenv("USE_POSTGIS", "0") == "1":
+        geom_col = ", geom"
+        geom_expr = """,
+                   CASE WHEN lat IS NOT NULL AND lon IS NOT NULL
+                        THEN ST_SetSRID(ST_MakePoint(lon, lat), 4326)::geography END"""
+        geom_update = ",\n                  geom=EXCLUDED.geom"
+    stored = ", ".join(f"earthquakes.{c}" for c in CONTENT_COLS)
+    incoming = ", ".join(f"EXCLUDED.{c}" for c in CONTENT_COLS)
+    # existing rows are only rewritten when the incoming version is newer, or carries the same
+    # version (or none) but different content; stale versions were already dropped from the stage.
+    # xmax = 0 only for freshly inserted tuples -> split inserted/updated counts
+    return f"""
+        WITH merged AS (
+            INSERT INTO earthquakes ({cols}{geom_col})
+            SELECT DISTINCT ON (event_id) {selected}{geom_expr}
+              FROM _eq_stage
+             ORDER BY event_id, updated_utc DESC NULLS LAST
+            ON CONFLICT (event_id, time_utc) DO UPDATE SET
+                  {updates}{geom_update}
+             WHERE EXCLUDED.updated_utc > earthquakes.updated_utc
+                OR (EXCLUDED.updated_utc IS NOT DISTINCT FROM earthquakes.updated_utc
+                    AND ({stored}) IS DISTINCT FROM ({incoming}))
+                OR (earthquakes.updated_utc IS NULL AND EXCLUDED.updated_utc IS NOT NULL)
+            RETURNING (xmax = 0) AS inserted, eq_hour(time_utc) AS hour
+        )
+        SELECT count(*) FILTER (WHERE inserted) AS inserted,
+               count(*) FILTER (WHERE NOT inserted) AS updated,
+               array_agg(DISTINCT hour) AS hours
+          FROM merged
+    """
+
+
+# monthly partitions (migrations/sql/0003) for every month the batch writes to, plus next month: rows never
+# pile up in earthquakes_default between `migrate maintain` runs. A to_regclass() lookup once they exist.
+ENSURE_PARTITIONS_SQL = """
+    SELECT count(eq_create_month_partition(m)) FROM (
+        SELECT DISTINCT date_trunc('month', time_utc AT TIME ZONE 'UTC')::date AS m
+          FROM _eq_stage WHERE time_utc IS NOT NULL
+        UNION
+        SELECT (date_trunc('month', NOW() AT TIME ZONE 'UTC') + interval '1 month')::date
+    ) months
+"""
+
+# one merge at a time, until commit: a load stamping its rows earlier than another can't commit after it, so
+# readers advancing a max(ingestion_time_utc) watermark never step over rows that weren't visible yet
+MERGE_LOCK_SQL = "SELECT pg_advisory_xact_lock(hashtext('earthquakes_merge'))"
+
+# staged versions older than the stored one are left out of the merge (counted as unchanged)
+DROP_STALE_SQL = """
+    DELETE FROM _eq_stage s USING earthquakes e
+     WHERE e.event_id = s.event_id AND s.updated_utc < e.updated_utc
+"""
+
+# the key is (event_id, time_utc) on the partitioned table: drop versions whose time moved
+DROP_MOVED_SQL = """
+    DELETE FROM earthquakes e USING _eq_stage s
+     WHERE e.event_id = s.event_id AND e.time_utc <> s.time_utc
+ RETURNING e.event_id, eq_hour(e.time_utc) AS hour
+"""
+
+
+def upsert_earthquakes(source, run_id: str):
+    # bulk path: COPY into a staging table + one set-based merge
+    # source: silver parquet path(s) or an in-memory Arrow table
+    start = time.perf_counter()
+    table = _earthquakes_table(source, run_id)
+    offered = table.num_rows
+    # the key is (event_id, time_utc) since migration 0003: rows without time_utc can't be stored (they would
+    # fail the whole load), they are counted and left out; silver keeps them in date=unknown
+    null_time = table["time_utc"].null_count
+    if null_time:
+        table = table.filter(pc.is_valid(table["time_utc"]))
+
+    with engine.begin() as conn:
+        _copy_to_staging(conn.connection.driver_connection, table)
+        conn.execute(text(MERGE_LOCK_SQL))
+        conn.execute(text(ENSURE_PARTITIONS_SQL))
+        conn.execute(text(DROP_STALE_SQL))
+        moved = conn.execute(text(DROP_MOVED_SQL)).all()
+        res = conn.execute(text(_merge_sql())).mappings().one()
+        # hours touched by this run: times of the rows written plus the times of the versions moved away
+        buckets = sorted({h for _, h in moved} | set(res["hours"] or []))
+        # rollups behind /earthquakes/stats, refreshed only for those hours (same transaction)
+        if buckets:
+            conn.execute(text("SELECT eq_refresh_rollups(CAST(:buckets AS timestamptz[]))"), {"buckets": buckets})
+
+    elapsed = time.perf_counter() - start
+    # an event whose time moved is re-inserted under its new key, but it is an update
+    n_moved = len({eid for eid, _ in moved})
+    inserted = int(res["inserted"]) - n_moved
+    updated = int(res["updated"]) + n_moved
+    stats = {
+        "rows": offered,
+        "inserted": inserted,
+        "updated": updated,
+        "unchanged": table.num_rows - inserted - updated,
+        "null_time": null_time,
+        "rollup_hours": len(buckets),
+        "seconds": round(elapsed, 3),
+        "rows_per_sec": round(offered / elapsed, 1) if elapsed > 0 else None,
+    }
+    print(f"Upsert earthquakes: {stats['rows']} rows "
+          f"({stats['inserted']} inserted, {stats['updated']} updated, {stats['unchanged']} unchanged, "
+          f"{stats['null_time']} without time_utc skipped, {stats['rollup_hours']} rollup hours) "
+          f"in {stats['seconds']}s — {stats['rows_per_sec']} rows/s")
+    metrics.observe_upsert(stats)
+    return stats
+
+
+def _upsert_earthquakes_rowwise(eq_parquet_path: str, run_id: str):
+    # original row-at-a-time path, kept as the baseline for benchmarks/bench_load_postgres.py
     df = ds.dataset(eq_parquet_path, format="parquet").to_table().to_pandas()
-    df["run_id"] = RUN_ID
+    df["run_id"] = run_id
     df["ingestion_time_utc"] = datetime.now(timezone.utc)
 
     rows = df.to_dict(orient="records")
@@ -58,10 +219,9 @@ def upsert_earthquakes(eq_parquet_path: str):
             conn.execute(text("""
                 INSERT INTO earthquakes (event_id, mag, place, time_utc, lat, lon, depth_km, run_id, ingestion_time_utc)
                 VALUES (:event_id, :mag, :place, :time_utc, :lat, :lon, :depth_km, :run_id, :ingestion_time_utc)
-                ON CONFLICT (event_id) DO UPDATE SET
+                ON CONFLICT (event_id, time_utc) DO UPDATE SET
                   mag=EXCLUDED.mag,
                   place=EXCLUDED.place,
-                  time_utc=EXCLUDED.time_utc,
                   lat=EXCLUDED.lat, lon=EXCLUDED.lon,
                   depth_km=EXCLUDED.depth_km,
                   run_id=EXCLUDED.run_id,
@@ -76,10 +236,20 @@ def upsert_earthquakes(eq_parquet_path: str):
                 WHERE geom IS NULL AND lat IS NOT NULL AND lon IS NOT NULL
             """))
 
+def run_partitions(stats_path: str):
+    # event-date partitions a run can have touched, from its time range (+ the rows without an event time)
+    df_stats = ds.dataset(stats_path, format="parquet").to_table().to_pandas()
+    days = pd.date_range(df_stats["time_min_utc"].min().date(), df_stats["time_max_utc"].max().date(), freq="D")
+    return partition_files([d.strftime("%Y-%m-%d") for d in days] + [UNKNOWN_DATE])
+
+
 if __name__ == "__main__":
 
-    eq_parquet = f"{SILVER_BASE}/earthquakes/date={RUN_DATE}/data.parquet"
-    stats_parquet = f"{SILVER_BASE}/run_stats/date={RUN_DATE}/run_id={RUN_ID}/stats.parquet"
-    upsert_ingestion_run(stats_parquet)
-    upsert_earthquakes(eq_parquet)
+    start = time.perf_counter()
+    stats_parquet, RUN_DATE, RUN_ID = latest_run()
+    load = upsert_earthquakes(run_partitions(stats_parquet), RUN_ID)
+    # recorded last: the API treats a new ingestion_runs row as "rows are loaded"
+    upsert_ingestion_run(stats_parquet, RUN_ID, load)
+    metrics.observe_stage("load", time.perf_counter() - start)
+    metrics.flush("load")
     print("Upsert concluído.")
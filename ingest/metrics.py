@@ -0,0 +1,72 @@
+# metrics.py — stage-level metrics for the batch jobs (fetch / transform / load).
+#
+# Batch processes do not live long enough to be scraped: each job writes its registry to
+# METRICS_DIR/<job>.prom (node_exporter textfile collector format, written atomically) and,
+# when PUSHGATEWAY_URL is set, pushes the same registry to a Prometheus Pushgateway.
+import os
+import time
+
+from prometheus_client import CollectorRegistry, Gauge, push_to_gateway, write_to_textfile
+
+METRICS_DIR = os.getenv("METRICS_DIR", "./data/metrics")  # empty = no textfile
+PUSHGATEWAY_URL = os.getenv("PUSHGATEWAY_URL", "")
+
+REGISTRY = CollectorRegistry()
+
+STAGE_SECONDS = Gauge("eq_ingest_stage_duration_seconds", "Wall time of the last run of a pipeline stage",
+                      ["stage"], registry=REGISTRY)
+FETCH_SECONDS = Gauge("eq_ingest_fetch_duration_seconds", "HTTP time of the last feed download",
+                      ["feed"], registry=REGISTRY)
+FETCH_BYTES = Gauge("eq_ingest_fetch_bytes", "Payload size of the last feed download (0 on 304)",
+                    ["feed"], registry=REGISTRY)
+FETCH_SKIPPED = Gauge("eq_ingest_fetch_skipped", "1 when the last fetch found the feed unchanged",
+                      ["feed"], registry=REGISTRY)
+ROWS_IN = Gauge("eq_ingest_rows_in", "Rows entering a stage in the last run", ["stage"], registry=REGISTRY)
+ROWS_OUT = Gauge("eq_ingest_rows_out", "Rows leaving a stage in the last run", ["stage"], registry=REGISTRY)
+DEDUP_RATIO = Gauge("eq_ingest_dedup_ratio", "Share of transform input rows dropped as duplicates",
+                    registry=REGISTRY)
+UPSERT_ROWS = Gauge("eq_ingest_upsert_rows", "Rows offered to earthquakes by the last load, by outcome",
+                    ["result"], registry=REGISTRY)
+UPSERT_ROWS_PER_SEC = Gauge("eq_ingest_upsert_rows_per_second", "Throughput of the last load",
+                            registry=REGISTRY)
+LAST_SUCCESS = Gauge("eq_ingest_last_success_timestamp_seconds", "Unix time of the last successful job run",
+                     ["job"], registry=REGISTRY)
+
+
+def observe_stage(stage: str, seconds: float):
+    STAGE_SECONDS.labels(stage=stage).set(seconds)
+
+
+def observe_fetch(feed: str, seconds: float, nbytes: int, skipped: bool):
+    FETCH_SECONDS.labels(feed=feed).set(seconds)
+    FETCH_BYTES.labels(feed=feed).set(nbytes)
+    FETCH_SKIPPED.labels(feed=feed).set(1 if skipped else 0)
+
+
+def observe_rows(stage: str, rows_in: int, rows_out: int):
+    ROWS_IN.labels(stage=stage).set(rows_in)
+    ROWS_OUT.labels(stage=stage).set(rows_out)
+    if stage == "transform":
+        DEDUP_RATIO.set(1 - rows_out / rows_in if rows_in else 0)
+
+
+def observe_upsert(stats: dict):
+    for result in ("inserted", "updated", "unchanged", "null_time"):
+        UPSERT_ROWS.labels(result=result).set(stats[result])
+    UPSERT_ROWS_PER_SEC.set(stats["rows_per_sec"] or 0)
+    observe_rows("load", stats["rows"], stats["inserted"] + stats["updated"])
+
+
+def flush(job: str, success: bool = True):
+    """Write METRICS_DIR/<job>.prom and push to the gateway (if configured)."""
+    if success:
+        LAST_SUCCESS.labels(job=job).set(time.time())
+    if METRICS_DIR:
+        os.makedirs(METRICS_DIR, exist_ok=True)
+        write_to_textfile(f"{METRICS_DIR}/{job}.prom", REGISTRY)
+    if PUSHGATEWAY_URL:
+        try:
+            push_to_gateway(PUSHGATEWAY_URL, job=job, registry=REGISTRY)
+        except OSError as e:
+            # metrics must never fail the ingestion itself
+            print(f"Pushgateway unreachable ({e}), metrics kept in {METRICS_DIR or 'memory'}")
@@ -0,0 +1,113 @@
+# multi_source.py — fetch several sources at once, then transform (+ load) each one as its own run
+#
+#   python -m ingest.multi_source --source usgs:all_hour usgs:all_day \
+#       fdsn:emsc=https://www.seismicportal.eu/fdsnws/event/1/query
+#   INGEST_SOURCES="usgs:all_hour,usgs:all_day" python -m ingest.multi_source --silver-only
+#
+# Downloads share one asyncio HTTP client (keep-alive connections reused per host); each source has its
+# own timeout and retry/backoff, and a failing source does not stop the others. Every source writes its
+# own bronze run (bronze/<source>/date=*/run_id=<ts>-<source>). Transform and load stay sequential: they
+# merge into the same silver partitions and tables.
+import argparse
+import asyncio
+import os
+import time
+from datetime import datetime, timezone
+
+import httpx
+
+from ingest import metrics
+from ingest.fecth_data import commit_state, new_run_id, store_bronze
+from ingest.sources import from_spec
+from ingest.transform import transform_to_silver
+
+INGEST_SOURCES = os.getenv("INGEST_SOURCES", "usgs:all_hour")
+MAX_CONNECTIONS = int(os.getenv("INGEST_MAX_CONNECTIONS", "20"))
+
+
+def _retryable(e: Exception) -> bool:
+    # network errors, timeouts and 429/5xx are worth another try; other 4xx are not
+    if isinstance(e, httpx.HTTPStatusError):
+        return e.response.status_code == 429 or e.response.status_code >= 500
+    return isinstance(e, httpx.TransportError)
+
+
+async def fetch_source(client: httpx.AsyncClient, source, commit: bool = True) -> dict:
+    state = source.load_state()
+    for attempt in range(source.retries + 1):
+        start = time.perf_counter()
+        try:
+            r = await client.get(source.url, params=source.params(), headers=source.headers(state),
+                                 timeout=source.timeout)
+            if r.status_code not in (204, 304):
+                r.raise_for_status()
+            break
+        except Exception as e:
+            if attempt == source.retries or not _retryable(e):
+                raise
+            delay = source.backoff * 2 ** attempt
+            print(f"[{source.key}] attempt {attempt + 1} failed: {e!r} — retrying in {delay:.1f}s")
+            await asyncio.sleep(delay)
+    fetch_seconds = time.perf_counter() - start
+    # parse + gzip + manifest are blocking: keep them off the event loop
+    return await asyncio.to_thread(store_bronze, source, r.status_code, r.content, r.headers, fetch_seconds,
+                                   state, new_run_id(source), commit)
+
+
+async def fetch_all(sources, commit: bool = True) -> list:
+    """[(source, bronze info or the exception it failed with)], in the order given."""
+    limits = httpx.Limits(max_connections=MAX_CONNECTIONS, max_keepalive_connections=MAX_CONNECTIONS)
+    async with httpx.AsyncClient(limits=limits, follow_redirects=True) as client:
+        results = await asyncio.gather(*(fetch_source(client, s, commit) for s in sources),
+                                       return_exceptions=True)
+    return list(zip(sources, results))
+
+
+def run_sources(sources, load: bool = True) -> dict:
+    start = time.perf_counter()
+    # fetch state is saved per source once its run is in silver (+ Postgres)
+    fetched = asyncio.run(fetch_all(sources, commit=False))
+    metrics.observe_stage("fetch", time.perf_counter() - start)
+
+    summary = {"fetch_seconds": round(time.perf_counter() - start, 3), "runs": [], "failed": []}
+    for source, info in fetched:
+        if isinstance(info, Exception):
+            print(f"[{source.key}] failed: {info!r}")
+            summary["failed"].append(source.key)
+            continue
+        if info["skipped"]:
+            commit_state(source, info)
+            print(f"[{source.key}] {info['run_id']}: skipped ({info['skip_reason']})")
+            continue
+        silver = transform_to_silver(info["base"])
+        if silver is None:
+            commit_state(source, info)
+            continue
+        if load:
+            from ingest import load_postgres
+            stats = load_postgres.upsert_earthquakes(silver["table"], silver["run_id"])
+            # recorded last: the API treats a new ingestion_runs row as "rows are loaded"
+            load_postgres.upsert_ingestion_run(f"{silver['statsdir']}/stats.parquet", silver["run_id"], stats)
+        commit_state(source, info)
+        print(f"[{source.key}] {silver['run_id']}: {silver['rows']} rows")
+        summary["runs"].append(silver["run_id"])
+    return summary
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Fetch several sources concurrently into bronze/silver (+ Postgres).")
+    ap.add_argument("--source", nargs="+", default=INGEST_SOURCES.split(","),
+                    help="usgs:<feed> or fdsn:<name>=<url> (default: INGEST_SOURCES)")
+    ap.add_argument("--silver-only", action="store_true", help="skip the Postgres load")
+    args = ap.parse_args()
+
+    start_time = datetime.now(timezone.utc)
+    try:
+        summary = run_sources([from_spec(s) for s in args.source], load=not args.silver_only)
+    except Exception:
+        metrics.flush("ingest_multi", success=False)
+        raise
+    metrics.flush("ingest_multi", success=not summary["failed"])
+    total = (datetime.now(timezone.utc) - start_time).total_seconds()
+    print(f"Fetched {len(args.source)} sources in {summary['fetch_seconds']}s, "
+          f"{len(summary['runs'])} new runs, {len(summary['failed'])} failed; total {total:.2f}s")
@@ -0,0 +1,193 @@
+# numpy/pandas/pyarrow are imported inside the functions that use them: the CLI imports this module
+# for its paths, and a dry run should not pay for them
+import glob
+import os
+import shutil
+import time
+
+SILVER_BASE = os.getenv("SILVER_BASE", "./data/silver")
+EARTHQUAKES_BASE = f"{SILVER_BASE}/earthquakes"
+# compacted months: files of at most COMPACT_FILE_ROWS rows (consecutive time ranges),
+# each holding row groups of COMPACT_ROW_GROUP_ROWS spatially clustered rows
+COMPACT_FILE_ROWS = int(os.getenv("COMPACT_FILE_ROWS", "500000"))
+COMPACT_ROW_GROUP_ROWS = int(os.getenv("COMPACT_ROW_GROUP_ROWS", "4096"))
+# partition of the rows without an event time (time_utc NaT): kept, but outside every date range
+UNKNOWN_DATE = "unknown"
+
+
+# Layout: earthquakes/date=YYYY-MM-DD/data.parquet per event day. Closed months are compacted by
+# ingest/compact.py into earthquakes/month=YYYY-MM/part-NNNNN.parquet, which then replaces those days (its own
+# hive key: `date` only ever holds days). Late rows for a compacted month are appended next to its parts as
+# delta-<ns>.parquet and folded in by the next compaction. month=YYYY-MM is a symlink to the generation
+# directory holding the files (_month=YYYY-MM.<ns>, hidden from dataset discovery by the underscore).
+def partition_path(date_part: str, base: str = EARTHQUAKES_BASE) -> str:
+    return f"{base}/date={date_part}/data.parquet"
+
+
+def compacted_dir(month: str, base: str = EARTHQUAKES_BASE) -> str:
+    return f"{base}/month={month}"
+
+
+def month_files(path: str):
+    """Files of a compacted month in merge order: its parts, then the late-row deltas oldest first."""
+    return sorted(glob.glob(f"{path}/part-*.parquet")) + sorted(glob.glob(f"{path}/delta-*.parquet"))
+
+
+def read_month(path: str, event_ids=None):
+    """A compacted month (parts + deltas, in merge order) as a frame; only the given events if `event_ids`."""
+    import pyarrow.dataset as ds
+
+    dataset = ds.dataset(month_files(path), format="parquet")
+    flt = ds.field("event_id").isin(list(event_ids)) if event_ids is not None else None
+    return dataset.to_table(filter=flt).to_pandas()
+
+
+def lake_partitioning():
+    """Hive partitioning of the earthquakes lake: day files set `date`, compacted months set `month`."""
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+
+    return ds.partitioning(pa.schema([("date", pa.string()), ("month", pa.string())]), flavor="hive")
+
+
+def partition_filter(days, months):
+    """Lake filter from a condition on `date` (day files) and one on `month` (compacted months).
+
+    Each side also requires the other key to be absent: a file only carries its own key, and without the
+    guard the other side stays undecided for it and partition pruning reads every file.
+    """
+    import pyarrow.dataset as ds
+
+    return (ds.field("month").is_null() & days) | (ds.field("date").is_null() & months)
+
+
+def latest_run():
+    """(stats.parquet path, run date, run_id) of the newest silver run."""
+    paths = sorted(glob.glob(f"{SILVER_BASE}/run_stats/date=*/run_id=*/stats.parquet"))
+    if not paths:
+        raise FileNotFoundError("Nenhum stats.parquet encontrado em run_stats/")
+    parts = paths[-1].split("/")
+    return paths[-1], parts[-3].split("=")[1], parts[-2].split("=")[1]
+
+
+def partition_files(days, base: str = EARTHQUAKES_BASE):
+    """Existing parquet files holding the given event days (day files, or their compacted month)."""
+    files = []
+    for day in days:
+        path = partition_path(day, base)
+        if os.path.exists(path):
+            files.append(path)
+        else:
+            files += [f for f in month_files(compacted_dir(day[:7], base)) if f not in files]
+    return files
+
+
+def morton_key(lat, lon, bits: int = 16):
+    """Z-order (Morton) code of lat/lon quantized to `bits` per axis; rows without coordinates sort last."""
+    import numpy as np
+
+    scale = (1 << bits) - 1
+    lat, lon = np.asarray(lat, dtype="float64"), np.asarray(lon, dtype="float64")
+    missing = np.isnan(lat) | np.isnan(lon)
+    y = np.round((np.clip(np.nan_to_num(lat), -90, 90) + 90) / 180 * scale).astype(np.uint64)
+    x = np.round((np.clip(np.nan_to_num(lon), -180, 180) + 180) / 360 * scale).astype(np.uint64)
+
+    def spread(v):
+        # insert a zero bit between each of the low 16 bits
+        v = (v | (v << np.uint64(8))) & np.uint64(0x00FF00FF)
+        v = (v | (v << np.uint64(4))) & np.uint64(0x0F0F0F0F)
+        v = (v | (v << np.uint64(2))) & np.uint64(0x33333333)
+        return (v | (v << np.uint64(1))) & np.uint64(0x55555555)
+
+    key = spread(x) | (spread(y) << np.uint64(1))
+    key[missing] = np.iinfo(np.uint64).max
+    return key
+
+
+def write_compacted(df, path: str):
+    """Write a month as time-ordered files, rows inside each file clustered along the Z-order curve.
+
+    Files cover consecutive time ranges (time filters skip whole files); row groups are compact in
+    lat/lon (bbox filters skip row groups). Statistics are written for every column.
+    The files go into a new generation directory and the month symlink is repointed with one rename, so
+    readers see the old or the new month, never a missing or half-written one.
+    """
+    import numpy as np
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    df = df.sort_values(["time_utc", "event_id"]).reset_index(drop=True)
+    base, name = os.path.split(path.rstrip("/"))
+    generation = f"_{name}.{time.time_ns()}"
+    os.makedirs(f"{base}/{generation}")
+    files = []
+    for i, start in enumerate(range(0, len(df), COMPACT_FILE_ROWS)):
+        chunk = df.iloc[start:start + COMPACT_FILE_ROWS]
+        order = np.lexsort((chunk["time_utc"].to_numpy(), morton_key(chunk["lat"], chunk["lon"])))
+        table = pa.Table.from_pandas(chunk.iloc[order], preserve_index=False)
+        pq.write_table(table, f"{base}/{generation}/part-{i:05d}.parquet", row_group_size=COMPACT_ROW_GROUP_ROWS,
+                       write_statistics=True, compression="zstd")
+        files.append(f"{path}/part-{i:05d}.parquet")
+    previous = os.path.realpath(path) if os.path.islink(path) else None
+    link = f"{base}/_{name}.link-{os.getpid()}"
+    os.symlink(generation, link)  # relative: the lake can be moved or mounted elsewhere
+    os.replace(link, path)
+    if previous:
+        shutil.rmtree(previous, ignore_errors=True)
+    return files
+
+
+def merge_latest(frames):
+    import pandas as pd
+
+    # latest version per event_id wins; on equal updated_utc the later frame wins
+    df = pd.concat([f for f in frames if f is not None and len(f)], ignore_index=True)
+    df = df.sort_values(['event_id', 'updated_utc'], kind='stable').drop_duplicates('event_id', keep='last')
+    return df.sort_values(['time_utc', 'event_id']).reset_index(drop=True)
+
+
+def _write_atomic(df, path):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    # dot-prefixed: dataset discovery skips the half-written file
+    tmp = f"{os.path.dirname(path)}/.{os.path.basename(path)}.tmp-{os.getpid()}"
+    df.to_parquet(tmp, index=False)
+    os.replace(tmp, path)
+
+
+def write_partitions(df, base: str = EARTHQUAKES_BASE):
+    """Split a batch by event date and merge each slice into its partition (date=unknown: no event time).
+
+    Only the partitions present in the batch are read and rewritten. Late rows for a compacted month are not
+    merged into it: the stored versions of those events are looked up, and the rows that win go into a new
+    delta file next to the month's parts.
+    Returns {date or month: {"path", "rows", "new_rows", "kept"}}; "kept" are the rows of the batch's runs
+    that won the merge (what the disk load path reads back by run_id).
+    """
+    import pandas as pd
+
+    written = {}
+    run_ids = df["run_id"].unique()
+    dates = df['time_utc'].dt.date.astype(str).where(df['time_utc'].notna(), UNKNOWN_DATE)
+    months = dates.str[:7]
+    compacted = [m for m in months.unique() if m != UNKNOWN_DATE and os.path.isdir(compacted_dir(m, base))]
+    keys = dates.where(~months.isin(compacted), months)
+    for date_part, batch in df.groupby(keys, sort=True, dropna=False):
+        if date_part in compacted:
+            month = compacted_dir(date_part, base)
+            existing = read_month(month, batch["event_id"].unique())
+            merged = merge_latest([existing, batch])
+            kept = merged[merged["run_id"].isin(run_ids)]
+            path = f"{month}/delta-{time.time_ns()}.parquet"
+            if len(kept):
+                _write_atomic(kept, path)
+            # an event can sit in a part and in deltas
+            rows, stored = len(kept), existing["event_id"].nunique()
+        else:
+            path = partition_path(date_part, base)
+            existing = pd.read_parquet(path) if os.path.exists(path) else None
+            merged = merge_latest([existing, batch])
+            _write_atomic(merged, path)
+            kept = merged[merged["run_id"].isin(run_ids)]
+            rows, stored = len(merged), len(existing) if existing is not None else 0
+        written[date_part] = {"path": path, "rows": rows, "new_rows": len(merged) - stored, "kept": kept}
+    return written
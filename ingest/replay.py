@@ -0,0 +1,128 @@
+# Replay / backfill bronze runs into silver.
+#
+#   python -m ingest.replay                      # runs newer than the watermark
+#   python -m ingest.replay --start 2025-10-16 --end 2025-10-19 --workers 8   # bounded: watermark untouched
+#   python -m ingest.replay --rebuild            # drop silver earthquakes and replay everything
+import argparse
+import glob
+import json
+import os
+import shutil
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+
+from ingest.partitions import EARTHQUAKES_BASE, SILVER_BASE, merge_latest, write_partitions
+
+BRONZE_BASE = os.getenv("BRONZE_BASE", "./data/bronze")
+WATERMARK_PATH = f"{SILVER_BASE}/_replay_watermark.json"
+
+
+def discover_runs(start=None, end=None, after=None):
+    """Bronze run dirs (with a manifest), sorted by run_id, optionally filtered by date and watermark."""
+    runs = []
+    # every source keeps its own runs: bronze/<source>/date=*/run_id=*
+    for manifest in glob.glob(f"{BRONZE_BASE}/*/date=*/run_id=*/_manifest.json"):
+        base = os.path.dirname(manifest)
+        day = os.path.basename(os.path.dirname(base)).split("=", 1)[1]
+        run_id = os.path.basename(base).split("=", 1)[1]
+        if start and day < start:
+            continue
+        if end and day > end:
+            continue
+        if after and run_id <= after:
+            continue
+        runs.append((run_id, base))
+    return [base for _, base in sorted(runs)]
+
+
+def latest_bronze():
+    """Newest bronze run that actually stored a payload."""
+    for base in reversed(discover_runs()):
+        with open(f"{base}/_manifest.json") as f:
+            if not json.load(f).get("skipped"):
+                return base
+    raise FileNotFoundError("No bronze run with a payload found")
+
+
+def read_watermark():
+    if not os.path.exists(WATERMARK_PATH):
+        return None
+    with open(WATERMARK_PATH) as f:
+        return json.load(f).get("run_id")
+
+
+def write_watermark(run_id):
+    # only ever moves forward: runs up to the watermark are in silver, a smaller value would replay them again
+    old = read_watermark()
+    if old and old >= run_id:
+        return
+    os.makedirs(os.path.dirname(WATERMARK_PATH), exist_ok=True)
+    tmp = f"{WATERMARK_PATH}.tmp"
+    with open(tmp, "w") as f:
+        json.dump({"run_id": run_id, "updated_at_utc": datetime.now(timezone.utc).isoformat()}, f)
+    os.replace(tmp, WATERMARK_PATH)
+
+
+def _transform_run(bronze_base):
+    # worker: pure transform, no writes (the parent merges in run_id order)
+    from ingest.transform import build_silver_frame, read_bronze
+    features, manifest = read_bronze(bronze_base)
+    if not features:
+        return manifest, None
+    return manifest, build_silver_frame(features, manifest)
+
+
+def replay(runs, workers=None, chunk_size=64, checkpoint=True):
+    """Transform runs in a process pool and merge them into silver chunk by chunk.
+
+    Chunks are merged in run_id order whatever order the workers finish in,
+    and the watermark is advanced after each chunk (checkpoint). Bounded backfills
+    pass checkpoint=False: an older range says nothing about the runs after it.
+    """
+    from ingest.transform import write_run_stats
+
+    totals = {"runs": 0, "rows": 0, "partitions": set()}
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for i in range(0, len(runs), chunk_size):
+            chunk = runs[i:i + chunk_size]
+            results = list(pool.map(_transform_run, chunk))
+
+            frames = [df for _, df in results if df is not None]
+            if frames:
+                written = write_partitions(merge_latest(frames))
+                totals["partitions"].update(written)
+            for manifest, df in results:
+                if df is not None:
+                    write_run_stats(df, manifest)
+                    totals["rows"] += len(df)
+
+            totals["runs"] += len(chunk)
+            if checkpoint:
+                write_watermark(results[-1][0]["run_id"])
+            print(f"Replayed {totals['runs']}/{len(runs)} runs (up to {results[-1][0]['run_id']})")
+
+    totals["partitions"] = sorted(totals["partitions"])
+    return totals
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Replay bronze runs into the silver layer.")
+    ap.add_argument("--start", help="first bronze date (YYYY-MM-DD)")
+    ap.add_argument("--end", help="last bronze date (YYYY-MM-DD)")
+    ap.add_argument("--workers", type=int, default=None)
+    ap.add_argument("--chunk-size", type=int, default=64)
+    ap.add_argument("--full", action="store_true", help="ignore the watermark")
+    ap.add_argument("--rebuild", action="store_true", help="delete silver earthquakes first (implies --full)")
+    args = ap.parse_args()
+
+    if args.rebuild:
+        shutil.rmtree(EARTHQUAKES_BASE, ignore_errors=True)
+    bounded = bool(args.start or args.end)
+    after = None if (args.full or args.rebuild or bounded) else read_watermark()
+
+    runs = discover_runs(args.start, args.end, after)
+    if not runs:
+        print("Nothing to replay.")
+    else:
+        totals = replay(runs, workers=args.workers, chunk_size=args.chunk_size, checkpoint=not bounded)
+        print(f"Done: {totals['runs']} runs, {totals['rows']} rows, {len(totals['partitions'])} partitions.")
@@ -0,0 +1,171 @@
+# sources.py — source adapters: where a feed lives, how to request it, and how its raw payload maps to
+# GeoJSON features shaped like the USGS summary feeds (what transform.build_silver_frame reads).
+#
+# A source is addressed by a spec string (--source / INGEST_SOURCES):
+#   usgs:all_hour                                   USGS summary feed
+#   fdsn:emsc=https://www.seismicportal.eu/fdsnws/event/1/query
+#   fdsn:usgs_fdsn=https://earthquake.usgs.gov/fdsnws/event/1/query?format=geojson
+# FDSN event services answer `format=text` (the standard, pipe-separated) or, for USGS, `format=geojson`.
+import gzip
+import hashlib
+import json
+import os
+from datetime import datetime, timedelta, timezone
+from urllib.parse import parse_qsl, urlsplit
+
+BRONZE_BASE = os.getenv("BRONZE_BASE", "./data/bronze")
+FEED_BASE = os.getenv("USGS_FEED_BASE", "https://earthquake.usgs.gov/earthquakes/feed/v1.0/summary")
+FEEDS = ("all_hour", "all_day", "all_week", "all_month")
+SOURCE_TIMEOUT = float(os.getenv("SOURCE_TIMEOUT", "30"))
+SOURCE_RETRIES = int(os.getenv("SOURCE_RETRIES", "2"))
+SOURCE_BACKOFF = float(os.getenv("SOURCE_BACKOFF", "2.0"))
+FDSN_LOOKBACK_HOURS = int(os.getenv("FDSN_LOOKBACK_HOURS", "24"))
+
+# FDSN text columns (#EventID|Time|Latitude|Longitude|Depth/km|Author|Catalog|Contributor|ContributorID|
+# MagType|Magnitude|MagAuthor|EventLocationName)
+FDSN_TEXT_COLS = ["id", "time", "lat", "lon", "depth", "author", "catalog", "contributor", "contributor_id",
+                  "mag_type", "mag", "mag_author", "place"]
+
+
+class Source:
+    """One feed: request parameters, conditional-GET state and payload normalization."""
+
+    provider = "USGS"
+    fmt = "geojson"
+    ext = "geojson"
+
+    def __init__(self, key: str, dir: str, url: str, timeout: float = SOURCE_TIMEOUT,
+                 retries: int = SOURCE_RETRIES, backoff: float = SOURCE_BACKOFF, base: str = BRONZE_BASE):
+        self.key = key        # state file, metrics label, run id suffix
+        self.dir = dir        # bronze directory under `base`
+        self.url = url
+        self.base = base
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.key!r})"
+
+    def params(self) -> dict:
+        return {}
+
+    @property
+    def state_path(self) -> str:
+        return f"{self.base}/{self.dir}/_state/{self.key}.json"
+
+    def load_state(self) -> dict:
+        if not os.path.exists(self.state_path):
+            return {}
+        with open(self.state_path) as f:
+            return json.load(f)
+
+    def save_state(self, state: dict):
+        os.makedirs(os.path.dirname(self.state_path), exist_ok=True)
+        with open(self.state_path, "w") as f:
+            json.dump(state, f)
+
+    def headers(self, state: dict) -> dict:
+        # conditional download (ETag / Last-Modified from the previous run)
+        headers = {}
+        if state.get("etag"):
+            headers["If-None-Match"] = state["etag"]
+        if state.get("last_modified"):
+            headers["If-Modified-Since"] = state["last_modified"]
+        return headers
+
+    def parse(self, content: bytes) -> dict:
+        """Raw payload -> GeoJSON FeatureCollection."""
+        return json.loads(content)
+
+    def digest(self, data: dict) -> str:
+        # metadata.generated changes on every request, so hash the features only
+        payload = json.dumps(data.get("features", []), sort_keys=True, separators=(",", ":"))
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+
+class USGSFeed(Source):
+    def __init__(self, feed: str = "all_hour", **kw):
+        if feed not in FEEDS:
+            raise ValueError(f"Unknown USGS feed {feed!r}, expected one of {FEEDS}")
+        # all summary feeds share bronze/usgs (state per feed), as before sources existed
+        super().__init__(feed, "usgs", f"{FEED_BASE}/{feed}.geojson", **kw)
+        self.feed = feed
+
+
+class FDSNEvent(Source):
+    """FDSN event web service (fdsnws/event/1/query), asking for the last FDSN_LOOKBACK_HOURS."""
+
+    def __init__(self, name: str, url: str, lookback_hours: int = FDSN_LOOKBACK_HOURS, **kw):
+        parts = urlsplit(url)
+        self.base_params = dict(parse_qsl(parts.query))
+        super().__init__(name, name, parts._replace(query="").geturl(), **kw)
+        self.fmt = self.base_params.setdefault("format", "text")
+        self.ext = "geojson" if self.fmt == "geojson" else "txt"
+        self.provider = name.upper()
+        self.lookback_hours = lookback_hours
+
+    def params(self) -> dict:
+        start = datetime.now(timezone.utc) - timedelta(hours=self.lookback_hours)
+        return {**self.base_params, "starttime": start.strftime("%Y-%m-%dT%H:%M:%S"), "orderby": "time"}
+
+    def parse(self, content: bytes) -> dict:
+        if self.fmt == "geojson":
+            return json.loads(content)
+        return {"type": "FeatureCollection", "features": parse_fdsn_text(content, self.key)}
+
+
+def _ms(iso: str):
+    if not iso:
+        return None
+    ts = datetime.fromisoformat(iso.rstrip("Z"))
+    return int(ts.replace(tzinfo=timezone.utc).timestamp() * 1000)
+
+
+def _float(value: str):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def parse_fdsn_text(content: bytes, prefix: str) -> list:
+    """FDSN text rows -> USGS-shaped features. Ids are prefixed with the source name (catalogs overlap)."""
+    features = []
+    for line in content.decode("utf-8", errors="replace").splitlines():
+        if not line.strip() or line.startswith("#"):
+            continue
+        row = dict(zip(FDSN_TEXT_COLS, (v.strip() for v in line.split("|"))))
+        features.append({
+            "type": "Feature",
+            "id": f"{prefix}:{row['id']}",
+            "properties": {"mag": _float(row.get("mag")), "place": row.get("place") or None,
+                           "time": _ms(row.get("time")), "updated": None,
+                           "magType": row.get("mag_type") or None, "net": row.get("catalog") or None},
+            "geometry": {"type": "Point",
+                         "coordinates": [_float(row.get("lon")), _float(row.get("lat")), _float(row.get("depth"))]},
+        })
+    return features
+
+
+def from_spec(spec: str) -> Source:
+    """Source from a spec: usgs:<feed> or fdsn:<name>=<url>."""
+    kind, _, rest = spec.partition(":")
+    if kind == "usgs":
+        return USGSFeed(rest or "all_hour")
+    if kind == "fdsn" and "=" in rest:
+        name, _, url = rest.partition("=")
+        return FDSNEvent(name, url)
+    raise ValueError(f"Bad source spec {spec!r}: expected usgs:<feed> or fdsn:<name>=<url>")
+
+
+def read_payload(bronze_base: str, manifest: dict) -> dict:
+    """GeoJSON FeatureCollection of a bronze run, whatever format the source stored."""
+    # older runs stored plain usgs_all_hour.geojson, newer ones a gzip named in the manifest
+    path = f'{bronze_base}/{manifest.get("file") or "usgs_all_hour.geojson"}'
+    opener = gzip.open if path.endswith(".gz") else open
+    with opener(path, "rb") as f:
+        content = f.read()
+    if manifest.get("format") == "text":
+        return {"type": "FeatureCollection", "features": parse_fdsn_text(content, manifest["source_key"])}
+    return json.loads(content)
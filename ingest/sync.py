@@ -1,31 +1,128 @@
-# sync.py
-import subprocess
+# sync.py — in-process pipeline runner: fetch -> transform -> load
+#
+#   python -m ingest.sync                           # full run
+#   python -m ingest.sync --feed all_day
+#   python -m ingest.sync --from-stage transform    # latest non-skipped bronze run (or --bronze <dir>)
+#   python -m ingest.sync --from-stage load         # latest silver run (or --run-id <id>)
+import argparse
+import glob
 import time
-from datetime import datetime
-
-def run_script(script_path):
-    print(f"Running {script_path} ...")
-    result = subprocess.run(["python", script_path], capture_output=True, text=True)
-    print(result.stdout)
-    if result.returncode != 0:
-        print(f"Error running {script_path}: {result.stderr}")
-    else:
-        print(f"Finished {script_path}")
-    return result.returncode
+from datetime import datetime, timezone
 
-if __name__ == "__main__":
-    start_time = datetime.utcnow()
-    print(f"Sync started at {start_time.isoformat()} UTC")
+from ingest import load_postgres, metrics
+from ingest.fecth_data import FEEDS, commit_state, ingest_to_bronze
+from ingest.partitions import SILVER_BASE
+from ingest.replay import latest_bronze
+from ingest.sources import USGSFeed
+from ingest.transform import transform_to_silver
+
+STAGES = ["fetch", "transform", "load"]
+
+
+class StopPipeline(Exception):
+    """Raised by a stage when there is nothing left to do (not an error)."""
+
+
+def _commit_fetch(ctx):
+    # the fetched run is done with (loaded, or nothing to load): only now may the next fetch skip it
+    if "bronze" in ctx:
+        commit_state(ctx["source"], ctx["bronze"])
+
+
+def stage_fetch(ctx):
+    ctx["source"] = USGSFeed(ctx["feed"])
+    ctx["bronze"] = ingest_to_bronze(source=ctx["source"], commit=False)
+    if ctx["bronze"]["skipped"]:
+        _commit_fetch(ctx)
+        raise StopPipeline(f"feed unchanged ({ctx['bronze']['skip_reason']})")
+
+
+def stage_transform(ctx):
+    base = ctx["bronze"]["base"] if "bronze" in ctx else (ctx["bronze_dir"] or latest_bronze())
+    silver = transform_to_silver(base)
+    if silver is None:
+        _commit_fetch(ctx)
+        raise StopPipeline(f"no features in {base}")
+    ctx["silver"] = silver
 
-    # Step 1 — Transform data
-    if run_script("ingest/transform.py") == 0:
-        # Step 2 — Load to PostgreSQL
-        if run_script("ingest/load_postgres.py") == 0:
-            print("Sync complete — transform + load successful.")
-        else:
-            print("Load failed, check logs.")
+
+def stage_load(ctx):
+    if "silver" in ctx:
+        # same process: Arrow table straight from the transform
+        run_id = ctx["silver"]["run_id"]
+        stats_path = f"{ctx['silver']['statsdir']}/stats.parquet"
+        source = ctx["silver"]["table"]
+    elif ctx["run_id"]:
+        run_id = ctx["run_id"]
+        matches = glob.glob(f"{SILVER_BASE}/run_stats/date=*/run_id={run_id}/stats.parquet")
+        if not matches:
+            raise FileNotFoundError(f"No stats.parquet for run_id={run_id}")
+        stats_path = matches[0]
+        source = load_postgres.run_partitions(stats_path)
     else:
-        print("Transform failed, stopping process.")
+        stats_path, _, run_id = load_postgres.latest_run()
+        source = load_postgres.run_partitions(stats_path)
+
+    ctx["load"] = load_postgres.upsert_earthquakes(source, run_id)
+    # recorded last: the API treats a new ingestion_runs row as "rows are loaded"
+    load_postgres.upsert_ingestion_run(stats_path, run_id, ctx["load"])
+    _commit_fetch(ctx)
+
+
+STAGE_FUNCS = {"fetch": stage_fetch, "transform": stage_transform, "load": stage_load}
+
+
+def run_stage(name, ctx, retries, backoff):
+    for attempt in range(retries + 1):
+        start = time.perf_counter()
+        try:
+            STAGE_FUNCS[name](ctx)
+            return
+        except StopPipeline:
+            raise
+        except Exception as e:
+            if attempt == retries:
+                raise
+            delay = backoff * 2 ** attempt
+            print(f"[{name}] attempt {attempt + 1} failed: {e!r} — retrying in {delay:.1f}s")
+            time.sleep(delay)
+        finally:
+            ctx["timings"][name] = round(time.perf_counter() - start, 3)
+            metrics.observe_stage(name, ctx["timings"][name])
 
-    end_time = datetime.utcnow()
-    print(f"Total duration: {(end_time - start_time).seconds} seconds")
+
+def run_pipeline(feed="all_hour", from_stage="fetch", bronze_dir=None, run_id=None, retries=2, backoff=2.0):
+    ctx = {"feed": feed, "bronze_dir": bronze_dir, "run_id": run_id, "timings": {}}
+    try:
+        for name in STAGES[STAGES.index(from_stage):]:
+            print(f"[{name}] started")
+            try:
+                run_stage(name, ctx, retries, backoff)
+            except StopPipeline as stop:
+                print(f"[{name}] {stop} — stopping")
+                ctx["stopped"] = str(stop)
+                break
+            print(f"[{name}] finished in {ctx['timings'][name]}s")
+    except Exception:
+        metrics.flush("ingest_sync", success=False)
+        raise
+    metrics.flush("ingest_sync")
+    return ctx
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Run fetch -> transform -> load in one process.")
+    ap.add_argument("--feed", default="all_hour", choices=FEEDS)
+    ap.add_argument("--from-stage", default="fetch", choices=STAGES)
+    ap.add_argument("--bronze", help="bronze run dir for --from-stage transform (default: latest)")
+    ap.add_argument("--run-id", help="silver run to load for --from-stage load (default: latest)")
+    ap.add_argument("--retries", type=int, default=2)
+    ap.add_argument("--backoff", type=float, default=2.0, help="seconds, doubled on each retry")
+    args = ap.parse_args()
+
+    start_time = datetime.now(timezone.utc)
+    print(f"Sync started at {start_time.isoformat()} UTC")
+    ctx = run_pipeline(args.feed, args.from_stage, args.bronze, args.run_id, args.retries, args.backoff)
+    total = (datetime.now(timezone.utc) - start_time).total_seconds()
+    print(f"Stage timings: {ctx['timings']}")
+    print(f"Total duration: {total:.2f} seconds")
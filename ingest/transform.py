@@ -1,29 +1,60 @@
+import numpy as np
 import pandas as pd
-import json, os
+import pyarrow as pa
+import json, os, time
 import pytz
 
-from fecth_data import ingest_to_bronze
-
-def transform_to_silver(bronze_base):
-    # load raw and manifest
-    with open(f'{bronze_base}/usgs_all_hour.geojson') as f:
-        data = json.load(f)
-    with open(f'{bronze_base}/_manifest.json') as f:
-        manifest = json.load(f)
-
-    features = data.get("features", [])
-    if not features:
-        return None
-
-    df = pd.json_normalize(features)
+from ingest import metrics
+from ingest.partitions import SILVER_BASE, write_partitions
+from ingest.sources import read_payload
+
+# Selecting columns to be used in MVP
+SILVER_COLS = [
+    'event_id', 'mag', 'place',
+    'time_utc', 'time_local',
+    'updated_utc', 'updated_local',
+    'lat', 'lon', 'depth_km',
+    'source', 'run_id', 'ingestion_time_utc'
+]
+
+
+def _feature_columns(features):
+    # single pass over the features straight into columns (no json_normalize / per-row Series)
+    ids, mag, place, time_ms, updated_ms, coords = [], [], [], [], [], []
+    for f in features:
+        p = f.get("properties") or {}
+        c = (f.get("geometry") or {}).get("coordinates") or ()
+        ids.append(f.get("id"))
+        mag.append(p.get("mag"))
+        place.append(p.get("place"))
+        time_ms.append(p.get("time"))
+        updated_ms.append(p.get("updated"))
+        coords.append((list(c) + [None, None, None])[:3])
+
+    xyz = np.array(coords, dtype="float64").reshape(-1, 3)
+    return {
+        "event_id": ids,
+        "mag": np.array(mag, dtype="float64"),
+        "place": place,
+        "time": time_ms,
+        "updated": updated_ms,
+        "lon": xyz[:, 0],
+        "lat": xyz[:, 1],
+        "depth_km": xyz[:, 2],
+    }
+
+
+def build_silver_frame(features, manifest):
+    cols = _feature_columns(features)
 
     #Transformation process - cleaning data and creating new columns
- 
-    df['event_id'] = df['id']
-    df['mag'] = df['properties.mag']
-    df['place'] = df['properties.place']
-    df['time_utc'] = pd.to_datetime(df['properties.time'], unit='ms', utc=True)
-    df['updated_utc'] = pd.to_datetime(df['properties.updated'], unit='ms', utc=True)
+    df = pd.DataFrame({
+        'event_id': cols['event_id'],
+        'mag': cols['mag'],
+        'place': cols['place'],
+        'time_utc': pd.to_datetime(pd.Series(cols['time']), unit='ms', utc=True),
+        'updated_utc': pd.to_datetime(pd.Series(cols['updated']), unit='ms', utc=True),
+    })
 
     # timezone local (Asia/Dubai)
     tz_local = pytz.timezone('Asia/Dubai')
@@ -31,35 +62,62 @@ def transform_to_silver(bronze_base):
     df['updated_local'] = df['updated_utc'].dt.tz_convert(tz_local)
 
     # coordinates
-    coords = df['geometry.coordinates'].apply(pd.Series)
-    df['lon'] = coords[0]
-    df['lat'] = coords[1]
-    df['depth_km'] = coords[2]
+    df['lon'] = cols['lon']
+    df['lat'] = cols['lat']
+    df['depth_km'] = cols['depth_km']
 
     # metadados
-    df['source'] = 'USGS'
+    df['source'] = manifest.get('provider', 'USGS')
     df['run_id'] = manifest['run_id']
     df['ingestion_time_utc'] = pd.to_datetime(manifest['ingestion_time_utc'])
 
-    # Selecting columns to be used in MVP
-    cols = [
-        'event_id', 'mag', 'place',
-        'time_utc', 'time_local',
-        'updated_utc', 'updated_local',
-        'lat', 'lon', 'depth_km',
-        'source', 'run_id', 'ingestion_time_utc'
-    ]
-    df = df[cols].sort_values(['time_utc', 'event_id'])
+    df = df[SILVER_COLS].sort_values(['time_utc', 'event_id'])
 
     # dedup Snapshot (latest)
-    df = df.sort_values(['event_id', 'updated_utc']).drop_duplicates('event_id', keep='last')
+    return df.sort_values(['event_id', 'updated_utc']).drop_duplicates('event_id', keep='last')
+
+
+def read_bronze(bronze_base):
+    # load raw and manifest
+    with open(f'{bronze_base}/_manifest.json') as f:
+        manifest = json.load(f)
+    # unchanged feed: the fetcher only wrote a manifest
+    if manifest.get("skipped"):
+        return [], manifest
 
-    # salve parquet partition by date
-    date_part = df['time_utc'].dt.date.astype(str).iloc[0] 
-    outdir = f'./data/silver/earthquakes/date={date_part}'
-    os.makedirs(outdir, exist_ok=True)
-    df.to_parquet(f'{outdir}/data.parquet', index=False)
+    data = read_payload(bronze_base, manifest)
+    return data.get("features", []), manifest
 
+
+def transform_to_silver(bronze_base):
+    features, manifest = read_bronze(bronze_base)
+    if not features:
+        return None
+    return features_to_silver(features, manifest)
+
+
+def features_to_silver(features, manifest):
+    # also used by ingest/live.py with only the new/changed features of a poll
+    df = build_silver_frame(features, manifest)
+    # rows_out < rows_in: duplicate event_ids in the payload collapsed to their latest version
+    metrics.observe_rows("transform", len(features), len(df))
+
+    # merge into every event-date partition the batch touches
+    partitions = write_partitions(df)
+    stats_dir = write_run_stats(df, manifest)
+
+    return {
+        "run_id": manifest["run_id"],
+        "rows": len(df),
+        "partitions": [p["path"] for p in partitions.values()],
+        "statsdir": stats_dir,
+        # in-memory hand-off for the pipeline runner (the parquet above is the side output): only the versions
+        # that won the merge into silver, the same rows the disk path (run_partitions + run_id) loads
+        "table": pa.Table.from_pandas(pd.concat([p["kept"] for p in partitions.values()]), preserve_index=False),
+    }
+
+
+def write_run_stats(df, manifest):
     # -----------------------------
     # STATS (run-level) com BBOX
     # -----------------------------
@@ -71,8 +129,11 @@ def transform_to_silver(bronze_base):
         south, north= float(df["lat"].min()), float(df["lat"].max())
         dmin, dmax  = float(df["depth_km"].min()), float(df["depth_km"].max())
 
+    # run stats are partitioned by ingestion date (same as bronze), events may span several days
+    date_part = manifest["ingestion_time_utc"][:10]
     stats = pd.DataFrame([{
         "run_id": manifest["run_id"],
+        "source": manifest.get("provider", "USGS"),
         "date": date_part,
         "records": int(manifest.get("records", len(df))),
         "time_min_utc": df["time_utc"].min(),
@@ -81,13 +142,24 @@ def transform_to_silver(bronze_base):
         "bbox_east": east, "bbox_north": north, "bbox_max_depth_km": dmax,
     }])
 
-    stats_dir = f'./data/silver/run_stats/date={date_part}/run_id={manifest["run_id"]}'
+    stats_dir = f'{SILVER_BASE}/run_stats/date={date_part}/run_id={manifest["run_id"]}'
     os.makedirs(stats_dir, exist_ok=True)
     stats.to_parquet(f'{stats_dir}/stats.parquet', index=False)
-
-    return {"rows": len(df), "outdir": outdir, "statsdir": stats_dir}
+    return stats_dir
 
 # Data Flow
 if __name__ == "__main__":
-    bronze_info = ingest_to_bronze()
-    transform_to_silver(bronze_info['base'])
+    from ingest.fecth_data import commit_state, ingest_to_bronze
+    from ingest.sources import USGSFeed
+
+    source = USGSFeed()
+    bronze_info = ingest_to_bronze(source=source, commit=False)
+    if bronze_info['skipped']:
+        print(f"Feed unchanged ({bronze_info['skip_reason']}), nothing to transform.")
+    else:
+        start = time.perf_counter()
+        transform_to_silver(bronze_info['base'])
+        metrics.observe_stage("transform", time.perf_counter() - start)
+    # the payload is in silver now: the next fetch may skip it
+    commit_state(source, bronze_info)
+    metrics.flush("transform")
@@ -0,0 +1,191 @@
+# Versioned schema migrations + partition maintenance for the earthquakes table.
+#
+#   python -m migrations.migrate status
+#   python -m migrations.migrate upgrade
+#   python -m migrations.migrate maintain --ahead 3 --retain-months 24
+#   python -m migrations.migrate explain         # checks partition pruning for /recent and /around
+#   python -m migrations.migrate rollups --days 30   # recompute /earthquakes/stats rollups (0 = all history)
+import argparse
+import glob
+import json
+import os
+import sys
+from datetime import datetime, timezone
+
+from sqlalchemy import text
+
+SQL_DIR = os.path.join(os.path.dirname(__file__), "sql")
+USE_POSTGIS = os.getenv("USE_POSTGIS", "0") == "1"
+
+
+def _engine():
+    from api.db import engine
+    return engine
+
+
+def available():
+    """[(version, name, path)] from sql/NNNN_name.sql, in order."""
+    out = []
+    for path in sorted(glob.glob(os.path.join(SQL_DIR, "[0-9]*.sql"))):
+        name = os.path.basename(path)[:-4]
+        out.append((int(name.split("_", 1)[0]), name, path))
+    return out
+
+
+def applied(conn):
+    conn.execute(text("""
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+          version INTEGER PRIMARY KEY,
+          name TEXT NOT NULL,
+          applied_at_utc TIMESTAMPTZ NOT NULL DEFAULT NOW()
+        )
+    """))
+    return {r[0] for r in conn.execute(text("SELECT version FROM schema_migrations"))}
+
+
+def upgrade(engine):
+    with engine.begin() as conn:
+        done = applied(conn)
+    for version, name, path in available():
+        if version in done:
+            continue
+        with open(path) as f:
+            sql = f.read()
+        # "-- requires: postgis" migrations wait until USE_POSTGIS=1
+        if "-- requires: postgis" in sql and not USE_POSTGIS:
+            print(f"skip   {name} (USE_POSTGIS != 1)")
+            continue
+        with engine.begin() as conn:
+            # raw DBAPI cursor: multi-statement files with plpgsql bodies, no param interpolation
+            with conn.connection.driver_connection.cursor() as cur:
+                cur.execute(sql)
+            conn.execute(text("INSERT INTO schema_migrations (version, name) VALUES (:v, :n)"),
+                         {"v": version, "n": name})
+        print(f"apply  {name}")
+
+
+def status(engine):
+    with engine.begin() as conn:
+        done = applied(conn)
+    for version, name, _ in available():
+        print(f"{'[x]' if version in done else '[ ]'} {name}")
+
+
+def maintain(engine, ahead: int = 3, retain_months: int = 0):
+    """Create partitions up to `ahead` months out; detach partitions older than `retain_months` (0 = keep all)."""
+    with engine.begin() as conn:
+        n = conn.execute(text(
+            "SELECT eq_ensure_partitions(NOW(), NOW() + make_interval(months => :ahead))"
+        ), {"ahead": ahead}).scalar()
+        print(f"ensured {n} monthly partitions (through +{ahead} months)")
+        if not retain_months:
+            return
+        cutoff = conn.execute(text(
+            "SELECT to_char(date_trunc('month', NOW() - make_interval(months => :m)), 'YYYY_MM')"
+        ), {"m": retain_months}).scalar()
+        parts = conn.execute(text("""
+            SELECT c.relname
+              FROM pg_inherits i
+              JOIN pg_class c ON c.oid = i.inhrelid
+             WHERE i.inhparent = 'earthquakes'::regclass
+               AND c.relname ~ '^earthquakes_[0-9]{4}_[0-9]{2}$'
+             ORDER BY c.relname
+        """)).scalars().all()
+        for part in parts:
+            if part[len("earthquakes_"):] < cutoff:
+                conn.execute(text(f'ALTER TABLE earthquakes DETACH PARTITION "{part}"'))
+                print(f"detached {part} (table kept for archiving)")
+
+
+def rebuild_rollups(engine, days: int = 0):
+    """Recompute rollup hours from earthquakes; the loader keeps them current, this is for repairs/backfills."""
+    where = "WHERE time_utc >= NOW() - make_interval(days => :days)" if days else ""
+    with engine.begin() as conn:
+        n = conn.execute(text(
+            f"SELECT eq_refresh_rollups(ARRAY(SELECT DISTINCT eq_hour(time_utc) FROM earthquakes {where}))"
+        ), {"days": days}).scalar()
+    print(f"refreshed {n} rollup hours")
+
+
+# -------------------------
+# EXPLAIN-based pruning check
+# -------------------------
+def _relations(plan):
+    if isinstance(plan, dict):
+        if "Relation Name" in plan:
+            yield plan["Relation Name"]
+        for v in plan.values():
+            yield from _relations(v)
+    elif isinstance(plan, list):
+        for v in plan:
+            yield from _relations(v)
+
+
+def _months_between(start, end):
+    y, m = start.year, start.month
+    while (y, m) <= (end.year, end.month):
+        yield f"earthquakes_{y:04d}_{m:02d}"
+        y, m = (y + 1, 1) if m == 12 else (y, m + 1)
+
+
+def allowed_partitions(hours: int):
+    """Partitions a query over the last `hours` may scan once pruned."""
+    now = datetime.now(timezone.utc)
+    start = datetime.fromtimestamp(now.timestamp() - hours * 3600, timezone.utc)
+    return set(_months_between(start, now)) | {"earthquakes_default"}
+
+
+def pruning_checks(hours: int = 24, postgis: bool = USE_POSTGIS):
+    """[(endpoint, SQL, params)] of the read queries whose plans must be pruned."""
+    from api.routers.earthquakes_db import AROUND_SQL, RECENT_SQL
+
+    checks = [("recent", RECENT_SQL, {"hours": hours, "min_mag": 0.0, "limit": 100})]
+    if postgis:
+        checks.append(("around", AROUND_SQL, {"hours": hours, "min_mag": 0.0, "limit": 100,
+                                              "lat": 34.05, "lon": -118.25, "radius_m": 300000.0}))
+    return checks
+
+
+def scanned_partitions(conn, sql, params):
+    plan = conn.execute(text("EXPLAIN (FORMAT JSON) " + sql.text), params).scalar()
+    plan = json.loads(plan) if isinstance(plan, str) else plan
+    return sorted({r for r in _relations(plan) if r.startswith("earthquakes")})
+
+
+def explain(engine, hours: int = 24):
+    allowed = allowed_partitions(hours)
+    ok = True
+    with engine.connect() as conn:
+        for name, sql, params in pruning_checks(hours):
+            scanned = scanned_partitions(conn, sql, params)
+            pruned = set(scanned) <= allowed
+            ok &= pruned
+            print(f"{'PASS' if pruned else 'FAIL'} /{name}: scans {', '.join(scanned) or '-'}")
+    return ok
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Schema migrations for the earthquakes database.")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    sub.add_parser("status")
+    sub.add_parser("upgrade")
+    m = sub.add_parser("maintain")
+    m.add_argument("--ahead", type=int, default=3, help="months of future partitions to keep ready")
+    m.add_argument("--retain-months", type=int, default=0, help="detach partitions older than this (0 = never)")
+    e = sub.add_parser("explain")
+    e.add_argument("--hours", type=int, default=24)
+    r = sub.add_parser("rollups")
+    r.add_argument("--days", type=int, default=0, help="only hours from the last N days (0 = all history)")
+    args = ap.parse_args()
+
+    engine = _engine()
+    if args.cmd == "status":
+        status(engine)
+    elif args.cmd == "upgrade":
+        upgrade(engine)
+    elif args.cmd == "maintain":
+        maintain(engine, args.ahead, args.retain_months)
+    elif args.cmd == "explain":
+        sys.exit(0 if explain(engine, args.hours) else 1)
+    elif args.cmd == "rollups":
+        rebuild_rollups(engine, args.days)
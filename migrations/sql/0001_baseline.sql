@@ -0,0 +1,30 @@
+-- Tables as used by ingest/load_postgres.py and api/routers (no-op on existing databases).
+
+CREATE TABLE IF NOT EXISTS earthquakes (
+  event_id TEXT PRIMARY KEY,          -- source id (e.g., USGS event id)
+  mag DOUBLE PRECISION,
+  place TEXT,
+  time_utc TIMESTAMPTZ,
+  lat DOUBLE PRECISION,
+  lon DOUBLE PRECISION,
+  depth_km DOUBLE PRECISION,
+  run_id TEXT,                        -- audit: which run loaded/updated this row
+  ingestion_time_utc TIMESTAMPTZ
+);
+
+-- one row per run (silver run_stats + audit columns)
+CREATE TABLE IF NOT EXISTS ingestion_runs (
+  run_id TEXT PRIMARY KEY,
+  date TEXT,
+  records BIGINT,
+  time_min_utc TIMESTAMPTZ,
+  time_max_utc TIMESTAMPTZ,
+  bbox_west DOUBLE PRECISION,
+  bbox_south DOUBLE PRECISION,
+  bbox_min_depth_km DOUBLE PRECISION,
+  bbox_east DOUBLE PRECISION,
+  bbox_north DOUBLE PRECISION,
+  bbox_max_depth_km DOUBLE PRECISION,
+  source TEXT,
+  inserted_at_utc TIMESTAMPTZ
+);
@@ -0,0 +1,10 @@
+-- requires: postgis
+CREATE EXTENSION IF NOT EXISTS postgis;
+
+ALTER TABLE earthquakes ADD COLUMN IF NOT EXISTS geom GEOGRAPHY(Point, 4326);
+
+UPDATE earthquakes
+   SET geom = ST_SetSRID(ST_MakePoint(lon, lat), 4326)::geography
+ WHERE geom IS NULL AND lat IS NOT NULL AND lon IS NOT NULL;
+
+CREATE INDEX IF NOT EXISTS idx_eq_geom ON earthquakes USING GIST (geom);
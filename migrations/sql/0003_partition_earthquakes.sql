@@ -0,0 +1,84 @@
+-- earthquakes -> monthly RANGE partitions on time_utc.
+-- The primary key must contain the partition key: (event_id, time_utc).
+
+-- one month partition; rows already sitting in the DEFAULT partition for that month are moved in
+CREATE OR REPLACE FUNCTION eq_create_month_partition(month_start date) RETURNS text AS $$
+DECLARE
+  m date := date_trunc('month', month_start)::date;
+  lo timestamptz := m::timestamp AT TIME ZONE 'UTC';
+  hi timestamptz := (m + interval '1 month')::timestamp AT TIME ZONE 'UTC';
+  part text := format('earthquakes_%s', to_char(m, 'YYYY_MM'));
+BEGIN
+  IF to_regclass(part) IS NOT NULL THEN
+    RETURN part;
+  END IF;
+  CREATE TEMP TABLE _eq_moved ON COMMIT DROP AS
+    SELECT * FROM earthquakes_default WHERE time_utc >= lo AND time_utc < hi;
+  DELETE FROM earthquakes_default WHERE time_utc >= lo AND time_utc < hi;
+  EXECUTE format('CREATE TABLE %I PARTITION OF earthquakes FOR VALUES FROM (%L) TO (%L)', part, lo, hi);
+  INSERT INTO earthquakes SELECT * FROM _eq_moved;
+  DROP TABLE _eq_moved;
+  RETURN part;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION eq_ensure_partitions(from_ts timestamptz, to_ts timestamptz) RETURNS integer AS $$
+DECLARE
+  m date := date_trunc('month', from_ts AT TIME ZONE 'UTC')::date;
+  n integer := 0;
+BEGIN
+  WHILE m <= (to_ts AT TIME ZONE 'UTC')::date LOOP
+    PERFORM eq_create_month_partition(m);
+    m := (m + interval '1 month')::date;
+    n := n + 1;
+  END LOOP;
+  RETURN n;
+END
+$$ LANGUAGE plpgsql;
+
+ALTER TABLE earthquakes RENAME TO earthquakes_unpartitioned;
+ALTER INDEX IF EXISTS earthquakes_pkey RENAME TO earthquakes_unpartitioned_pkey;
+ALTER INDEX IF EXISTS idx_eq_geom RENAME TO idx_eq_unpartitioned_geom;
+
+CREATE TABLE earthquakes (LIKE earthquakes_unpartitioned INCLUDING DEFAULTS)
+  PARTITION BY RANGE (time_utc);
+ALTER TABLE earthquakes ADD PRIMARY KEY (event_id, time_utc);
+CREATE TABLE earthquakes_default PARTITION OF earthquakes DEFAULT;
+
+SELECT eq_ensure_partitions(
+  COALESCE((SELECT min(time_utc) FROM earthquakes_unpartitioned), now()),
+  now() + interval '3 months'
+);
+
+-- rows without time_utc can't be part of the key: kept aside (and reported) instead of dropped
+CREATE TABLE earthquakes_null_time AS SELECT * FROM earthquakes_unpartitioned WHERE time_utc IS NULL;
+DO $$
+DECLARE
+  n bigint := (SELECT count(*) FROM earthquakes_null_time);
+BEGIN
+  IF n > 0 THEN
+    RAISE WARNING '% rows without time_utc not moved into earthquakes, kept in earthquakes_null_time', n;
+  ELSE
+    DROP TABLE earthquakes_null_time;
+  END IF;
+END
+$$;
+
+INSERT INTO earthquakes SELECT * FROM earthquakes_unpartitioned WHERE time_utc IS NOT NULL;
+DROP TABLE earthquakes_unpartitioned;
+
+-- /recent: time window + ORDER BY time_utc DESC, event_id DESC (keyset pagination)
+CREATE INDEX idx_eq_time ON earthquakes (time_utc DESC, event_id DESC);
+-- min_mag filters: (mag IS NULL OR mag >= x) can be answered with a BitmapOr on this index
+CREATE INDEX idx_eq_mag_time ON earthquakes (mag, time_utc DESC);
+-- "newer than" scans on ingestion time; append-only order makes BRIN tiny
+CREATE INDEX idx_eq_ingestion_brin ON earthquakes USING BRIN (ingestion_time_utc);
+
+DO $$
+BEGIN
+  IF EXISTS (SELECT 1 FROM information_schema.columns
+              WHERE table_name = 'earthquakes' AND column_name = 'geom') THEN
+    CREATE INDEX idx_eq_geom ON earthquakes USING GIST (geom);
+  END IF;
+END
+$$;
@@ -0,0 +1,84 @@
+-- Hourly rollups behind /earthquakes/stats.
+-- Maintained per touched hour by the loader (eq_refresh_rollups), so stats queries only read
+-- a handful of rows per hour of window, no matter how much history earthquakes holds.
+-- Histogram bins are stored at base width (0.1 magnitude, 10 km depth) and re-binned at query time.
+
+CREATE TABLE IF NOT EXISTS eq_rollup_hourly (
+  bucket TIMESTAMPTZ PRIMARY KEY,
+  events INTEGER NOT NULL,
+  mag_count INTEGER NOT NULL,
+  mag_sum DOUBLE PRECISION,
+  mag_max DOUBLE PRECISION,
+  depth_count INTEGER NOT NULL,
+  depth_sum DOUBLE PRECISION,
+  depth_max DOUBLE PRECISION
+);
+
+-- mag_bin = floor(mag * 10)
+CREATE TABLE IF NOT EXISTS eq_rollup_mag (
+  bucket TIMESTAMPTZ NOT NULL,
+  mag_bin INTEGER NOT NULL,
+  events INTEGER NOT NULL,
+  PRIMARY KEY (bucket, mag_bin)
+);
+
+-- depth_bin = floor(depth_km / 10)
+CREATE TABLE IF NOT EXISTS eq_rollup_depth (
+  bucket TIMESTAMPTZ NOT NULL,
+  depth_bin INTEGER NOT NULL,
+  events INTEGER NOT NULL,
+  PRIMARY KEY (bucket, depth_bin)
+);
+
+-- region = text after the last comma of place ("10 km SW of Ridgecrest, CA" -> "CA")
+CREATE TABLE IF NOT EXISTS eq_rollup_region (
+  bucket TIMESTAMPTZ NOT NULL,
+  region TEXT NOT NULL,
+  events INTEGER NOT NULL,
+  mag_max DOUBLE PRECISION,
+  PRIMARY KEY (bucket, region)
+);
+
+-- recompute the given hour buckets from earthquakes (delete + insert, so emptied hours disappear)
+CREATE OR REPLACE FUNCTION eq_refresh_rollups(buckets timestamptz[]) RETURNS integer AS $$
+BEGIN
+  DELETE FROM eq_rollup_hourly WHERE bucket = ANY(buckets);
+  DELETE FROM eq_rollup_mag WHERE bucket = ANY(buckets);
+  DELETE FROM eq_rollup_depth WHERE bucket = ANY(buckets);
+  DELETE FROM eq_rollup_region WHERE bucket = ANY(buckets);
+
+  -- one index range scan per hour on idx_eq_time
+  CREATE TEMP TABLE _eq_rollup_rows ON COMMIT DROP AS
+    SELECT b.bucket, e.mag, e.depth_km,
+           COALESCE(NULLIF(btrim(regexp_replace(e.place, '^.*,', '')), ''), 'Unknown') AS region
+      FROM (SELECT DISTINCT unnest(buckets) AS bucket) b
+      JOIN earthquakes e ON e.time_utc >= b.bucket AND e.time_utc < b.bucket + interval '1 hour';
+
+  INSERT INTO eq_rollup_hourly
+  SELECT bucket, count(*), count(mag), sum(mag), max(mag), count(depth_km), sum(depth_km), max(depth_km)
+    FROM _eq_rollup_rows GROUP BY bucket;
+
+  INSERT INTO eq_rollup_mag
+  SELECT bucket, floor(mag * 10)::int, count(*)
+    FROM _eq_rollup_rows WHERE mag IS NOT NULL GROUP BY 1, 2;
+
+  INSERT INTO eq_rollup_depth
+  SELECT bucket, floor(depth_km / 10)::int, count(*)
+    FROM _eq_rollup_rows WHERE depth_km IS NOT NULL GROUP BY 1, 2;
+
+  INSERT INTO eq_rollup_region
+  SELECT bucket, region, count(*), max(mag)
+    FROM _eq_rollup_rows GROUP BY 1, 2;
+
+  DROP TABLE _eq_rollup_rows;
+  RETURN coalesce(array_length(buckets, 1), 0);
+END
+$$ LANGUAGE plpgsql;
+
+-- UTC hour of a timestamp, independent of the session TimeZone
+CREATE OR REPLACE FUNCTION eq_hour(ts timestamptz) RETURNS timestamptz AS $$
+  SELECT date_trunc('hour', ts AT TIME ZONE 'UTC') AT TIME ZONE 'UTC'
+$$ LANGUAGE sql IMMUTABLE;
+
+-- backfill from whatever is already loaded
+SELECT eq_refresh_rollups(ARRAY(SELECT DISTINCT eq_hour(time_utc) FROM earthquakes));
@@ -0,0 +1,11 @@
+-- Change-aware loads.
+-- earthquakes keeps the source's version timestamp (USGS `updated`) so the loader can skip rows
+-- it already holds; ingestion_runs records how many rows each run actually wrote.
+-- Both are nullable columns without defaults: catalog-only changes, no table rewrite.
+
+ALTER TABLE earthquakes ADD COLUMN IF NOT EXISTS updated_utc TIMESTAMPTZ;
+
+ALTER TABLE ingestion_runs
+  ADD COLUMN IF NOT EXISTS rows_inserted BIGINT,
+  ADD COLUMN IF NOT EXISTS rows_updated BIGINT,
+  ADD COLUMN IF NOT EXISTS rows_unchanged BIGINT;
@@ -14,6 +14,9 @@ class EarthquakeOut(BaseModel):
     run_id: Optional[str] = None
     ingestion_time_utc: Optional[datetime] = None
 
+class NearbyEarthquakeOut(EarthquakeOut):
+    distance_km: float
+
 class RunStatsOut(BaseModel):
     run_id: str
     date: Optional[str] = None
@@ -26,3 +29,34 @@ class RunStatsOut(BaseModel):
     bbox_east: Optional[float] = None
     bbox_north: Optional[float] = None
     bbox_max_depth_km: Optional[float] = None
+
+class StatsBucketOut(BaseModel):
+    bucket: datetime
+    events: int
+    mag_avg: Optional[float] = None
+    mag_max: Optional[float] = None
+    depth_avg: Optional[float] = None
+
+class StatsSummaryOut(BaseModel):
+    events: int
+    mag_avg: Optional[float] = None
+    mag_max: Optional[float] = None
+    depth_avg: Optional[float] = None
+    depth_max: Optional[float] = None
+
+class HistogramBinOut(BaseModel):
+    bin_min: float
+    bin_max: float
+    events: int
+
+class RegionStatsOut(BaseModel):
+    region: str
+    events: int
+    mag_max: Optional[float] = None
+
+class GridCellOut(BaseModel):
+    lat: float
+    lon: float
+    events: int
+    mag_max: Optional[float] = None
+    depth_avg: Optional[float] = None
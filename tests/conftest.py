@@ -0,0 +1,14 @@
+# Modules read their paths from the environment at import time: point them at a scratch lake before any
+# ingest/api import, and keep the tests from writing metrics files.
+import os
+import tempfile
+
+_ROOT = tempfile.mkdtemp(prefix="eqpipe-tests-")
+os.environ["SILVER_BASE"] = f"{_ROOT}/silver"
+os.environ["BRONZE_BASE"] = f"{_ROOT}/bronze"
+os.environ["METRICS_DIR"] = ""
+for _name in ("PUSHGATEWAY_URL", "API_KEY", "API_KEYS"):
+    os.environ.pop(_name, None)
+# without a scratch Postgres the api modules only import with the DB-less read backend
+if not os.getenv("DATABASE"):
+    os.environ["READ_BACKEND"] = "silver"
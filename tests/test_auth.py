@@ -0,0 +1,79 @@
+import asyncio
+
+from api.middleware.auth import APIKeyMiddleware, load_keys
+from api.ratelimit import LocalLimiter
+
+KEY = "secret"
+
+
+def blocking_app(release: asyncio.Event):
+    async def app(scope, receive, send):
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await release.wait()  # a stream: the response stays open until the test lets it go
+        await send({"type": "http.response.body", "body": b""})
+    return app
+
+
+async def request(mw, path):
+    status = []
+
+    async def receive():
+        return {"type": "http.request", "body": b""}
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            status.append(message["status"])
+
+    scope = {"type": "http", "method": "GET", "path": path, "headers": [(b"x-api-key", KEY.encode())]}
+    task = asyncio.create_task(mw(scope, receive, send))
+    for _ in range(5):
+        await asyncio.sleep(0)
+    return status[0] if status else None, task
+
+
+def test_streams_have_their_own_cap():
+    async def main():
+        release = asyncio.Event()
+        # rps 0 (off), two requests in flight, one open stream
+        mw = APIKeyMiddleware(blocking_app(release), keys=load_keys(f"k:{KEY}:0:1:2:1", ""), limiter=LocalLimiter())
+        stream, _ = await request(mw, "/earthquakes/recent/stream")
+        second, _ = await request(mw, "/earthquakes/export")
+        first, _ = await request(mw, "/earthquakes/recent")
+        both, _ = await request(mw, "/earthquakes/recent")
+        over, _ = await request(mw, "/earthquakes/recent")
+        release.set()
+        await asyncio.sleep(0.01)
+        after, _ = await request(mw, "/earthquakes/stream")
+        return stream, second, first, both, over, after
+
+    # an open stream doesn't use up the request slots, a second one is over the stream cap
+    assert asyncio.run(main()) == (200, 429, 200, 200, 429, 200)
+
+
+class RefreshingLimiter(LocalLimiter):
+    refresh_every = 0.01
+
+    def __init__(self):
+        super().__init__()
+        self.refreshed = []
+
+    async def refresh(self, key):
+        self.refreshed.append(key)
+
+
+def test_open_stream_refreshes_its_slot():
+    async def main():
+        release, limiter = asyncio.Event(), RefreshingLimiter()
+        mw = APIKeyMiddleware(blocking_app(release), keys=load_keys(f"k:{KEY}:0:1:2:1", ""), limiter=limiter)
+        _, task = await request(mw, "/earthquakes/stream")
+        await asyncio.sleep(0.05)
+        release.set()
+        await task
+        seen = len(limiter.refreshed)
+        await asyncio.sleep(0.03)
+        return limiter, seen
+
+    limiter, seen = asyncio.run(main())
+    assert seen >= 2 and set(limiter.refreshed) == {"k:streams"}
+    # stops with the stream, and the slot is back
+    assert len(limiter.refreshed) == seen and limiter._in_flight == {"k:streams": 0}
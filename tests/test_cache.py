@@ -0,0 +1,63 @@
+from datetime import datetime, timedelta, timezone
+
+from fastapi import Response
+
+from api.cache import cache
+from api.routers import earthquakes_db as eq
+
+T0 = datetime(2025, 10, 9, tzinfo=timezone.utc)
+
+
+def rows(n):
+    # newest first, each loaded a minute after the previous one
+    return [{"event_id": f"e{i}", "time_utc": T0 - timedelta(hours=i), "ingestion_time_utc": T0 + timedelta(minutes=i)}
+            for i in range(n)]
+
+
+def test_since_is_not_part_of_the_key(monkeypatch):
+    calls = []
+    monkeypatch.setattr(eq, "_query", lambda sql, params: calls.append(params) or rows(5))
+    monkeypatch.setattr(eq.watcher, "poll", lambda: None)
+    cache.clear()
+
+    first = eq.recent(Response(), hours=24, limit=5)
+    polls = [eq.recent(Response(), hours=24, limit=5, since=T0 + timedelta(minutes=m, seconds=30)) for m in range(4)]
+
+    assert len(calls) == 1 and "since" not in calls[0]
+    assert len(first) == 5
+    assert [len(p) for p in polls] == [4, 3, 2, 1]
+    # naive timestamps are UTC
+    assert len(eq.recent(Response(), hours=24, limit=5, since=datetime(2025, 10, 9, 0, 2, 30))) == 2
+
+
+def test_next_cursor_with_since_only_for_a_fully_new_page(monkeypatch):
+    monkeypatch.setattr(eq, "_query", lambda sql, params: rows(5))
+    monkeypatch.setattr(eq.watcher, "poll", lambda: None)
+    cache.clear()
+
+    partial, full = Response(), Response()
+    eq.recent(partial, hours=24, limit=5, since=T0 + timedelta(seconds=30))
+    eq.recent(full, hours=24, limit=5, since=T0 - timedelta(minutes=1))
+    assert "x-next-cursor" not in partial.headers
+    assert "x-next-cursor" in full.headers
+
+
+def test_result_read_before_a_clear_is_not_cached(monkeypatch):
+    calls = []
+
+    def query(sql, params):
+        calls.append(params)
+        if len(calls) == 1:
+            cache.clear("new_run")  # the watcher sees a new run while the first query is still reading
+            return rows(1)
+        return rows(3)
+
+    monkeypatch.setattr(eq, "_query", query)
+    monkeypatch.setattr(eq.watcher, "poll", lambda: None)
+    cache.clear()
+
+    assert len(eq.recent(Response(), hours=24, limit=5)) == 1
+    # the pre-run rows were dropped, not cached: the next request reads again and that result is kept
+    assert len(eq.recent(Response(), hours=24, limit=5)) == 3
+    assert len(eq.recent(Response(), hours=24, limit=5)) == 3
+    assert len(calls) == 2
@@ -0,0 +1,103 @@
+import glob
+import os
+from datetime import datetime, timezone
+
+import pyarrow.dataset as ds
+
+from api import export as exporter
+from ingest.compact import compact_earthquakes
+from ingest.partitions import UNKNOWN_DATE, compacted_dir, partition_files, partition_path, write_partitions
+from ingest.transform import build_silver_frame
+
+SEP_3 = int(datetime(2025, 9, 3, tzinfo=timezone.utc).timestamp() * 1000)
+OCT_9 = int(datetime(2025, 10, 9, tzinfo=timezone.utc).timestamp() * 1000)
+
+
+def feature(eid, updated_ms, time_ms=SEP_3, mag=2.0):
+    return {"type": "Feature", "id": eid,
+            "properties": {"mag": mag, "place": "x", "time": time_ms, "updated": updated_ms},
+            "geometry": {"type": "Point", "coordinates": [-118.0, 36.0, 5.0]}}
+
+
+def batch(run_id, *features):
+    manifest = {"run_id": run_id, "ingestion_time_utc": "2025-10-10T10:00:00Z", "provider": "USGS", "bbox": None}
+    return build_silver_frame(list(features), manifest)
+
+
+def compacted_lake(base):
+    write_partitions(batch("r1", feature("a", 1_000), feature("b", 1_000), feature("c", 1_000, time_ms=OCT_9)), base)
+    compact_earthquakes(base, min_age_days=0)
+    return compacted_dir("2025-09", base)
+
+
+def test_month_is_a_swapped_generation(tmp_path):
+    base = str(tmp_path)
+    month = compacted_lake(base)
+
+    assert os.path.islink(month) and os.path.isdir(month)
+    assert not glob.glob(f"{base}/date=2025-09-*")
+    first = os.path.realpath(month)
+    compact_earthquakes(base, min_age_days=0)  # nothing to fold: the month stays as it is
+    assert os.path.realpath(month) == first
+
+    write_partitions(batch("r2", feature("a", 2_000)), base)
+    compact_earthquakes(base, min_age_days=0)
+    # the link now points at a new generation, the old one is gone
+    assert os.path.realpath(month) != first and not os.path.exists(first)
+    assert len(glob.glob(f"{base}/_month=2025-09.*")) == 1
+
+
+def test_late_rows_go_to_a_delta_file(tmp_path):
+    base = str(tmp_path)
+    month = compacted_lake(base)
+    parts = {f: os.stat(f).st_mtime_ns for f in glob.glob(f"{month}/part-*.parquet")}
+
+    # a newer version of "a", an older one of "b" (lost), and a new event "d"
+    written = write_partitions(batch("r2", feature("a", 2_000, mag=4.0), feature("b", 500, mag=9.9),
+                                     feature("d", 1_000)), base)
+
+    assert {f: os.stat(f).st_mtime_ns for f in glob.glob(f"{month}/part-*.parquet")} == parts
+    info = written["2025-09"]
+    assert os.path.dirname(info["path"]) == month and os.path.basename(info["path"]).startswith("delta-")
+    assert sorted(info["kept"]["event_id"]) == ["a", "d"] and info["new_rows"] == 1
+    # what the disk load path reads back for the run is what was handed over
+    on_disk = ds.dataset(partition_files(["2025-09-03"], base), format="parquet").to_table(
+        filter=ds.field("run_id") == "r2")
+    assert sorted(on_disk["event_id"].to_pylist()) == ["a", "d"]
+
+    # readers see one version per event, the newest
+    table = exporter.latest_per_event(exporter.lake(base).to_table(
+        columns=exporter.LAKE_COLS, filter=exporter.date_from("2025-09-01")).cast(exporter.LAKE_SCHEMA))
+    mags = dict(zip(table["event_id"].to_pylist(), table["mag"].to_pylist()))
+    assert mags == {"a": 4.0, "b": 2.0, "c": 2.0, "d": 2.0}
+
+    # the next compaction folds the delta into the parts
+    [done] = compact_earthquakes(base, min_age_days=0)
+    assert done["deltas"] == 1 and done["rows"] == 3
+    assert not glob.glob(f"{month}/delta-*.parquet")
+
+
+def test_day_and_month_keys_prune_apart(tmp_path):
+    base = str(tmp_path)
+    compacted_lake(base)
+    lake = exporter.lake(base)
+
+    def events(flt):
+        return sorted(lake.to_table(columns=["event_id"], filter=flt)["event_id"].to_pylist())
+
+    assert events(exporter.date_from("2025-10-01")) == ["c"]
+    assert events(exporter.date_from("2025-09-20")) == ["a", "b", "c"]  # the compacted month holds the 20th
+    assert events(exporter.date_before("2025-10-01")) == ["a", "b"]
+    assert events(exporter.date_before("2025-09-20")) == []
+
+
+def test_rows_without_time_are_kept(tmp_path):
+    base = str(tmp_path)
+    no_time = feature("n", 1_000, time_ms=None)
+    written = write_partitions(batch("r1", feature("a", 1_000), no_time), base)
+
+    assert sorted(written) == ["2025-09-03", UNKNOWN_DATE]
+    assert written[UNKNOWN_DATE]["path"] == partition_path(UNKNOWN_DATE, base)
+    assert list(written[UNKNOWN_DATE]["kept"]["event_id"]) == ["n"]
+    # stored, but outside every date range the readers scan
+    assert exporter.lake(base).to_table(filter=exporter.date_from("2025-01-01"))["event_id"].to_pylist() == ["a"]
@@ -0,0 +1,25 @@
+import pytest
+
+from api.db_metrics import statement_labels
+from api.routers import earthquakes_db as eq
+
+
+@pytest.mark.parametrize("sql, labels", [
+    ("SELECT EXTRACT(epoch FROM time_utc) AS t FROM earthquakes", ("SELECT", "earthquakes")),
+    ("SELECT substring(place FROM pos) FROM eq_rollup_region WHERE a IS DISTINCT FROM b",
+     ("SELECT", "eq_rollup_region")),
+    ("SELECT a FROM (SELECT floor(lat) AS cy FROM earthquakes) c", ("SELECT", "earthquakes")),
+    ("SELECT * FROM unnest(:ids) u JOIN earthquakes e ON e.event_id = u", ("SELECT", "earthquakes")),
+    ("INSERT INTO earthquakes (event_id) SELECT event_id FROM _eq_stage", ("INSERT", "earthquakes")),
+    ("COPY _eq_stage (event_id, mag) FROM STDIN", ("COPY", "_eq_stage")),
+    ("CREATE TEMP TABLE IF NOT EXISTS _eq_stage (LIKE earthquakes)", ("CREATE", "_eq_stage")),
+    ("SELECT 1", ("SELECT", "-")),
+])
+def test_statement_labels(sql, labels):
+    assert statement_labels(sql) == labels
+
+
+def test_router_statements():
+    assert statement_labels(str(eq.STATS_TIMESERIES_SQL)) == ("SELECT", "eq_rollup_hourly")
+    assert statement_labels(str(eq.STATS_MAG_SQL)) == ("SELECT", "eq_rollup_mag")
+    assert statement_labels(str(eq.GRID_SQL)) == ("SELECT", "earthquakes")
@@ -0,0 +1,95 @@
+import gzip
+import json
+
+import pytest
+
+from ingest.fecth_data import commit_state, ingest_to_bronze
+from ingest.sources import USGSFeed
+from tests.stubs import http_stub
+
+
+def feed(generated: int, ids=("us1", "us2")) -> bytes:
+    features = [{"type": "Feature", "id": i,
+                 "properties": {"mag": 1.5, "place": "x", "time": 1_760_000_000_000, "updated": 1_760_000_060_000},
+                 "geometry": {"type": "Point", "coordinates": [-118.0, 36.0, 5.0]}} for i in ids]
+    return json.dumps({"type": "FeatureCollection", "metadata": {"generated": generated},
+                       "features": features}).encode()
+
+
+@pytest.fixture
+def source(tmp_path):
+    def make(url):
+        s = USGSFeed("all_hour", base=str(tmp_path))
+        s.url = f"{url}/all_hour.geojson"
+        return s
+    return make
+
+
+def etag_route(body: bytes, etag='"v1"'):
+    def handler(headers):
+        if headers.get("If-None-Match") == etag:
+            return 304, {"ETag": etag}, b""
+        return 200, {"ETag": etag, "Content-Type": "application/json"}, body
+    return handler
+
+
+def test_payload_is_stored_gzipped(source):
+    body = feed(1)
+    with http_stub({"/all_hour.geojson": etag_route(body)}) as (url, _):
+        info = ingest_to_bronze(source=source(url))
+
+    assert not info["skipped"] and info["records"] == 2
+    assert info["file"].endswith(".geojson.gz")
+    with gzip.open(f"{info['base']}/{info['file']}", "rb") as f:
+        assert f.read() == body
+    with open(f"{info['base']}/_manifest.json") as f:
+        assert json.load(f)["sha256"] == info["sha256"]
+
+
+def test_not_modified(source):
+    with http_stub({"/all_hour.geojson": etag_route(feed(1))}) as (url, log):
+        src = source(url)
+        ingest_to_bronze(source=src)
+        info = ingest_to_bronze(source=src)
+
+    assert log[1][1].get("If-None-Match") == '"v1"'
+    assert info["skipped"] and info["skip_reason"] == "not_modified"
+    assert info["file"] is None and info["records"] == 0
+
+
+def test_unchanged_content_hash(source):
+    # no ETag, and metadata.generated differs on every request: only the features are hashed
+    generated = iter(range(1, 100))
+    route = {"/all_hour.geojson": lambda h: (200, {"Content-Type": "application/json"}, feed(next(generated)))}
+    with http_stub(route) as (url, _):
+        src = source(url)
+        first = ingest_to_bronze(source=src)
+        second = ingest_to_bronze(source=src)
+
+    assert not first["skipped"]
+    assert second["skipped"] and second["skip_reason"] == "unchanged_content"
+    assert second["sha256"] == first["sha256"]
+
+
+def test_changed_content_is_stored(source):
+    bodies = iter([feed(1), feed(2, ids=("us1", "us2", "us3"))])
+    with http_stub({"/all_hour.geojson": lambda h: (200, {}, next(bodies))}) as (url, _):
+        src = source(url)
+        ingest_to_bronze(source=src)
+        info = ingest_to_bronze(source=src)
+    assert not info["skipped"] and info["records"] == 3
+
+
+def test_state_saved_only_on_commit(source):
+    # a run fetched but never loaded (crash before commit_state) must not be skipped next time
+    with http_stub({"/all_hour.geojson": etag_route(feed(1))}) as (url, log):
+        src = source(url)
+        first = ingest_to_bronze(source=src, commit=False)
+        assert src.load_state() == {}
+        retry = ingest_to_bronze(source=src, commit=False)
+        assert "If-None-Match" not in log[1][1] and not retry["skipped"]
+
+        commit_state(src, retry)
+        assert src.load_state()["etag"] == '"v1"'
+        assert ingest_to_bronze(source=src)["skip_reason"] == "not_modified"
+    assert first["sha256"] == retry["sha256"]
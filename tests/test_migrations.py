@@ -0,0 +1,79 @@
+# Needs DATABASE pointing at a scratch Postgres with the migrations applied (python -m migrations.migrate upgrade).
+import os
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+pytestmark = pytest.mark.skipif(not os.getenv("DATABASE"), reason="DATABASE not set")
+
+
+@pytest.fixture(scope="module")
+def engine():
+    from api.db import engine
+    return engine
+
+
+def _has_geom(conn) -> bool:
+    from sqlalchemy import text
+    return bool(conn.execute(text(
+        "SELECT 1 FROM information_schema.columns WHERE table_name = 'earthquakes' AND column_name = 'geom'"
+    )).first())
+
+
+@pytest.mark.parametrize("hours", [24, 24 * 7])
+@pytest.mark.parametrize("endpoint", ["recent", "around"])
+def test_reads_are_partition_pruned(engine, endpoint, hours):
+    from migrations.migrate import allowed_partitions, pruning_checks, scanned_partitions
+
+    with engine.connect() as conn:
+        if endpoint == "around" and not _has_geom(conn):
+            pytest.skip("PostGIS migration not applied")
+        checks = {name: (sql, params) for name, sql, params in pruning_checks(hours, postgis=True)}
+        scanned = scanned_partitions(conn, *checks[endpoint])
+    assert scanned, "plan scans no earthquakes partition"
+    assert set(scanned) <= allowed_partitions(hours), scanned
+
+
+def test_load_creates_month_partitions(engine):
+    import pyarrow as pa
+    from sqlalchemy import text
+
+    from ingest.load_postgres import upsert_earthquakes
+
+    when = (datetime.now(timezone.utc) + timedelta(days=200)).replace(day=15, microsecond=0)
+    part = f"earthquakes_{when:%Y_%m}"
+    table = pa.Table.from_pylist([{"event_id": "test-future", "mag": 1.0, "place": "x", "time_utc": when,
+                                   "lat": 36.0, "lon": -118.0, "depth_km": 5.0, "updated_utc": when}])
+    try:
+        upsert_earthquakes(table, "test-partitions")
+        with engine.connect() as conn:
+            assert conn.execute(text("SELECT to_regclass(:p)"), {"p": part}).scalar() is not None
+            found = conn.execute(text(
+                "SELECT tableoid::regclass::text FROM earthquakes WHERE event_id = 'test-future'")).scalar()
+            assert found == part
+    finally:
+        with engine.begin() as conn:
+            conn.execute(text("DELETE FROM earthquakes WHERE event_id = 'test-future'"))
+            conn.execute(text("SELECT eq_refresh_rollups(ARRAY[eq_hour(:t)])"), {"t": when})
+
+
+def test_rows_without_time_are_left_out_of_the_load(engine):
+    import pyarrow as pa
+    from sqlalchemy import text
+
+    from ingest.load_postgres import upsert_earthquakes
+
+    when = datetime.now(timezone.utc).replace(microsecond=0)
+    rows = [{"event_id": eid, "mag": 1.0, "place": "x", "time_utc": t, "lat": 36.0, "lon": -118.0,
+             "depth_km": 5.0, "updated_utc": when} for eid, t in (("test-timed", when), ("test-untimed", None))]
+    try:
+        # one row without time_utc must not roll back the others (NOT NULL key column)
+        stats = upsert_earthquakes(pa.Table.from_pylist(rows), "test-null-time")
+        assert stats["rows"] == 2 and stats["null_time"] == 1 and stats["inserted"] == 1
+        with engine.connect() as conn:
+            found = conn.execute(text("SELECT event_id FROM earthquakes WHERE event_id LIKE 'test-%timed'")).all()
+        assert [r[0] for r in found] == ["test-timed"]
+    finally:
+        with engine.begin() as conn:
+            conn.execute(text("DELETE FROM earthquakes WHERE event_id = 'test-timed'"))
+            conn.execute(text("SELECT eq_refresh_rollups(ARRAY[eq_hour(:t)])"), {"t": when})
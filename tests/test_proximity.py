@@ -0,0 +1,35 @@
+from datetime import datetime, timedelta, timezone
+
+import pyarrow as pa
+import pytest
+
+from api import export as exporter
+from api.proximity import ProximityEngine
+
+NOW = datetime.now(timezone.utc).replace(microsecond=0)
+
+
+def events(*ids, loaded=NOW):
+    rows = [{"event_id": eid, "mag": 2.0, "place": "x", "time_utc": NOW - timedelta(minutes=5), "lat": 36.0,
+             "lon": -118.0, "depth_km": 5.0, "run_id": "r", "ingestion_time_utc": loaded} for eid in ids]
+    return pa.Table.from_pylist(rows, schema=exporter.SCHEMA)
+
+
+def test_failed_refresh_stays_stale(monkeypatch):
+    engine = ProximityEngine(source="silver")
+    engine.build(events("a"))
+
+    def broken(since):
+        raise OSError("silver unreadable")
+
+    engine.stale = True  # a new run landed
+    monkeypatch.setattr(engine, "_load", broken)
+    with pytest.raises(OSError):
+        engine.refresh()
+    assert engine.stale
+
+    # the next request retries, from where the index stood
+    monkeypatch.setattr(engine, "_load", lambda since: events("b", loaded=NOW + timedelta(minutes=1)))
+    engine.refresh()
+    assert not engine.stale and engine.size() == 2
+    assert engine.loaded_until == NOW + timedelta(minutes=1)
@@ -0,0 +1,83 @@
+import os
+from datetime import datetime, timedelta, timezone
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+
+from api import export as exporter
+from api.silver import SilverReader
+
+NOW = datetime.now(timezone.utc).replace(microsecond=0)
+
+
+def lake(rows) -> pa.Table:
+    cols = {name: [r.get(name) for r in rows] for name in exporter.LAKE_COLS}
+    return pa.Table.from_pydict(cols, schema=exporter.LAKE_SCHEMA)
+
+
+def version(time_utc, updated, loaded, mag=2.0, event_id="us1"):
+    return {"event_id": event_id, "mag": mag, "place": "x", "time_utc": time_utc, "lat": 36.0, "lon": -118.0,
+            "depth_km": 5.0, "run_id": loaded.strftime("%Y%m%dT%H%M%SZ"), "ingestion_time_utc": loaded,
+            "updated_utc": updated}
+
+
+def test_latest_per_event_orders_by_updated_then_load_time():
+    newer = version(NOW, updated=NOW, loaded=NOW - timedelta(hours=2), mag=3.0)
+    # loaded later (a replay of an old bronze run), but an older version of the event
+    older = version(NOW, updated=NOW - timedelta(hours=1), loaded=NOW, mag=2.0)
+    assert exporter.latest_per_event(lake([newer, older]))["mag"].to_pylist() == [3.0]
+
+    tie = version(NOW, updated=NOW, loaded=NOW, mag=4.0)
+    assert exporter.latest_per_event(lake([newer, tie]))["mag"].to_pylist() == [4.0]
+
+
+def test_query_keeps_one_version_across_hot_and_cold(tmp_path):
+    # the event's time was revised back by four days: its old version stays in today's (hot) partition,
+    # the newest one lands in an older (cold) partition
+    old_time, new_time = NOW - timedelta(minutes=5), NOW - timedelta(days=4)
+    stale = version(old_time, updated=NOW - timedelta(hours=1), loaded=NOW - timedelta(hours=1), mag=2.0)
+    latest = version(new_time, updated=NOW, loaded=NOW, mag=3.5)
+    for row in (stale, latest):
+        part = tmp_path / f"date={row['time_utc']:%Y-%m-%d}"
+        part.mkdir()
+        pq.write_table(lake([row]), part / "data.parquet")
+
+    reader = SilverReader(base=str(tmp_path), hot_days=2)
+    reader.refresh()
+    week = reader.query({"hours": 24 * 7, "min_mag": 0.0, "limit": 100})
+
+    assert week.column_names == exporter.COLS
+    assert week["mag"].to_pylist() == [3.5]
+
+
+def test_stale_hot_version_does_not_take_a_slot(tmp_path):
+    stale = version(NOW - timedelta(minutes=5), updated=NOW - timedelta(hours=1), loaded=NOW - timedelta(hours=1))
+    other = version(NOW - timedelta(minutes=10), updated=NOW, loaded=NOW, event_id="us2")
+    latest = version(NOW - timedelta(days=4), updated=NOW, loaded=NOW, mag=3.5)
+    for day, part in ((NOW, [stale, other]), (latest["time_utc"], [latest])):
+        path = tmp_path / f"date={day:%Y-%m-%d}"
+        path.mkdir(exist_ok=True)
+        pq.write_table(lake(part), path / "data.parquet")
+
+    reader = SilverReader(base=str(tmp_path), hot_days=2)
+    reader.refresh()
+    # the newest event on the page is us2: the stale us1 in the hot table must not fill the slot
+    page = reader.query({"hours": 24 * 7, "min_mag": 0.0, "limit": 1})
+    assert page["event_id"].to_pylist() == ["us2"]
+    week = reader.query({"hours": 24 * 7, "min_mag": 0.0, "limit": 10})
+    assert week["event_id"].to_pylist() == ["us2", "us1"] and week["mag"].to_pylist() == [2.0, 3.5]
+
+
+@pytest.mark.skipif(bool(os.getenv("DATABASE")), reason="DATABASE set")
+def test_db_only_routes_are_not_registered_without_database():
+    from fastapi.testclient import TestClient
+
+    from api.db import engine
+    from api.main import app
+
+    assert engine is None
+    client = TestClient(app)
+    assert client.get("/earthquakes/recent").status_code == 200
+    for path in ("/earthquakes/grid", "/earthquakes/stats/summary", "/earthquakes/nearest?lat=0&lon=0"):
+        assert client.get(path).status_code == 404
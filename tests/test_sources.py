@@ -0,0 +1,126 @@
+import asyncio
+import json
+import os
+import time
+
+import httpx
+import pytest
+
+from benchmarks.bench_sources import fdsn_text, stub_server, stub_sources
+from benchmarks.feedgen import synthetic_feed
+from ingest.multi_source import fetch_all, run_sources
+from ingest.sources import FDSNEvent, USGSFeed, parse_fdsn_text
+from tests.stubs import http_stub
+
+START_MS = 1_760_000_000_000
+
+
+def fdsn(name, url, tmp_path, **kw):
+    return FDSNEvent(name, f"{url}/fdsnws/event/1/query", base=str(tmp_path), **kw)
+
+
+def test_fdsn_text_is_normalized_to_usgs_features():
+    feed = synthetic_feed(50, seed=7, start_ms=START_MS, span_hours=24)
+    features = parse_fdsn_text(b"\n" + fdsn_text(feed), "emsc")
+
+    assert len(features) == len(feed["features"])
+    for got, src in zip(features, feed["features"]):
+        p = src["properties"]
+        assert got["id"] == f"emsc:{src['id']}"
+        assert got["properties"]["time"] == p["time"]
+        assert got["properties"]["mag"] == p["mag"]
+        assert got["properties"]["magType"] == p["magType"]
+        assert got["properties"]["net"] == p["net"]
+        assert got["properties"]["place"] == p["place"]
+        assert got["geometry"]["coordinates"] == pytest.approx(src["geometry"]["coordinates"])
+
+
+def test_fdsn_text_missing_values():
+    row = b"ev1|2025-10-09T12:00:00.5|36.1|-118.2||EMSC|EMSC|EMSC|ev1|||EMSC|\n"
+    (feature,) = parse_fdsn_text(row, "emsc")
+    assert feature["properties"]["mag"] is None and feature["properties"]["place"] is None
+    assert feature["properties"]["time"] == 1_760_011_200_500
+    assert feature["geometry"]["coordinates"] == [-118.2, 36.1, None]
+
+
+def test_per_source_timeout(tmp_path):
+    feed = fdsn_text(synthetic_feed(10, seed=1, start_ms=START_MS, span_hours=24))
+    with stub_server({"/fdsnws/event/1/query": (1.0, "text/plain", feed)}) as slow_url, \
+            stub_server({"/fdsnws/event/1/query": (0.0, "text/plain", feed)}) as fast_url:
+        slow = fdsn("slow", slow_url, tmp_path, timeout=0.2, retries=0)
+        fast = fdsn("fast", fast_url, tmp_path, timeout=5)
+        start = time.perf_counter()
+        (_, slow_result), (_, fast_result) = asyncio.run(fetch_all([slow, fast]))
+        elapsed = time.perf_counter() - start
+
+    # the slow source fails on its own timeout, the other one is stored, and nobody waits for the slow server
+    assert isinstance(slow_result, httpx.TimeoutException)
+    assert fast_result["records"] == 10
+    assert elapsed < 1.0
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    delays, real_sleep = [], asyncio.sleep
+
+    async def sleep(delay, *args, **kw):
+        delays.append(delay)
+        return await real_sleep(0)
+
+    monkeypatch.setattr(asyncio, "sleep", sleep)
+    return delays
+
+
+def flaky(statuses, body):
+    answers = iter(statuses)
+
+    def handler(headers):
+        status = next(answers, 200)
+        return status, {"Content-Type": "application/json"}, body if status == 200 else b"{}"
+    return handler
+
+
+def usgs(url, tmp_path, **kw):
+    source = USGSFeed("all_hour", base=str(tmp_path), **kw)
+    source.url = f"{url}/all_hour.geojson"
+    return source
+
+
+def test_retry_with_exponential_backoff(tmp_path, sleeps):
+    body = json.dumps(synthetic_feed(5, seed=2, start_ms=START_MS, span_hours=1)).encode()
+    with http_stub({"/all_hour.geojson": flaky([503, 429], body)}) as (url, log):
+        [(_, info)] = asyncio.run(fetch_all([usgs(url, tmp_path, retries=2, backoff=0.5)]))
+
+    assert info["records"] == 5
+    assert len(log) == 3
+    assert sleeps == [0.5, 1.0]
+
+
+def test_retries_give_up(tmp_path, sleeps):
+    with http_stub({"/all_hour.geojson": flaky([500] * 10, b"")}) as (url, log):
+        [(_, error)] = asyncio.run(fetch_all([usgs(url, tmp_path, retries=2, backoff=0.5)]))
+    assert isinstance(error, httpx.HTTPStatusError) and len(log) == 3
+
+    # other 4xx are not retried
+    with http_stub({"/all_hour.geojson": flaky([403], b"")}) as (url, log):
+        [(_, error)] = asyncio.run(fetch_all([usgs(url, tmp_path, retries=2, backoff=0.5)]))
+    assert error.response.status_code == 403 and len(log) == 1
+
+
+def test_one_bronze_run_per_source(tmp_path):
+    with stub_sources([0.0, 0.0, 0.0, 0.0], 20, str(tmp_path)) as sources:
+        results = asyncio.run(fetch_all(sources, commit=False))
+        summary = run_sources(sources, load=False)
+
+    infos = [info for _, info in results]
+    assert [info["records"] for info in infos] == [20] * 4
+    # distinct run ids and directories even when fetched in the same second, under each source's dir
+    assert len({info["run_id"] for info in infos}) == 4
+    for source, info in zip(sources, infos):
+        assert info["run_id"].endswith(f"-{source.key}")
+        assert info["base"].startswith(f"{tmp_path}/{source.dir}/")
+        with open(os.path.join(info["base"], "_manifest.json")) as f:
+            assert json.load(f)["source_key"] == source.key
+
+    # the pipeline: each source becomes its own silver run, none failed
+    assert len(summary["runs"]) == 4 and not summary["failed"]
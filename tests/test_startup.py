@@ -0,0 +1,32 @@
+import os
+import subprocess
+import sys
+import time
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# cold start of the CLI in a fresh interpreter (cron containers)
+STARTUP_BUDGET_S = float(os.getenv("STARTUP_BUDGET_MS", "250")) / 1000
+HEAVY_MODULES = ("pandas", "pyarrow", "numpy", "sqlalchemy", "httpx", "requests", "fastapi", "prometheus_client")
+
+
+def python(*args):
+    return subprocess.run([sys.executable, *args], cwd=ROOT, capture_output=True, text=True, check=True)
+
+
+def test_cli_import_is_light():
+    # importing the CLI must not pull in the heavy stack (it is imported by the command that needs it)
+    probe = f"import sys, ingest.cli; print(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))"
+    assert python("-c", probe).stdout.strip() == ""
+
+
+@pytest.mark.parametrize("args", [("-c", "import ingest.cli"), ("-m", "ingest.cli", "fetch", "--dry-run")])
+def test_cold_start_budget(args):
+    # best of a few runs: a slow run is the machine, the fastest is what the code costs
+    runs = []
+    for _ in range(5):
+        start = time.perf_counter()
+        python(*args)
+        runs.append(time.perf_counter() - start)
+    assert min(runs) <= STARTUP_BUDGET_S, f"{min(runs) * 1000:.1f}ms, budget {STARTUP_BUDGET_S * 1000:.0f}ms"
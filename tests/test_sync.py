@@ -0,0 +1,25 @@
+import pyarrow.dataset as ds
+
+from ingest.partitions import partition_files
+from ingest.transform import features_to_silver
+
+
+def feature(eid, updated_ms, mag=2.0, time_ms=1_760_000_000_000):
+    return {"type": "Feature", "id": eid,
+            "properties": {"mag": mag, "place": "x", "time": time_ms, "updated": updated_ms},
+            "geometry": {"type": "Point", "coordinates": [-118.0, 36.0, 5.0]}}
+
+
+def manifest(run_id):
+    return {"run_id": run_id, "ingestion_time_utc": "2025-10-09T10:00:00Z", "provider": "USGS", "bbox": None}
+
+
+def test_handed_over_table_matches_disk_load():
+    # run 1 stores the newer version of ev-a; run 2 brings an older one (late re-fetch) plus ev-b
+    features_to_silver([feature("sync-a", 2_000)], manifest("sync-1"))
+    silver = features_to_silver([feature("sync-a", 1_000, mag=9.9), feature("sync-b", 1_000)], manifest("sync-2"))
+
+    # what `load` reads for the run: its partitions, rows with its run_id
+    on_disk = ds.dataset(partition_files(["2025-10-09"]), format="parquet").to_table(
+        filter=ds.field("run_id") == "sync-2")
+    assert sorted(silver["table"]["event_id"].to_pylist()) == sorted(on_disk["event_id"].to_pylist()) == ["sync-b"]